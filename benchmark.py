@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+解析器与定时计划性能基准
+离线运行，用随机生成的小说测量吞吐量，结果可保存为 JSON 基线，
+修改章节规则后与基线对比即可发现性能退化
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from parser import NovelParser
+from schedule_plan import generate_schedule
+
+# 默认基线文件
+BASELINE_FILE = 'benchmark_baseline.json'
+
+# 耗时比基线增加超过该比例视为退化
+DEFAULT_TOLERANCE = 0.2
+
+_CN_DIGITS = '零一二三四五六七八九'
+_HANZI = '的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学么之都好看起发当没成只如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方期它头经长儿回位分爱老因很给名法间斯知世什两次使身者被高已亲其进此话常与活正感'
+_PUNCTUATION = '，，，。。！？；：'
+
+# 与 NovelParser.CHAPTER_PATTERNS 一一对应的标题样式
+TITLE_STYLES = {
+    'numeral': lambda n, name: f"第{to_chinese_numeral(n)}章 {name}",
+    'english': lambda n, name: f"Chapter {n} {name}",
+    'dot': lambda n, name: f"{n}. {name}",
+    'comma': lambda n, name: f"{n}、{name}",
+    'bracket': lambda n, name: f"【卷一 第{n}章 {name}】",
+    'embedded': lambda n, name: f"正文卷 第{n}章 {name}",
+}
+
+
+# 生成的章节数上限（to_chinese_numeral 支持到 9999 万 9999）
+MAX_CHAPTERS = 10 ** 8 - 1
+
+
+def to_chinese_numeral(number: int) -> str:
+    """把 0-99999999 的整数转为中文数字（一百二十三、一万零五）"""
+    if not 0 <= number <= MAX_CHAPTERS:
+        raise ValueError(f"超出范围（0-{MAX_CHAPTERS}）: {number}")
+    if number == 0:
+        return _CN_DIGITS[0]
+
+    if number >= 10000:
+        high, low = divmod(number, 10000)
+        result = to_chinese_numeral(high) + '万'
+        if low:
+            # 万位之后不满一千时补“零”（一万零五）
+            result += (_CN_DIGITS[0] if low < 1000 else '') + to_chinese_numeral(low)
+        return result
+
+    result = ''
+    for value, unit in ((1000, '千'), (100, '百'), (10, '十'), (1, '')):
+        digit, number = divmod(number, value)
+        if digit:
+            result += _CN_DIGITS[digit] + unit
+        elif result and number and not result.endswith(_CN_DIGITS[0]):
+            result += _CN_DIGITS[0]
+    return result
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    """生成指定长度的随机中文段落"""
+    chars = rng.choices(_HANZI, k=length)
+    for i in range(rng.randint(8, 20), length, rng.randint(8, 20)):
+        chars[i] = rng.choice(_PUNCTUATION)
+    return ''.join(chars) + '。'
+
+
+def _adversarial_line(rng: random.Random, length: int) -> str:
+    """
+    生成对章节正则不友好的长行：大量“第”和数字但不构成标题，
+    原 .* 写法在这类行上会大量回溯
+    """
+    # 以普通文字开头，避免行首拼出“第二十回”这类真正的标题
+    pieces = ['他说：']
+    while sum(map(len, pieces)) < length:
+        pieces.append(rng.choice(['第', '第一', '二十', '回', 'Chapter', '【', '章节', _sentence(rng, 6)]))
+    # 不能出现“章”，否则会匹配“第…章”规则
+    return '　　' + ''.join(pieces).replace('章', '张')
+
+
+def generate_novel(chapters: int = 1000, paragraphs: tuple = (3, 8),
+                   paragraph_length: tuple = (50, 300), title_styles: List[str] = None,
+                   adversarial_lines: int = 0, adversarial_length: int = 2000,
+                   seed: int = 0) -> str:
+    """
+    生成随机小说文本
+
+    Args:
+        chapters: 章节数
+        paragraphs: 每章段落数范围 (最少, 最多)
+        paragraph_length: 每段字数范围 (最少, 最多)
+        title_styles: 使用的标题样式（见 TITLE_STYLES），默认全部轮流使用
+        adversarial_lines: 随机插入正文的恶意长行数量
+        adversarial_length: 恶意长行的长度
+        seed: 随机种子
+
+    Returns:
+        小说文本
+    """
+    rng = random.Random(seed)
+    styles = [TITLE_STYLES[name] for name in (title_styles or TITLE_STYLES)]
+
+    lines = []
+    for number in range(1, chapters + 1):
+        name = _sentence(rng, rng.randint(2, 8)).rstrip('。')
+        lines.append(styles[(number - 1) % len(styles)](number, name))
+        for _ in range(rng.randint(*paragraphs)):
+            lines.append('　　' + _sentence(rng, rng.randint(*paragraph_length)))
+            lines.append('')
+
+    for _ in range(adversarial_lines):
+        lines.insert(rng.randint(1, len(lines)), _adversarial_line(rng, adversarial_length))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _measure(func: Callable, repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _result(seconds: float, size_bytes: int = None, chapters: int = None, items: int = None) -> Dict:
+    result = {'seconds': round(seconds, 6)}
+    if size_bytes is not None:
+        result['mb_per_s'] = round(size_bytes / 1024 / 1024 / seconds, 3) if seconds else None
+    if chapters is not None:
+        result['chapters_per_s'] = round(chapters / seconds, 1) if seconds else None
+    if items is not None:
+        result['items_per_s'] = round(items / seconds, 1) if seconds else None
+    return result
+
+
+def bench_parse(text: str, chapters: int, repeat: int) -> Dict:
+    """整本解析（NovelParser._parse）"""
+    size = len(text.encode('utf-8'))
+    parsed = []
+    seconds = _measure(lambda: parsed.append(NovelParser(content=text).get_chapter_count()), repeat)
+    # 恶意长行等被误判为标题时章节数会变多，吞吐量也就失真了
+    if parsed[-1] != chapters:
+        raise AssertionError(f"解析出 {parsed[-1]} 章，应为 {chapters} 章")
+    return _result(seconds, size, chapters)
+
+
+def bench_is_chapter_title(text: str, repeat: int) -> Dict:
+    """逐行调用 _is_chapter_title"""
+    parser = NovelParser(content='\n')
+    lines = text.split('\n')
+    size = len(text.encode('utf-8'))
+
+    def run():
+        for line in lines:
+            parser._is_chapter_title(line)
+
+    seconds = _measure(run, repeat)
+    return _result(seconds, size, items=len(lines))
+
+
+def bench_save_chapters(text: str, chapters: int, fmt: str, repeat: int) -> Dict:
+    """导出章节（save_chapters）"""
+    parser = NovelParser(content=text)
+    size = len(text.encode('utf-8'))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        target = os.path.join(temp_dir, 'chapters.jsonl' if fmt == 'jsonl' else 'chapters')
+
+        def run():
+            # 屏蔽导出时的提示信息
+            with contextlib.redirect_stdout(io.StringIO()):
+                parser.save_chapters(target, fmt)
+
+        seconds = _measure(run, repeat)
+    return _result(seconds, size, chapters)
+
+
+def bench_generate_schedule(count: int, repeat: int) -> Dict:
+    """生成定时发布计划（schedule_plan.generate_schedule，发布器也使用它）"""
+    start_date = datetime(2024, 1, 1)
+    publish_times = ['08:00', '12:00', '18:00', '21:00']
+
+    seconds = _measure(lambda: generate_schedule(count, start_date, publish_times), repeat)
+    return _result(seconds, chapters=count)
+
+
+def run_benchmarks(chapters: int = 2000, adversarial_lines: int = 50,
+                   repeat: int = 3, seed: int = 0) -> Dict:
+    """
+    运行全部基准
+
+    Returns:
+        {'meta': {...}, 'results': {基准名: {'seconds', 'mb_per_s', 'chapters_per_s', ...}}}
+    """
+    text = generate_novel(chapters, seed=seed)
+    hostile = generate_novel(chapters, adversarial_lines=adversarial_lines, seed=seed)
+
+    print(f"生成测试小说: {chapters} 章，{len(text.encode('utf-8')) / 1024 / 1024:.1f} MB"
+          f"（含恶意长行版本 {len(hostile.encode('utf-8')) / 1024 / 1024:.1f} MB）\n")
+
+    benchmarks = {
+        'parse': lambda: bench_parse(text, chapters, repeat),
+        'parse_adversarial': lambda: bench_parse(hostile, chapters, repeat),
+        'is_chapter_title': lambda: bench_is_chapter_title(text, repeat),
+        'is_chapter_title_adversarial': lambda: bench_is_chapter_title(hostile, repeat),
+        'save_chapters_dir': lambda: bench_save_chapters(text, chapters, 'dir', repeat),
+        'save_chapters_jsonl': lambda: bench_save_chapters(text, chapters, 'jsonl', repeat),
+        'generate_schedule': lambda: bench_generate_schedule(chapters * 10, repeat),
+    }
+
+    results = {}
+    for name, bench in benchmarks.items():
+        try:
+            results[name] = bench()
+        except ImportError as e:
+            print(f"  ⚠ {name}: 跳过（{e}）")
+            continue
+        print(f"  ✓ {name}: {_format_result(results[name])}")
+
+    return {
+        'meta': {
+            'chapters': chapters,
+            'adversarial_lines': adversarial_lines,
+            'repeat': repeat,
+            'seed': seed,
+            'python': sys.version.split()[0],
+            'created': datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+
+
+def _format_result(result: Dict) -> str:
+    parts = [f"{result['seconds'] * 1000:.1f} ms"]
+    if result.get('mb_per_s'):
+        parts.append(f"{result['mb_per_s']:.1f} MB/s")
+    if result.get('chapters_per_s'):
+        parts.append(f"{result['chapters_per_s']:.0f} 章/s")
+    if result.get('items_per_s'):
+        parts.append(f"{result['items_per_s']:.0f} 行/s")
+    return '，'.join(parts)
+
+
+def save_baseline(report: Dict, baseline_file: str = BASELINE_FILE):
+    """保存基线"""
+    with open(baseline_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 基线已保存到 {baseline_file}")
+
+
+def compare_baseline(report: Dict, baseline_file: str = BASELINE_FILE,
+                     tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    与基线对比耗时
+
+    Returns:
+        退化的基准名称列表
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    if baseline.get('meta', {}).get('chapters') != report['meta']['chapters']:
+        print("⚠ 基线使用的章节数不同，对比结果仅供参考")
+
+    print(f"\n与基线对比（{baseline_file}，容差 {tolerance:.0%}）:")
+    regressions = []
+    for name, result in report['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            print(f"  - {name}: 基线中没有该项")
+            continue
+
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            print(f"  ✗ {name}: 慢了 {ratio:.2f}x（{old['seconds'] * 1000:.1f} → {result['seconds'] * 1000:.1f} ms）")
+        else:
+            print(f"  ✓ {name}: {ratio:.2f}x")
+
+    return regressions
+
+
+def _chapter_count(value: str) -> int:
+    """命令行参数：章节数"""
+    count = int(value)
+    if not 1 <= count <= MAX_CHAPTERS:
+        raise argparse.ArgumentTypeError(f"章节数必须在 1-{MAX_CHAPTERS} 之间")
+    return count
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='解析器与定时计划性能基准')
+    arg_parser.add_argument('-n', '--chapters', type=_chapter_count, default=2000,
+                            help=f'测试小说章节数（1-{MAX_CHAPTERS}，默认 2000）')
+    arg_parser.add_argument('-a', '--adversarial', type=int, default=50, help='恶意长行数量（默认 50）')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='每项重复次数，取最快一次（默认 3）')
+    arg_parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    arg_parser.add_argument('--save', nargs='?', const=BASELINE_FILE, help='保存为基线文件')
+    arg_parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, help='与基线文件对比')
+    arg_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的变慢比例（默认 0.2）')
+    arg_parser.add_argument('--generate', metavar='FILE', help='只生成测试小说到文件，不运行基准')
+    args = arg_parser.parse_args()
+
+    if args.generate:
+        text = generate_novel(args.chapters, adversarial_lines=args.adversarial, seed=args.seed)
+        with open(args.generate, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"✓ 已生成 {args.chapters} 章测试小说: {args.generate}")
+        return
+
+    report = run_benchmarks(args.chapters, args.adversarial, args.repeat, args.seed)
+
+    if args.compare:
+        try:
+            regressions = compare_baseline(report, args.compare, args.tolerance)
+        except FileNotFoundError:
+            print(f"✗ 基线文件不存在: {args.compare}")
+            sys.exit(1)
+        if regressions:
+            print(f"\n✗ {len(regressions)} 项性能退化: {', '.join(regressions)}")
+            sys.exit(1)
+
+    if args.save:
+        save_baseline(report, args.save)
+
+
+if __name__ == "__main__":
+    main()
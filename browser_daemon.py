@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+后台浏览器
+常驻一个已登录的 Chrome，菜单操作和命令行调用通过本地端口连接同一个浏览器会话，
+不必每次冷启动 Chrome。空闲超时后自动退出，定期检查浏览器是否存活，崩溃时自动重启
+
+用法：
+    python browser_daemon.py start    # 后台启动
+    python browser_daemon.py status   # 查看状态
+    python browser_daemon.py stop     # 关闭
+"""
+import os
+import sys
+import json
+import time
+import socket
+import secrets
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+from selenium import webdriver
+
+from parse_cache import CACHE_DIR
+
+# 连接信息文件（端口、进程号、令牌）
+STATE_FILE = os.path.join(CACHE_DIR, 'browser_daemon.json')
+
+# 默认空闲超时（秒），没有客户端使用时自动关闭浏览器
+IDLE_TIMEOUT = 30 * 60
+
+# 浏览器健康检查间隔（秒）
+HEALTH_INTERVAL = 30
+
+# 客户端心跳间隔（秒），超过两个间隔没有心跳视为客户端已退出
+HEARTBEAT_INTERVAL = 20
+
+# 等待后台浏览器启动的时间（秒）
+START_TIMEOUT = 90
+
+
+def _read_state() -> Optional[Dict]:
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def request(command: str, state: Dict = None, timeout: float = 10, **params) -> Optional[Dict]:
+    """
+    向后台浏览器发送一条命令
+
+    Args:
+        command: 命令（attach / heartbeat / release / status / stop）
+        state: 连接信息，默认读取 STATE_FILE
+        timeout: 超时（秒）
+        **params: 命令参数
+
+    Returns:
+        响应，后台浏览器未运行时返回 None
+    """
+    state = state or _read_state()
+    if not state:
+        return None
+
+    message = {'command': command, 'token': state['token'], **params}
+    try:
+        with socket.create_connection(('127.0.0.1', state['port']), timeout=timeout) as conn:
+            conn.sendall(json.dumps(message).encode('utf-8') + b'\n')
+            with conn.makefile('r', encoding='utf-8') as reader:
+                line = reader.readline()
+    except OSError:
+        return None
+    return json.loads(line) if line else None
+
+
+class AttachedDriver(webdriver.Remote):
+    """
+    连接到后台浏览器已有会话的 WebDriver
+
+    quit() 只释放占用，不关闭浏览器；连接期间在后台线程中发送心跳
+    """
+
+    def __init__(self, executor_url: str, session_id: str, state: Dict, client_id: str):
+        self._attach_session_id = session_id
+        self._state = state
+        self._client_id = client_id
+        super().__init__(command_executor=executor_url, options=webdriver.ChromeOptions())
+
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._heartbeat.start()
+
+    def start_session(self, *args, **kwargs):
+        # 不新建会话，直接使用后台浏览器的会话
+        self.session_id = self._attach_session_id
+        self.caps = {}
+
+    def _heartbeat_loop(self):
+        while not self._stop_heartbeat.wait(HEARTBEAT_INTERVAL):
+            request('heartbeat', self._state, client=self._client_id)
+
+    def quit(self):
+        self._stop_heartbeat.set()
+        request('release', self._state, client=self._client_id)
+
+
+def attach() -> Optional[AttachedDriver]:
+    """
+    连接后台浏览器（浏览器已崩溃时由守护进程先重启）
+
+    Returns:
+        已连接的 WebDriver，后台浏览器未运行时返回 None
+
+    Raises:
+        RuntimeError: 浏览器正被其他进程使用
+    """
+    state = _read_state()
+    if not state:
+        return None
+
+    client_id = f"{os.getpid()}-{secrets.token_hex(4)}"
+    response = request('attach', state, timeout=START_TIMEOUT, client=client_id)
+    if not response or response.get('error'):
+        return None
+    if response.get('busy'):
+        raise RuntimeError(f"后台浏览器正被其他进程使用（{response['busy']}）")
+
+    return AttachedDriver(response['executor_url'], response['session_id'], state, client_id)
+
+
+def start_daemon(config_file: str = "config.json", idle_timeout: int = IDLE_TIMEOUT) -> bool:
+    """
+    在后台启动浏览器守护进程，等待浏览器就绪
+
+    Returns:
+        是否启动成功
+    """
+    # 连接信息文件可能是已退出或其他守护进程留下的（令牌不符时返回 error），只认已就绪的
+    status = request('status', timeout=2)
+    if status and status.get('ready'):
+        return True
+
+    command = [sys.executable, os.path.abspath(__file__), 'serve',
+               '-c', config_file, '--idle', str(idle_timeout)]
+    log_path = Path(CACHE_DIR) / 'browser_daemon.log'
+    log_path.parent.mkdir(exist_ok=True)
+    with open(log_path, 'a', encoding='utf-8') as log:
+        kwargs = {'stdout': log, 'stderr': subprocess.STDOUT, 'stdin': subprocess.DEVNULL}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+        else:
+            kwargs['start_new_session'] = True
+        subprocess.Popen(command, **kwargs)
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = request('status', timeout=2)
+        if status and status.get('ready'):
+            return True
+        time.sleep(0.5)
+
+    print(f"✗ 后台浏览器启动超时，日志: {log_path}")
+    return False
+
+
+class BrowserDaemon:
+    """后台浏览器守护进程"""
+
+    def __init__(self, config_file: str = "config.json", idle_timeout: int = IDLE_TIMEOUT):
+        self.config_file = config_file
+        self.idle_timeout = idle_timeout
+        self.publisher = None
+        self.token = secrets.token_hex(16)
+        self.last_active = time.monotonic()
+        # 当前占用者 {'client': 标识, 'seen': 最后心跳时间}
+        self.lease: Optional[Dict] = None
+        # _lock 保护占用状态，只短暂持有；_browser_lock 保护浏览器的检查和重启（可能需要几十秒），
+        # 重启期间心跳、释放和状态查询不受影响
+        self._lock = threading.Lock()
+        self._browser_lock = threading.Lock()
+        self._running = True
+
+    def _start_browser(self):
+        # 放在这里导入，避免 publisher 与本模块循环导入
+        from publisher import TomatoNovelPublisher
+
+        self.publisher = TomatoNovelPublisher(self.config_file)
+        self.publisher.init_browser(use_daemon=False)
+
+    def _healthy(self) -> bool:
+        try:
+            return self.publisher.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _ensure_browser(self):
+        """浏览器不存在或已失去响应时重新启动"""
+        if self.publisher and self._healthy():
+            return
+        if self.publisher:
+            print("⚠ 浏览器已失去响应，正在重启")
+            try:
+                self.publisher.driver.quit()
+            except Exception:
+                pass
+        self._start_browser()
+
+    def _lease_expired(self) -> bool:
+        return self.lease is None or time.monotonic() - self.lease['seen'] > HEARTBEAT_INTERVAL * 2
+
+    def handle(self, message: Dict) -> Dict:
+        """处理一条命令"""
+        if message.get('token') != self.token:
+            return {'error': 'invalid token'}
+
+        command = message.get('command')
+        client = message.get('client')
+        self.last_active = time.monotonic()
+
+        if command == 'attach':
+            return self._attach(client)
+
+        with self._lock:
+            if command == 'heartbeat':
+                if self.lease and self.lease['client'] == client:
+                    self.lease['seen'] = time.monotonic()
+                return {'ok': True}
+
+            if command == 'release':
+                if self.lease and self.lease['client'] == client:
+                    self.lease = None
+                return {'ok': True}
+
+            if command == 'status':
+                return {
+                    'ready': self.publisher is not None,
+                    'pid': os.getpid(),
+                    'leased': None if self._lease_expired() else self.lease['client'],
+                    'idle_seconds': round(time.monotonic() - self.last_active),
+                }
+
+            if command == 'stop':
+                self._running = False
+                return {'ok': True}
+
+        return {'error': f'unknown command: {command}'}
+
+    def _attach(self, client: str) -> Dict:
+        """分配浏览器给客户端：先占用，再在 _lock 之外确认浏览器可用"""
+        with self._lock:
+            owner = self.lease and self.lease['client']
+            if not self._lease_expired() and owner != client:
+                return {'busy': owner}
+            self.lease = {'client': client, 'seen': time.monotonic()}
+
+        with self._browser_lock:
+            self._ensure_browser()
+            driver = self.publisher.driver
+            response = {
+                'ready': True,
+                'executor_url': driver.command_executor._url,
+                'session_id': driver.session_id,
+            }
+
+        with self._lock:
+            # 重启浏览器可能用了较长时间，从现在开始计算心跳
+            if self.lease and self.lease['client'] == client:
+                self.lease['seen'] = time.monotonic()
+        return response
+
+    def _watchdog(self):
+        """定期检查浏览器状态和空闲时间"""
+        while self._running:
+            time.sleep(HEALTH_INTERVAL)
+            with self._lock:
+                if self._lease_expired():
+                    self.lease = None
+                    if time.monotonic() - self.last_active > self.idle_timeout:
+                        print("空闲超时，关闭后台浏览器")
+                        self._running = False
+                        break
+            # 重启浏览器时不持有 _lock，客户端的心跳照常处理
+            with self._browser_lock:
+                self._ensure_browser()
+
+    def serve(self):
+        """启动浏览器并监听本地端口，直到收到 stop 或空闲超时"""
+        self._start_browser()
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        server.settimeout(1)
+
+        Path(STATE_FILE).parent.mkdir(exist_ok=True)
+        with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'port': server.getsockname()[1], 'pid': os.getpid(), 'token': self.token}, f)
+        print(f"✓ 后台浏览器已就绪（端口 {server.getsockname()[1]}）")
+
+        threading.Thread(target=self._watchdog, daemon=True).start()
+
+        try:
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn, conn.makefile('rw', encoding='utf-8') as stream:
+                    try:
+                        response = self.handle(json.loads(stream.readline() or '{}'))
+                    except Exception as e:
+                        response = {'error': str(e)}
+                    stream.write(json.dumps(response) + '\n')
+                    stream.flush()
+        finally:
+            server.close()
+            state = _read_state()
+            if state and state.get('token') == self.token:
+                os.remove(STATE_FILE)
+            if self.publisher:
+                self.publisher.close()
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='后台浏览器（保持登录的常驻 Chrome）')
+    arg_parser.add_argument('action', choices=['start', 'serve', 'status', 'stop'],
+                            help='start 后台启动 / serve 前台运行 / status 查看状态 / stop 关闭')
+    arg_parser.add_argument('-c', '--config', default='config.json', help='配置文件（默认 config.json）')
+    arg_parser.add_argument('--idle', type=int, default=IDLE_TIMEOUT, help='空闲超时秒数（默认 1800）')
+    args = arg_parser.parse_args()
+
+    if args.action == 'serve':
+        BrowserDaemon(args.config, args.idle).serve()
+    elif args.action == 'start':
+        if start_daemon(args.config, args.idle):
+            print("✓ 后台浏览器已启动")
+        else:
+            sys.exit(1)
+    elif args.action == 'status':
+        status = request('status', timeout=2)
+        if status and status.get('ready'):
+            leased = status['leased'] or '无'
+            print(f"✓ 后台浏览器运行中（进程 {status['pid']}，占用者 {leased}，空闲 {status['idle_seconds']} 秒）")
+        else:
+            print("后台浏览器未运行")
+    elif args.action == 'stop':
+        print("✓ 已通知后台浏览器关闭" if request('stop', timeout=2) else "后台浏览器未运行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+章节导出
+把章节写入目录、zip/tar 压缩包、JSONL 文件或标准输出。
+除目录模式外都只打开一个输出流，避免在网络文件系统上创建成千上万个小文件
+"""
+import io
+import sys
+import json
+import time
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable
+
+# 支持的导出格式
+EXPORT_FORMATS = ('dir', 'zip', 'tar', 'jsonl', 'stdout')
+
+# 输出流缓冲区大小
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# 目录模式下同时写文件的线程数
+DIR_WORKERS = 8
+
+# 文件名中不允许出现的字符
+_FILENAME_TABLE = str.maketrans({'/': '_', '\\': '_', ':': '_'})
+
+
+def chapter_filename(number: int, title: str) -> str:
+    """生成章节文件名：序号_标题前 20 个字.txt"""
+    return f"{number:03d}_{title[:20]}.txt".translate(_FILENAME_TABLE)
+
+
+def chapter_text(chapter: Dict) -> str:
+    """章节文件内容：标题、空行、正文"""
+    return f"{chapter['title']}\n\n{chapter['content']}"
+
+
+def guess_format(target: str) -> str:
+    """根据输出路径推断导出格式"""
+    if target == '-':
+        return 'stdout'
+
+    name = target.lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    if name.endswith(('.tar', '.tar.gz', '.tgz')):
+        return 'tar'
+    if name.endswith('.jsonl'):
+        return 'jsonl'
+    return 'dir'
+
+
+def _write_file(path: Path, text: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _export_dir(chapters: Iterable[Dict], target: str, workers: int = DIR_WORKERS) -> int:
+    """每章一个文件，由线程池并发写入"""
+    output_path = Path(target)
+    output_path.mkdir(exist_ok=True)
+
+    # 线程池只在导出到目录时导入
+    from concurrent.futures import ThreadPoolExecutor
+
+    count = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for count, chapter in enumerate(chapters, 1):
+            futures.append(executor.submit(
+                _write_file, output_path / chapter_filename(count, chapter['title']), chapter_text(chapter)
+            ))
+        # 取结果以抛出写入时的异常
+        for future in futures:
+            future.result()
+
+    return count
+
+
+def _export_zip(chapters: Iterable[Dict], target: str) -> int:
+    """所有章节写入一个 zip 压缩包"""
+    count = 0
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for count, chapter in enumerate(chapters, 1):
+            archive.writestr(chapter_filename(count, chapter['title']), chapter_text(chapter).encode('utf-8'))
+    return count
+
+
+def _export_tar(chapters: Iterable[Dict], target: str) -> int:
+    """所有章节写入一个 tar 包（.tar.gz/.tgz 时压缩）"""
+    mode = 'w:gz' if target.lower().endswith(('.gz', '.tgz')) else 'w'
+    now = time.time()
+
+    count = 0
+    with open(target, 'wb', buffering=WRITE_BUFFER_SIZE) as f, tarfile.open(fileobj=f, mode=mode) as archive:
+        for count, chapter in enumerate(chapters, 1):
+            data = chapter_text(chapter).encode('utf-8')
+            info = tarfile.TarInfo(chapter_filename(count, chapter['title']))
+            info.size = len(data)
+            info.mtime = now
+            archive.addfile(info, io.BytesIO(data))
+    return count
+
+
+def _write_jsonl(chapters: Iterable[Dict], stream) -> int:
+    count = 0
+    for count, chapter in enumerate(chapters, 1):
+        stream.write(json.dumps({'title': chapter['title'], 'content': chapter['content']}, ensure_ascii=False))
+        stream.write('\n')
+    return count
+
+
+def _export_jsonl(chapters: Iterable[Dict], target: str) -> int:
+    """每行一个章节的 JSON 对象"""
+    with open(target, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        return _write_jsonl(chapters, f)
+
+
+def _export_stdout(chapters: Iterable[Dict], target: str = None) -> int:
+    """以 JSONL 写到标准输出，便于接管道"""
+    stream = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', write_through=False)
+    try:
+        return _write_jsonl(chapters, stream)
+    finally:
+        stream.flush()
+        # 不关闭 sys.stdout
+        stream.detach()
+
+
+_EXPORTERS = {
+    'dir': _export_dir,
+    'zip': _export_zip,
+    'tar': _export_tar,
+    'jsonl': _export_jsonl,
+    'stdout': _export_stdout,
+}
+
+
+def export_chapters(chapters: Iterable[Dict], target: str, fmt: str = None) -> int:
+    """
+    导出章节
+
+    Args:
+        chapters: 章节序列或迭代器，每项为 {'title': '', 'content': ''}
+        target: 输出目录或文件，'-' 表示标准输出
+        fmt: 导出格式（见 EXPORT_FORMATS），默认根据 target 推断
+
+    Returns:
+        导出的章节数
+    """
+    fmt = fmt or guess_format(target)
+    if fmt not in _EXPORTERS:
+        raise ValueError(f"不支持的导出格式: {fmt}（可选 {', '.join(EXPORT_FORMATS)}）")
+    return _EXPORTERS[fmt](chapters, target)
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+章节偏移索引
+只记录每章标题和正文的字节范围，正文在需要时才从源文件（mmap）解码
+"""
+import os
+import re
+import mmap
+from array import array
+from pathlib import Path
+from collections.abc import Sequence
+from typing import Callable, List, Tuple, Union
+
+# 可以按字节切分的编码：换行符 0x0A 不会出现在多字节字符内部
+BYTE_INDEXABLE_ENCODINGS = {'utf-8', 'gbk', 'gb2312', 'gb18030'}
+
+# 每次解码扫描的块大小（会延伸到下一个换行符）
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# 并行扫描时每段的最小字节数，分段太小时启动进程的开销得不偿失
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# 单独的 \r（旧 Mac 换行）在文本模式下会被当作换行，字节索引无法保持一致
+_LONE_CR_RE = re.compile(rb'\r(?!\n)')
+
+# 扫描函数：输入文本，返回 [(标题, 行起始位置, 行结束位置), ...]
+ScanTitles = Callable[[str], List[Tuple[str, int, int]]]
+
+
+def available_cpus() -> int:
+    """当前进程可以使用的 CPU 数"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def supports(buffer, encoding: str, start: int = 0) -> bool:
+    """判断该缓冲区（从 start 开始）能否建立字节偏移索引"""
+    return encoding in BYTE_INDEXABLE_ENCODINGS and not _LONE_CR_RE.search(buffer, start)
+
+
+def open_buffer(file_path: Union[str, Path]):
+    """以只读方式映射文件，空文件返回 b''"""
+    with open(file_path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            return b''
+
+
+def scan_spans(buffer, encoding: str, scan_titles: ScanTitles,
+               start: int = 0, end: int = None, block_size: int = BLOCK_SIZE):
+    """
+    分块扫描缓冲区，定位章节标题行的字节位置
+
+    每块延伸到换行符为止，保证多字节字符和行不会被截断；
+    块内用 scan_titles 找标题，再把字符位置换算为字节位置。
+
+    Args:
+        buffer: bytes 或 mmap
+        encoding: 文件编码（必须在 BYTE_INDEXABLE_ENCODINGS 中）
+        scan_titles: 标题扫描函数（TitleScanner.scan）
+        start: 起始字节（必须位于行首）
+        end: 结束字节（必须位于行首或缓冲区末尾）
+        block_size: 块大小
+
+    Returns:
+        (标题列表, 标题行起始字节 array, 正文起始字节 array)
+    """
+    if end is None:
+        end = len(buffer)
+
+    titles = []
+    title_offsets = array('q')
+    body_starts = array('q')
+
+    position = start
+    while position < end:
+        block_end = end
+        if position + block_size < end:
+            newline = buffer.find(b'\n', position + block_size, end)
+            if newline != -1:
+                block_end = newline + 1
+
+        text = buffer[position:block_end].decode(encoding)
+
+        char_cursor = 0
+        byte_cursor = position
+        for title, line_start, line_end in scan_titles(text):
+            byte_cursor += len(text[char_cursor:line_start].encode(encoding))
+            title_offsets.append(byte_cursor)
+            byte_cursor += len(text[line_start:line_end].encode(encoding))
+            char_cursor = line_end
+            titles.append(title)
+            # 正文从标题行的换行符之后开始
+            body_starts.append(min(byte_cursor + 1, end))
+
+        position = block_end
+
+    return titles, title_offsets, body_starts
+
+
+def split_ranges(buffer, start: int, end: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    把 [start, end) 切成最多 parts 段，每段的边界都在行首
+
+    Returns:
+        [(段起始字节, 段结束字节), ...]
+    """
+    step = max((end - start) // max(parts, 1), 1)
+    ranges = []
+
+    position = start
+    while position < end:
+        boundary = position + step
+        if boundary >= end or len(ranges) == parts - 1:
+            boundary = end
+        else:
+            newline = buffer.find(b'\n', boundary, end)
+            boundary = end if newline == -1 else newline + 1
+        ranges.append((position, boundary))
+        position = boundary
+
+    return ranges
+
+
+def _scan_file_range(file_path: str, encoding: str, scan_titles: ScanTitles,
+                     start: int, end: int):
+    """在子进程中映射文件并扫描其中一段"""
+    buffer = open_buffer(file_path)
+    try:
+        return scan_spans(buffer, encoding, scan_titles, start, end)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
+def scan_spans_parallel(file_path: Union[str, Path], buffer, encoding: str,
+                        scan_titles: ScanTitles, start: int, end: int, workers: int):
+    """
+    多进程并行扫描，结果与 scan_spans 完全相同
+
+    缓冲区按行切成若干段，每个进程各自映射文件扫描一段，
+    最后按顺序拼接。跨越分段边界的章节不需要额外处理：
+    每章正文的结束位置由下一章的标题行推出，拼接后自然正确。
+
+    Args:
+        file_path: 源文件路径（子进程据此映射文件）
+        buffer: 源文件内容（用于计算分段边界）
+        encoding: 文件编码
+        scan_titles: 标题扫描函数，必须可以序列化（TitleScanner.scan）
+        start: 起始字节
+        end: 结束字节
+        workers: 进程数
+
+    Returns:
+        同 scan_spans
+    """
+    parts = min(workers, max((end - start) // PARALLEL_MIN_BYTES, 1))
+    ranges = split_ranges(buffer, start, end, parts)
+    if len(ranges) <= 1:
+        return scan_spans(buffer, encoding, scan_titles, start, end)
+
+    # 进程池（连带 multiprocessing）只在并行解析时导入，不拖慢普通启动
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(_scan_file_range, str(file_path), encoding, scan_titles, range_start, range_end)
+            for range_start, range_end in ranges
+        ]
+        results = [future.result() for future in futures]
+
+    titles = []
+    title_offsets = array('q')
+    body_starts = array('q')
+    for part_titles, part_offsets, part_starts in results:
+        titles.extend(part_titles)
+        title_offsets.extend(part_offsets)
+        body_starts.extend(part_starts)
+
+    return titles, title_offsets, body_starts
+
+
+class ChapterIndex:
+    """
+    章节偏移索引
+
+    表现为只读的章节序列：len()、下标、切片和迭代都返回
+    {'title': '', 'content': ''}，正文只在访问时解码。
+
+    encoding 为 None 时，源内容是已解码的文本，偏移按字符计算；
+    否则源内容是字节（bytes 或 mmap），偏移按字节计算。
+    """
+
+    __slots__ = ('encoding', 'titles', 'title_offsets', 'body_starts', 'size', '_buffer')
+
+    def __init__(self, encoding: str, titles: List[str], title_offsets: array,
+                 body_starts: array, size: int, buffer=None):
+        """
+        Args:
+            encoding: 文件编码（源内容为文本时为 None）
+            titles: 章节标题
+            title_offsets: 每章标题行的起始字节
+            body_starts: 每章正文的起始字节
+            size: 源内容长度（最后一章正文的结束位置）
+            buffer: 源内容（str、bytes 或 mmap），可以稍后用 attach() 绑定
+        """
+        self.encoding = encoding
+        self.titles = titles
+        self.title_offsets = title_offsets
+        self.body_starts = body_starts
+        self.size = size
+        self._buffer = buffer
+
+    @classmethod
+    def build(cls, buffer, encoding: str, scan_titles: ScanTitles,
+              start: int = 0, block_size: int = BLOCK_SIZE) -> 'ChapterIndex':
+        """扫描整个缓冲区建立索引（start 用于跳过 BOM）"""
+        titles, title_offsets, body_starts = scan_spans(
+            buffer, encoding, scan_titles, start=start, block_size=block_size
+        )
+        return cls(encoding, titles, title_offsets, body_starts, len(buffer), buffer)
+
+    def attach(self, buffer):
+        """绑定源文件内容"""
+        self._buffer = buffer
+
+    def close(self):
+        """释放源文件映射"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = None
+
+    def span(self, index: int) -> Tuple[str, int, int]:
+        """获取章节的 (标题, 正文起始字节, 正文结束字节)"""
+        if index + 1 < len(self.titles):
+            # 正文到下一个标题行之前的换行符为止
+            body_end = self.title_offsets[index + 1] - 1
+        else:
+            body_end = self.size
+        return self.titles[index], self.body_starts[index], body_end
+
+    def get_content(self, index: int) -> str:
+        """解码指定章节的正文"""
+        if self._buffer is None:
+            raise ValueError("章节索引未绑定源文件")
+
+        _, body_start, body_end = self.span(index)
+        content = self._buffer[body_start:body_end]
+        if self.encoding is None:
+            return content.strip()
+
+        # 与文本模式读取保持一致：统一换行符
+        return content.decode(self.encoding).replace('\r\n', '\n').strip()
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"章节索引超出范围: {index}")
+
+        return {
+            'title': self.titles[index],
+            'content': self.get_content(index)
+        }
+
+    def __iter__(self):
+        for i, title in enumerate(self.titles):
+            yield {'title': title, 'content': self.get_content(i)}
+
+    def view(self, start: int = 0, stop: int = None) -> 'ChapterView':
+        """
+        取连续的一段章节，与切片不同，正文仍在访问时才解码
+
+        Args:
+            start: 起始章节索引
+            stop: 结束章节索引（不含，None 表示到最后一章）
+        """
+        return ChapterView(self, range(*slice(start, stop).indices(len(self))))
+
+    def to_dict(self) -> dict:
+        """转换为可 JSON 序列化的字典（不含源内容）"""
+        return {
+            'encoding': self.encoding,
+            'titles': self.titles,
+            'title_offsets': self.title_offsets.tolist(),
+            'body_starts': self.body_starts.tolist(),
+            'size': self.size,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ChapterIndex':
+        """从 to_dict() 的结果恢复索引"""
+        return cls(
+            data['encoding'],
+            data['titles'],
+            array('q', data['title_offsets']),
+            array('q', data['body_starts']),
+            data['size'],
+        )
+
+    def __getstate__(self):
+        # mmap 无法序列化，跨进程传递时只保留索引本身
+        return (self.encoding, self.titles, self.title_offsets, self.body_starts, self.size)
+
+    def __setstate__(self, state):
+        self.encoding, self.titles, self.title_offsets, self.body_starts, self.size = state
+        self._buffer = None
+
+    def __repr__(self):
+        return f"ChapterIndex(chapters={len(self)}, encoding={self.encoding})"
+
+
+class ChapterView(Sequence):
+    """ChapterIndex 中连续的一段章节（只读序列，正文在访问时才解码）"""
+
+    def __init__(self, index: ChapterIndex, indices: range):
+        self._index = index
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._index[i] for i in self._indices[index]]
+        return self._index[self._indices[index]]
+
+    def __repr__(self):
+        return f"ChapterView(chapters={len(self)}, start={self._indices.start})"
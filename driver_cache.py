@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+ChromeDriver 启动缓存
+记住上次成功启动浏览器的方式、驱动路径和 Chrome 版本，下次直接使用；
+驱动文件或 Chrome 更新后自动失效，重新走完整的查找流程
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import contextlib
+from typing import Dict, List, Optional, Tuple
+
+from parse_cache import CACHE_DIR
+
+# 缓存文件
+DRIVER_STATE_FILE = os.path.join(CACHE_DIR, 'driver.json')
+
+# 项目目录中的驱动文件名
+LOCAL_DRIVER_NAME = 'chromedriver.exe' if os.name == 'nt' else 'chromedriver'
+
+# 各平台 Chrome 的常见安装位置
+_CHROME_PATHS = {
+    'win32': [
+        r'%PROGRAMFILES%\Google\Chrome\Application\chrome.exe',
+        r'%PROGRAMFILES(X86)%\Google\Chrome\Application\chrome.exe',
+        r'%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe',
+    ],
+    'darwin': [
+        '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+        '/Applications/Chromium.app/Contents/MacOS/Chromium',
+    ],
+}
+_CHROME_COMMANDS = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+
+
+def local_driver_path() -> str:
+    """项目目录中的驱动路径"""
+    return os.path.join(os.getcwd(), LOCAL_DRIVER_NAME)
+
+
+def _file_stamp(path: Optional[str]) -> Optional[List[int]]:
+    """文件的 [大小, 修改时间]，文件不存在时返回 None"""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _windows_chrome_version() -> Optional[str]:
+    """从注册表读取 Chrome 版本（只读一个键值，不启动进程）"""
+    try:
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\Google\Chrome\BLBeacon') as key:
+            return winreg.QueryValueEx(key, 'version')[0]
+    except OSError:
+        return None
+
+
+def chrome_stamp() -> Optional[str]:
+    """
+    Chrome 版本标识（Chrome 升级后会变化）
+
+    Windows 读取注册表中的版本号，其他平台使用 Chrome 可执行文件的大小和修改时间
+    """
+    if sys.platform == 'win32':
+        version = _windows_chrome_version()
+        if version:
+            return version
+
+    candidates = [os.path.expandvars(path) for path in _CHROME_PATHS.get(sys.platform, [])]
+    candidates += [shutil.which(command) for command in _CHROME_COMMANDS]
+    for path in candidates:
+        stamp = _file_stamp(path)
+        if stamp:
+            return f"{os.path.realpath(path)}:{stamp[0]}:{stamp[1]}"
+    return None
+
+
+def load_state() -> Optional[Dict]:
+    """
+    读取缓存，只做廉价检查：平台、Chrome 版本标识、驱动文件大小和修改时间
+
+    Returns:
+        {'method': 启动方式, 'driver_path': 驱动路径或 None, ...}，缓存不存在或已过期时返回 None
+    """
+    try:
+        with open(DRIVER_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if state.get('platform') != sys.platform or state.get('chrome') != chrome_stamp():
+        return None
+    if state.get('driver_path') and _file_stamp(state['driver_path']) != state.get('driver_stamp'):
+        return None
+    return state
+
+
+def save_state(method: str, driver_path: Optional[str]):
+    """记录成功的启动方式（失败时静默忽略）"""
+    state = {
+        'method': method,
+        'driver_path': driver_path,
+        'driver_stamp': _file_stamp(driver_path),
+        'chrome': chrome_stamp(),
+        'platform': sys.platform,
+    }
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(DRIVER_STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+
+def clear_state():
+    """删除缓存"""
+    try:
+        os.remove(DRIVER_STATE_FILE)
+    except OSError:
+        pass
+
+
+class StartupTimer:
+    """记录浏览器启动各阶段耗时"""
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """计时一个阶段（异常时也会记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def summary(self) -> str:
+        """各阶段耗时汇总"""
+        total = time.perf_counter() - self._start
+        parts = [f"{name} {seconds:.2f} s" for name, seconds in self.stages]
+        return f"启动耗时 {total:.2f} s（{'，'.join(parts)}）"
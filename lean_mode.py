@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+精简模式
+发布只需要编辑页的表单，页面上的图片、字体、统计和广告脚本都用不到：
+启动时关闭图片加载和用不到的 Chrome 功能，页面打开前通过 CDP 屏蔽匹配的请求。
+同时记录每次整页加载的耗时和传输字节数，按模式保存，便于对比开启前后的效果
+"""
+import os
+import json
+from typing import Dict, List, Optional
+
+from parse_cache import CACHE_DIR
+
+# 页面加载统计文件（按模式累计，跨多次运行）
+PAGE_LOAD_FILE = os.path.join(CACHE_DIR, 'page_loads.json')
+
+# 默认屏蔽的请求（CDP Network.setBlockedURLs 的通配符格式）
+DEFAULT_BLOCKED_URLS = [
+    # 图片
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.ico',
+    # 字体
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    # 统计和广告
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*hm.baidu.com*', '*cnzz.com*', '*mcs.zijieapi.com*', '*mon.zijieapi.com*',
+]
+
+# 关闭图片加载等浏览器偏好设置
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+}
+
+# 关闭用不到的 Chrome 功能
+LEAN_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,MediaRouter,OptimizationHints',
+    '--no-first-run',
+    '--mute-audio',
+]
+
+# 读取当前页面的加载耗时、请求数和传输字节数（Navigation / Resource Timing）；
+# 跨域资源没有 Timing-Allow-Origin 时 transferSize 为 0，字节数只是下限
+_PAGE_METRICS_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+if (!nav) return null;
+const resources = performance.getEntriesByType('resource');
+let bytes = nav.transferSize || 0;
+for (const entry of resources) bytes += entry.transferSize || 0;
+return {
+    load_ms: Math.round((nav.loadEventEnd || nav.domComplete || nav.duration) - nav.startTime),
+    requests: resources.length + 1,
+    bytes: bytes,
+};
+"""
+
+
+def apply_options(chrome_options):
+    """
+    在启动参数中关闭图片加载和用不到的功能
+
+    Args:
+        chrome_options: selenium 的 ChromeOptions
+    """
+    for argument in LEAN_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_experimental_option('prefs', LEAN_PREFS)
+
+
+def block_urls(driver, patterns: List[str]) -> bool:
+    """
+    通过 CDP 屏蔽匹配的请求（对之后打开的页面生效）
+
+    Args:
+        driver: WebDriver 实例（需要支持 execute_cdp_cmd，即本地启动的 Chrome）
+        patterns: 通配符列表
+
+    Returns:
+        是否设置成功
+    """
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+    except Exception as e:
+        print(f"⚠ 无法设置请求屏蔽: {e}")
+        return False
+    return True
+
+
+def page_metrics(driver) -> Optional[Dict[str, int]]:
+    """
+    当前页面的加载指标
+
+    Returns:
+        {'load_ms': 加载耗时, 'requests': 请求数, 'bytes': 传输字节数}，无法读取时返回 None
+    """
+    try:
+        return driver.execute_script(_PAGE_METRICS_JS)
+    except Exception:
+        return None
+
+
+class PageLoadStats:
+    """整页加载统计，按模式（normal / lean）累计并保存到磁盘"""
+
+    def __init__(self, mode: str, history_file: str = PAGE_LOAD_FILE):
+        """
+        Args:
+            mode: 当前模式（normal / lean）
+            history_file: 统计文件（None 表示不保存）
+        """
+        self.mode = mode
+        self.history_file = history_file
+        self.loads: List[Dict[str, int]] = []
+
+    def record(self, driver):
+        """记录当前页面的加载指标（在页面加载完成后调用）"""
+        metrics = page_metrics(driver)
+        if metrics:
+            self.loads.append(metrics)
+
+    @staticmethod
+    def _average(total: Dict[str, float]) -> Dict[str, float]:
+        count = total['count'] or 1
+        return {key: total[key] / count for key in ('load_ms', 'requests', 'bytes')}
+
+    def _totals(self) -> Dict[str, float]:
+        return {
+            'count': len(self.loads),
+            'load_ms': sum(load['load_ms'] for load in self.loads),
+            'requests': sum(load['requests'] for load in self.loads),
+            'bytes': sum(load['bytes'] for load in self.loads),
+        }
+
+    def _load_history(self) -> Dict[str, Dict[str, float]]:
+        if not self.history_file:
+            return {}
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> Dict[str, Dict[str, float]]:
+        """
+        把本次统计累加到历史记录（失败时静默忽略）
+
+        Returns:
+            累加后的历史记录 {模式: {'count', 'load_ms', 'requests', 'bytes'}}
+        """
+        history = self._load_history()
+        if not self.loads:
+            return history
+
+        total = history.setdefault(self.mode, {'count': 0, 'load_ms': 0, 'requests': 0, 'bytes': 0})
+        for key, value in self._totals().items():
+            total[key] += value
+        self.loads = []
+
+        if self.history_file:
+            try:
+                os.makedirs(os.path.dirname(self.history_file) or '.', exist_ok=True)
+                with open(self.history_file, 'w', encoding='utf-8') as f:
+                    json.dump(history, f, indent=2)
+            except OSError:
+                pass
+        return history
+
+    def print_summary(self):
+        """打印本次的平均加载指标，并与另一种模式的历史平均值对比，然后保存"""
+        if not self.loads:
+            return
+
+        current = self._average(self._totals())
+        print(f"页面加载（{self.mode}）: {len(self.loads)} 次，平均 {current['load_ms']:.0f} ms，"
+              f"{current['requests']:.0f} 个请求，{current['bytes'] / 1024:.0f} KB")
+
+        history = self.save()
+        other_mode = 'normal' if self.mode == 'lean' else 'lean'
+        if history.get(other_mode, {}).get('count'):
+            other = self._average(history[other_mode])
+            print(f"  对比 {other_mode} 历史平均: {other['load_ms']:.0f} ms，"
+                  f"{other['requests']:.0f} 个请求，{other['bytes'] / 1024:.0f} KB")
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+书库批量解析
+并行解析目录下的所有小说文件，只把章节索引（不含正文）返回给主进程
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from parser import NovelParser
+
+
+def _ingest_file(file_path: str) -> Dict:
+    """
+    解析单个文件（在子进程中执行）
+
+    Returns:
+        {'path', 'encoding', 'chapters', 'index', 'seconds', 'cache', 'error'}
+    """
+    start = time.perf_counter()
+    result = {
+        'path': file_path,
+        'encoding': None,
+        'chapters': 0,
+        'index': None,
+        'seconds': 0.0,
+        'cache': None,
+        'error': None,
+    }
+
+    try:
+        parser = NovelParser(file_path=file_path, lazy=True)
+        # ChapterIndex 序列化时不带正文，跨进程传递很小
+        result['index'] = parser.get_index()
+        result['encoding'] = parser.encoding
+        result['chapters'] = parser.get_chapter_count()
+        result['cache'] = parser.cache_status
+        parser.close()
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def find_novels(directory: str, pattern: str = '*.txt', recursive: bool = False) -> List[str]:
+    """列出目录下的小说文件"""
+    root = Path(directory)
+    if not root.is_dir():
+        raise FileNotFoundError(f"目录不存在: {directory}")
+
+    files = root.rglob(pattern) if recursive else root.glob(pattern)
+    return sorted(str(path) for path in files if path.is_file())
+
+
+def ingest_library(directory: str, workers: int = None, pattern: str = '*.txt',
+                   recursive: bool = False) -> List[Dict]:
+    """
+    并行解析书库
+
+    Args:
+        directory: 书库目录
+        workers: 进程数（默认 CPU 核数）
+        pattern: 文件匹配模式
+        recursive: 是否包含子目录
+
+    Returns:
+        每本书的解析结果（按路径排序），见 _ingest_file
+    """
+    files = find_novels(directory, pattern, recursive)
+    if not files:
+        print(f"⚠ 目录中没有找到小说文件: {directory}")
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(files))
+
+    print(f"正在解析 {len(files)} 本书（{workers} 个进程）...")
+    start = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_ingest_file, path) for path in files]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            name = Path(result['path']).name
+            if result['error']:
+                print(f"  ✗ {name}: {result['error']}")
+            else:
+                print(f"  ✓ {name}: {result['chapters']} 章，"
+                      f"{result['seconds'] * 1000:.0f} ms（{result['encoding']}）")
+
+    elapsed = time.perf_counter() - start
+    busy = sum(result['seconds'] for result in results)
+    failed = sum(1 for result in results if result['error'])
+
+    print(f"\n{'=' * 50}")
+    print(f"书库解析完成")
+    print(f"成功: {len(results) - failed} 本，失败: {failed} 本")
+    print(f"总章节: {sum(result['chapters'] for result in results)}")
+    print(f"耗时: {elapsed:.2f} s（单进程累计 {busy:.2f} s，加速 {busy / elapsed if elapsed else 0:.1f}x）")
+    print(f"{'=' * 50}\n")
+
+    results.sort(key=lambda result: result['path'])
+    return results
+
+
+def save_library_index(results: List[Dict], output_file: str):
+    """把书库索引保存为 JSON（只含标题和偏移）"""
+    library = []
+    for result in results:
+        if result['error']:
+            continue
+        library.append({
+            'path': result['path'],
+            'encoding': result['encoding'],
+            'index': result['index'].to_dict(),
+        })
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(library, ensure_ascii=False))
+
+    print(f"✓ 书库索引已保存到 {output_file}")
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='并行解析书库中的所有小说')
+    arg_parser.add_argument('directory', help='书库目录')
+    arg_parser.add_argument('-w', '--workers', type=int, default=None, help='进程数（默认 CPU 核数）')
+    arg_parser.add_argument('-p', '--pattern', default='*.txt', help='文件匹配模式（默认 *.txt）')
+    arg_parser.add_argument('-r', '--recursive', action='store_true', help='包含子目录')
+    arg_parser.add_argument('-o', '--output', help='保存书库索引的 JSON 文件')
+    args = arg_parser.parse_args()
+
+    try:
+        results = ingest_library(args.directory, args.workers, args.pattern, args.recursive)
+    except FileNotFoundError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    if args.output and results:
+        save_library_index(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
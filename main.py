@@ -1,13 +1,26 @@
 # -*- coding: utf-8 -*-
 """
 番茄小说自动发布系统 - 主程序
+
+不带参数运行时进入交互菜单；带子命令时直接执行，适合在脚本中批量调用：
+    python main.py parse novel.txt              # 解析小说，列出章节
+    python main.py plan novel.txt --times 08:00,20:00
+    python main.py publish novel.txt --count 10
+    python main.py schedule novel.txt --start-date 2024-06-01
+    python main.py novels                       # 查看书本列表
+    python main.py --job job.json               # 从任务文件读取参数
+
+selenium 只在需要浏览器的命令中导入，parse 和 plan 不会加载它
 """
 import json
 import sys
+import argparse
 from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
 from parser import NovelParser
-from publisher import TomatoNovelPublisher
-from scheduler import PublishScheduler
+from chapter_export import EXPORT_FORMATS
+from schedule_plan import parse_times, plan_chapters
 
 
 def create_config():
@@ -44,21 +57,26 @@ def test_parser():
         return
 
     try:
-        parser = NovelParser(file_path=file_path)
-        chapters = parser.get_chapters()
+        # 流式读取前几章用于预览，大文件也能立即显示
+        parser = NovelParser(file_path=file_path, stream=True)
+        preview = list(parser.iter_chapters(head=6))
 
-        print(f"\n✓ 解析成功！共找到 {len(chapters)} 章\n")
+        print(f"\n✓ 解析成功！（文件编码: {parser.encoding}）\n")
         print("前 5 章标题:")
-        for i, chapter in enumerate(chapters[:5], 1):
+        for i, chapter in enumerate(preview[:5], 1):
             print(f"  {i}. {chapter['title']}")
 
-        if len(chapters) > 5:
-            print(f"  ... 还有 {len(chapters) - 5} 章")
+        if len(preview) > 5:
+            total = parser.get_chapter_count()
+            print(f"  ... 还有 {total - 5} 章（共 {total} 章）")
+        else:
+            print(f"\n共找到 {len(preview)} 章")
 
         # 询问是否导出章节
-        export = input("\n是否将章节导出为单独文件？(y/n): ").strip().lower()
+        export = input("\n是否导出章节？(y/n): ").strip().lower()
         if export == 'y':
-            parser.save_chapters()
+            target = input("导出到（目录，或 .zip/.tar/.jsonl 文件，默认 chapters）: ").strip()
+            parser.save_chapters(target or "chapters")
 
     except Exception as e:
         print(f"✗ 解析失败: {e}")
@@ -72,6 +90,8 @@ def test_login():
     print("\n首次使用需要登录番茄小说账号")
 
     try:
+        from publisher import TomatoNovelPublisher
+
         publisher = TomatoNovelPublisher()
         publisher.login()
         publisher.close()
@@ -88,6 +108,8 @@ def view_novels():
     print("\n正在获取您的书本列表...")
 
     try:
+        from publisher import TomatoNovelPublisher
+
         publisher = TomatoNovelPublisher()
         publisher.init_browser()
 
@@ -124,6 +146,8 @@ def publish_immediately():
         return
 
     try:
+        from scheduler import PublishScheduler
+
         scheduler = PublishScheduler()
         scheduler.load_novel(file_path=file_path)
 
@@ -163,6 +187,8 @@ def publish_scheduled():
         return
 
     try:
+        from scheduler import PublishScheduler
+
         scheduler = PublishScheduler()
         scheduler.load_novel(file_path=file_path)
 
@@ -248,8 +274,348 @@ def show_menu():
     print("=" * 50)
 
 
+# 命令行子命令
+CLI_COMMANDS = ('parse', 'plan', 'publish', 'schedule', 'novels')
+
+# 配置文件中没有发布时间时使用的默认值
+DEFAULT_PUBLISH_TIMES = ['08:00', '20:00']
+
+
+def _read_config(config_file: str) -> Dict:
+    """读取配置文件，不存在或格式错误时返回空配置"""
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _date_arg(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式错误（应为 YYYY-MM-DD）: {value}")
+
+
+def _times_arg(value: str) -> List[str]:
+    try:
+        return parse_times(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"发布时间格式错误（应为 HH:MM，逗号分隔）: {value}")
+
+
+def build_arg_parser() -> Tuple[argparse.ArgumentParser, Dict[str, argparse.ArgumentParser]]:
+    """
+    创建命令行解析器
+
+    Returns:
+        (主解析器, {子命令: 子命令解析器})
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-c', '--config', default='config.json', help='配置文件（默认 config.json）')
+    common.add_argument('--job', help='任务文件（JSON，键与参数同名，命令行参数优先）')
+
+    novel = argparse.ArgumentParser(add_help=False)
+    novel.add_argument('file', nargs='?', help='小说文件（.txt）')
+    novel.add_argument('--workers', type=int, default=1, help='解析大文件时使用的进程数（默认 1）')
+
+    chapters = argparse.ArgumentParser(add_help=False)
+    chapters.add_argument('--start-index', type=int, default=0, help='起始章节索引（从 0 开始）')
+    chapters.add_argument('--count', type=int, default=None, help='章节数量（默认全部）')
+
+    timing = argparse.ArgumentParser(add_help=False)
+    timing.add_argument('--start-date', type=_date_arg, default=None, help='开始日期 YYYY-MM-DD（默认明天）')
+    timing.add_argument('--times', type=_times_arg, default=None,
+                        help='发布时间，逗号分隔（默认读取配置 publish_times）')
+
+    target = argparse.ArgumentParser(add_help=False)
+    target.add_argument('--novel', type=int, default=None,
+                        help='书本编号（从 1 开始，见 novels 命令；默认直接使用发布页面）')
+    target.add_argument('--publish-url', default=None, help='发布页面（覆盖配置 publish_url）')
+    target.add_argument('--pipeline', action='store_true',
+                        help='流水线发布：准备后续章节与浏览器发布并行（覆盖配置 pipeline）')
+
+    arg_parser = argparse.ArgumentParser(description='番茄小说自动发布系统（不带参数运行进入交互菜单）')
+    subparsers = arg_parser.add_subparsers(dest='command', metavar='命令')
+
+    commands = {}
+    commands['parse'] = subparsers.add_parser(
+        'parse', parents=[common, novel], help='解析小说，列出章节（不启动浏览器）')
+    commands['parse'].add_argument('--all', action='store_true', help='列出全部章节标题（默认前 5 章）')
+    commands['parse'].add_argument('--export', default=None,
+                                   help='导出章节到目录，或 .zip/.tar/.jsonl 文件，- 表示标准输出')
+    commands['parse'].add_argument('--format', choices=EXPORT_FORMATS, default=None,
+                                   help='导出格式（默认根据 --export 推断）')
+    commands['parse'].add_argument('--json', action='store_true', help='以 JSON 输出解析结果')
+
+    commands['plan'] = subparsers.add_parser(
+        'plan', parents=[common, novel, chapters, timing], help='预览定时发布计划（不启动浏览器）')
+    commands['plan'].add_argument('--json', action='store_true', help='以 JSON 输出发布计划')
+
+    commands['publish'] = subparsers.add_parser(
+        'publish', parents=[common, novel, chapters, target], help='立即发布章节')
+
+    commands['schedule'] = subparsers.add_parser(
+        'schedule', parents=[common, novel, chapters, timing, target], help='批量设置定时发布')
+
+    commands['novels'] = subparsers.add_parser('novels', parents=[common], help='查看书本列表')
+    commands['novels'].add_argument('--json', action='store_true', help='以 JSON 输出书本列表')
+
+    return arg_parser, commands
+
+
+def load_job(job_file: str) -> Dict:
+    """
+    读取任务文件
+
+    任务文件是一个 JSON 对象，command 指定子命令，其余键与命令行参数同名
+    （如 "start_index" 或 "start-index"），例如：
+        {"command": "schedule", "file": "novel.txt", "start_date": "2024-06-01",
+         "times": "08:00,20:00", "count": 60}
+    """
+    with open(job_file, 'r', encoding='utf-8') as f:
+        job = json.load(f)
+    if not isinstance(job, dict):
+        raise ValueError("任务文件必须是 JSON 对象")
+    return {key.replace('-', '_'): value for key, value in job.items()}
+
+
+def _chapter_titles(parser: NovelParser) -> List[str]:
+    """章节标题（懒加载模式下直接取索引中的标题，不解码正文）"""
+    index = parser.get_index()
+    if index is not None:
+        return list(index.titles)
+    return [chapter['title'] for chapter in parser.get_chapters()]
+
+
+def cmd_parse(args) -> int:
+    """parse：解析小说，列出章节，可选导出"""
+    to_stdout = args.export == '-' or args.format == 'stdout'
+    # 章节导出到标准输出时，提示信息改写到标准错误
+    out = sys.stderr if to_stdout else sys.stdout
+
+    parser = NovelParser(file_path=args.file, lazy=True, workers=args.workers)
+    try:
+        titles = _chapter_titles(parser)
+        if args.json:
+            print(json.dumps({
+                'file': args.file,
+                'encoding': parser.encoding,
+                'chapters': len(titles),
+                'titles': titles,
+            }, ensure_ascii=False, indent=2), file=out)
+        else:
+            print(f"✓ 解析成功（文件编码: {parser.encoding}，共 {len(titles)} 章）", file=out)
+            shown = titles if args.all else titles[:5]
+            for i, title in enumerate(shown, 1):
+                print(f"  {i}. {title}", file=out)
+            if len(shown) < len(titles):
+                print(f"  ... 还有 {len(titles) - len(shown)} 章", file=out)
+
+        if args.export or args.format:
+            parser.save_chapters(args.export or 'chapters', args.format)
+    finally:
+        parser.close()
+    return 0
+
+
+def _schedule_options(args) -> Tuple[datetime, List[str]]:
+    """开始日期和发布时间（命令行未给出时读取配置）"""
+    config = _read_config(args.config)
+    publish_times = parse_times(args.times or config.get('publish_times') or DEFAULT_PUBLISH_TIMES)
+    start_date = args.start_date or datetime.now() + timedelta(days=1)
+    return start_date, publish_times
+
+
+def cmd_plan(args) -> int:
+    """plan：预览定时发布计划"""
+    start_date, publish_times = _schedule_options(args)
+
+    parser = NovelParser(file_path=args.file, lazy=True, workers=args.workers)
+    try:
+        titles = _chapter_titles(parser)
+    finally:
+        parser.close()
+
+    stop = None if args.count is None else args.start_index + args.count
+    plan = plan_chapters(titles[args.start_index:stop], start_date, publish_times)
+
+    if args.json:
+        print(json.dumps([
+            {
+                'index': args.start_index + i,
+                'title': item['title'],
+                'publish_time': item['publish_time'].strftime('%Y-%m-%d %H:%M'),
+            }
+            for i, item in enumerate(plan)
+        ], ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{'=' * 50}")
+    print(f"发布计划预览")
+    print(f"{'=' * 50}")
+    print(f"总章节: {len(titles)}")
+    print(f"待发布: {len(plan)} 章（起始索引 {args.start_index}）")
+    print(f"发布时间: {', '.join(publish_times)}")
+    print(f"开始日期: {start_date.strftime('%Y-%m-%d')}")
+    if plan:
+        print(f"预计完成: {plan[-1]['publish_time'].strftime('%Y-%m-%d')}")
+    print(f"{'=' * 50}")
+    for i, item in enumerate(plan):
+        print(f"  {args.start_index + i + 1:>5}. {item['publish_time'].strftime('%Y-%m-%d %H:%M')}  {item['title']}")
+    return 0
+
+
+def _open_scheduler(args):
+    """加载小说、启动浏览器并选择书本，失败时返回 None"""
+    # 需要浏览器的命令才导入 selenium
+    from scheduler import PublishScheduler
+
+    scheduler = PublishScheduler(args.config)
+    if args.pipeline:
+        scheduler.config['pipeline'] = True
+    scheduler.load_novel(file_path=args.file, lazy=True, workers=args.workers)
+    scheduler.init_publisher()
+    if args.publish_url:
+        scheduler.publisher.config['publish_url'] = args.publish_url
+
+    if args.novel is not None and not scheduler.select_novel(args.novel):
+        print("✗ 无法选择书本，发布流程终止")
+        scheduler.close()
+        return None
+    return scheduler
+
+
+def _publish_exit_code(result) -> int:
+    """有章节发布失败、未确认结果（或未开始发布）时返回 1"""
+    return 0 if result is not None and not result['failed'] and not result['unconfirmed'] else 1
+
+
+def cmd_publish(args) -> int:
+    """publish：立即发布章节"""
+    scheduler = _open_scheduler(args)
+    if scheduler is None:
+        return 1
+    try:
+        result = scheduler.publish_immediately(count=args.count, start_index=args.start_index,
+                                               select_novel_first=False)
+    finally:
+        scheduler.close()
+    return _publish_exit_code(result)
+
+
+def cmd_schedule(args) -> int:
+    """schedule：批量设置定时发布"""
+    start_date, publish_times = _schedule_options(args)
+
+    scheduler = _open_scheduler(args)
+    if scheduler is None:
+        return 1
+    try:
+        result = scheduler.publish_scheduled(
+            start_date=start_date,
+            chapters_per_day=len(publish_times),
+            publish_times=publish_times,
+            start_index=args.start_index,
+            select_novel_first=False,
+            count=args.count
+        )
+    finally:
+        scheduler.close()
+    return _publish_exit_code(result)
+
+
+def cmd_novels(args) -> int:
+    """novels：查看书本列表"""
+    from publisher import TomatoNovelPublisher
+
+    publisher = TomatoNovelPublisher(args.config)
+    try:
+        publisher.init_browser()
+        novels = publisher.get_novels()
+    finally:
+        publisher.close()
+
+    if args.json:
+        print(json.dumps([
+            {'index': i, 'id': novel['id'], 'title': novel['title']}
+            for i, novel in enumerate(novels, 1)
+        ], ensure_ascii=False, indent=2))
+    return 0 if novels else 1
+
+
+_COMMAND_HANDLERS = {
+    'parse': cmd_parse,
+    'plan': cmd_plan,
+    'publish': cmd_publish,
+    'schedule': cmd_schedule,
+    'novels': cmd_novels,
+}
+
+
+def run_cli(argv: List[str]) -> int:
+    """
+    执行命令行子命令
+
+    Args:
+        argv: 命令行参数（不含程序名）
+
+    Returns:
+        退出码
+    """
+    arg_parser, commands = build_arg_parser()
+
+    # 先取出任务文件，把其中的参数作为子命令的默认值（命令行参数优先）
+    job_option = argparse.ArgumentParser(add_help=False)
+    job_option.add_argument('--job')
+    job_file = job_option.parse_known_args(argv)[0].job
+    if job_file:
+        try:
+            job = load_job(job_file)
+        except (OSError, ValueError) as e:
+            arg_parser.error(f"无法读取任务文件: {e}")
+
+        command = job.pop('command', None)
+        if not argv or argv[0] not in CLI_COMMANDS:
+            if command not in CLI_COMMANDS:
+                arg_parser.error(f"任务文件缺少有效的 command（{'/'.join(CLI_COMMANDS)}）")
+            argv = [command] + list(argv)
+
+        sub_parser = commands[argv[0]]
+        known = set(vars(sub_parser.parse_args([])))
+        unknown = sorted(set(job) - known)
+        if unknown:
+            sub_parser.error(f"任务文件中有未知参数: {', '.join(unknown)}")
+        sub_parser.set_defaults(**job)
+
+    args = arg_parser.parse_args(argv)
+    if not args.command:
+        arg_parser.print_help()
+        return 2
+
+    if hasattr(args, 'file') and not args.file:
+        commands[args.command].error("缺少小说文件")
+    if getattr(args, 'times', None) is not None:
+        # 任务文件中的发布时间可以是列表，不经过参数类型转换
+        try:
+            args.times = parse_times(args.times)
+        except ValueError as e:
+            commands[args.command].error(f"发布时间格式错误: {e}")
+
+    try:
+        return _COMMAND_HANDLERS[args.command](args)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+
+
 def main():
     """主函数"""
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+
     # 检查配置文件
     try:
         with open('config.json', 'r', encoding='utf-8') as f:
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+发布耗时统计
+把发布每一章的各个步骤（打开编辑页、定位标题框、填写标题和正文、设置定时、点击发布、确认结果）
+记录为带书本、章节序号和结果的计时片段：每个片段追加写入 JSONL 跟踪文件，
+结束时按步骤汇总 p50 / p95 / 最长耗时，并导出 Prometheus 文本格式文件（可由
+node_exporter 的 textfile collector 采集；统计按批清空，导出的都是最近一批的 gauge）
+"""
+import os
+import json
+import math
+import time
+import hashlib
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+# 输出目录：trace.jsonl 为所有运行的跟踪记录，每本书一个 .prom 文件
+METRICS_DIR = './publish_metrics'
+
+# 发布步骤（汇总时按此顺序排列）
+STEPS = (
+    'rate_limit',      # 等待限速许可
+    'navigate',        # 打开或复用编辑页
+    'macro_publish',   # 脚本一次完成填写和提交（macro_publish 模式）
+    'locate_title',    # 定位标题输入框
+    'fill_title',      # 填写标题
+    'fill_content',    # 填写正文（含等待草稿保存）
+    'set_schedule',    # 设置定时发布
+    'click_submit',    # 点击发布
+    'confirm',         # 等待并检查提交结果
+    'chapter',         # 整章合计
+)
+
+# 汇总的分位数 {名称: 分位}
+QUANTILES = {'p50': 0.5, 'p95': 0.95}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    分位数（最近秩法）
+
+    Args:
+        values: 已排序的数值
+        q: 分位（0~1）
+    """
+    if not values:
+        return 0.0
+    rank = min(max(math.ceil(q * len(values)), 1), len(values))
+    return values[rank - 1]
+
+
+def _label(value) -> str:
+    """Prometheus 标签值转义"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PublishMetrics:
+    """一个发布器的步骤耗时统计"""
+
+    def __init__(self, metrics_dir: Optional[str] = METRICS_DIR, clock=time.perf_counter):
+        """
+        Args:
+            metrics_dir: 输出目录（None 表示只在内存中统计，不写文件）
+            clock: 计时函数（测试时可替换）
+        """
+        self.metrics_dir = metrics_dir
+        self._clock = clock
+        self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.reset()
+
+    def reset(self, book: Optional[str] = None):
+        """
+        清空统计，开始统计一本书（同一个发布器在多本书之间复用时，每批发布开始前调用）
+
+        Args:
+            book: 书本标识
+        """
+        # 当前的书本和章节序号，章节序号由批量发布在每章开始前设置
+        self.book: Optional[str] = book
+        self.chapter: Optional[int] = None
+        # 各步骤的耗时 {步骤: [秒, ...]}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        # 各步骤的失败次数 {步骤: 次数}
+        self.errors: Dict[str, int] = defaultdict(int)
+        # 整章结果 {结果: 章数}
+        self.outcomes: Counter = Counter()
+
+    @contextmanager
+    def span(self, step: str) -> Iterator[Dict]:
+        """
+        记录一个步骤的耗时
+
+        步骤抛出异常时结果记为 error（异常继续向上抛出）；
+        调用方也可以修改返回的片段的 outcome
+
+        Args:
+            step: 步骤名称（见 STEPS）
+
+        Yields:
+            片段 {'step', 'book', 'chapter', 'outcome', ...}
+        """
+        record = {'step': step, 'book': self.book, 'chapter': self.chapter, 'outcome': 'ok'}
+        start = self._clock()
+        try:
+            yield record
+        except BaseException as e:
+            record['outcome'] = 'error'
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            self._finish(record, self._clock() - start)
+
+    def _finish(self, record: Dict, duration: float):
+        step = record['step']
+        self.durations[step].append(duration)
+        if step == 'chapter':
+            self.outcomes[record['outcome']] += 1
+        elif record['outcome'] != 'ok':
+            self.errors[step] += 1
+
+        record['duration_ms'] = round(duration * 1000, 1)
+        record['run'] = self.run_id
+        record['time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._write_trace(record)
+
+    def _write_trace(self, record: Dict):
+        """追加一条跟踪记录（写入失败时静默忽略，不影响发布）"""
+        if not self.metrics_dir:
+            return
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with open(os.path.join(self.metrics_dir, 'trace.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        按步骤汇总
+
+        Returns:
+            {步骤: {'count', 'errors', 'sum', 'p50', 'p95', 'max'}}（耗时单位：秒）
+        """
+        order = {step: i for i, step in enumerate(STEPS)}
+        stats = {}
+        for step in sorted(self.durations, key=lambda name: (order.get(name, len(STEPS)), name)):
+            values = sorted(self.durations[step])
+            stats[step] = {
+                'count': len(values),
+                'errors': self.errors.get(step, 0),
+                'sum': sum(values),
+                **{name: percentile(values, q) for name, q in QUANTILES.items()},
+                'max': values[-1],
+            }
+        return stats
+
+    def prometheus(self) -> str:
+        """
+        导出 Prometheus 文本格式
+
+        统计在每批发布开始时清空，导出的是最近一批的数值，
+        因此全部用 gauge（名称带 batch，不用 _total / summary 的 _sum、_count，
+        避免被当作累计计数器用 rate() 计算时出现回退）
+        """
+        book = _label(self.book or '')
+        stats = self.summary()
+        lines = []
+
+        def gauge(name: str, help_text: str, samples: List[str]):
+            lines.extend([f'# HELP {name} {help_text}', f'# TYPE {name} gauge'])
+            lines.extend(f'{name}{{{sample}' for sample in samples)
+
+        def step_labels(step: str) -> str:
+            return f'book="{book}",step="{_label(step)}"'
+
+        gauge('fanqie_publish_batch_step_seconds', '最近一批发布步骤耗时分位数', [
+            f'{step_labels(step)},quantile="{q}"}} {stat[name]:.6f}'
+            for step, stat in stats.items() for name, q in QUANTILES.items()
+        ])
+        gauge('fanqie_publish_batch_step_max_seconds', '最近一批发布步骤最长耗时', [
+            f'{step_labels(step)}}} {stat["max"]:.6f}' for step, stat in stats.items()
+        ])
+        gauge('fanqie_publish_batch_step_duration_seconds', '最近一批发布步骤耗时合计', [
+            f'{step_labels(step)}}} {stat["sum"]:.6f}' for step, stat in stats.items()
+        ])
+        gauge('fanqie_publish_batch_step_runs', '最近一批发布步骤执行次数', [
+            f'{step_labels(step)}}} {stat["count"]}' for step, stat in stats.items()
+        ])
+        gauge('fanqie_publish_batch_step_errors', '最近一批发布步骤失败次数', [
+            f'{step_labels(step)}}} {stat["errors"]}' for step, stat in stats.items() if step != 'chapter'
+        ])
+        gauge('fanqie_publish_batch_chapters', '最近一批章节发布结果', [
+            f'book="{book}",outcome="{_label(outcome)}"}} {count}'
+            for outcome, count in sorted(self.outcomes.items())
+        ])
+        return '\n'.join(lines) + '\n'
+
+    def prometheus_path(self) -> Optional[str]:
+        """当前书本的 Prometheus 文件"""
+        if not self.metrics_dir:
+            return None
+        name = hashlib.sha1((self.book or '').encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.metrics_dir, f'publish_{name}.prom')
+
+    def export(self) -> Optional[str]:
+        """
+        写出 Prometheus 文件（先写临时文件再替换，采集时不会读到一半的内容）
+
+        Returns:
+            文件路径，没有统计数据或写入失败时返回 None
+        """
+        path = self.prometheus_path()
+        if not path or not self.durations:
+            return None
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+            os.replace(temp_path, path)
+        except OSError:
+            return None
+        return path
+
+    def print_summary(self):
+        """打印各步骤的 p50 / p95 / 最长耗时，并导出 Prometheus 文件"""
+        stats = self.summary()
+        if not stats:
+            return
+
+        print("步骤耗时（p50 / p95 / 最长）:")
+        for step, stat in stats.items():
+            line = (f"  {step}: {stat['count']} 次，{stat['p50']:.2f} / {stat['p95']:.2f} / "
+                    f"{stat['max']:.2f} s")
+            if stat['errors']:
+                line += f"（失败 {stat['errors']} 次）"
+            print(line)
+
+        path = self.export()
+        if path:
+            print(f"  跟踪记录: {os.path.join(self.metrics_dir, 'trace.jsonl')}，指标: {path}")
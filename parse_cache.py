@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+章节解析缓存
+把解析得到的章节索引（标题、偏移、编码）保存到磁盘，
+同一文件未修改时（字节数和修改时间一致，只有修改时间变化时再比较内容 sha1）
+直接复用，无需重新扫描；
+文件只在末尾追加内容时，可以从最后一章开始增量解析
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from chapter_index import ChapterIndex
+
+# 默认缓存目录（相对当前工作目录）
+CACHE_DIR = '.fanqie_cache'
+
+# 缓存目录总大小上限，超出后按最近使用时间淘汰
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# 缓存格式版本，格式变化时递增使旧缓存失效
+CACHE_VERSION = 2
+
+
+class Fingerprint:
+    """
+    文件指纹：(字节数, 修改时间(ns), 内容 sha1)
+
+    内容 sha1 在用到时才计算：与缓存比较时字节数和修改时间都一致即视为未修改，
+    只有修改时间变了（文件被复制、touch 或另存）才计算 sha1 比较内容
+    """
+
+    __slots__ = ('size', 'mtime_ns', '_data', '_sha1')
+
+    def __init__(self, size: int, mtime_ns: int, data):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._data = data
+        self._sha1 = None
+
+    @property
+    def sha1(self) -> str:
+        """内容 sha1（第一次访问时计算）"""
+        if self._sha1 is None:
+            self._sha1 = hashlib.sha1(self._data).hexdigest()
+        return self._sha1
+
+    def matches(self, stored) -> bool:
+        """与缓存中保存的指纹比较"""
+        size, mtime_ns, sha1 = stored
+        if size != self.size:
+            return False
+        return mtime_ns == self.mtime_ns or sha1 == self.sha1
+
+    def to_list(self) -> List:
+        return [self.size, self.mtime_ns, self.sha1]
+
+
+def file_fingerprint(file_path, data) -> Fingerprint:
+    """
+    文件指纹（不立即计算 sha1）
+
+    Args:
+        file_path: 文件路径
+        data: 文件内容（bytes 或 mmap，计算 sha1 前不能关闭）
+    """
+    stat = os.stat(file_path)
+    return Fingerprint(len(data), stat.st_mtime_ns, data)
+
+
+def prefix_hash(buffer, length: int) -> str:
+    """
+    计算内容前 length 个单位的 sha1（用于判断文件开头是否被修改）
+
+    Args:
+        buffer: 文本（按字符计）或 bytes/mmap（按字节计）
+        length: 前缀长度
+    """
+    if isinstance(buffer, str):
+        return hashlib.sha1(buffer[:length].encode('utf-8')).hexdigest()
+    # 显式释放 memoryview，避免之后无法关闭 mmap
+    with memoryview(buffer) as view, view[:length] as prefix:
+        return hashlib.sha1(prefix).hexdigest()
+
+
+class ParseCache:
+    """磁盘章节索引缓存（LRU 淘汰）"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存目录总大小上限（字节）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, file_path, unit: str, parser_key: str) -> Path:
+        """每个 (文件, 偏移单位, 解析规则) 对应一个缓存文件"""
+        name = f"{Path(file_path).resolve()}|{unit}|{parser_key}|{CACHE_VERSION}"
+        return self.cache_dir / (hashlib.sha1(name.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_entry(self, file_path, unit: str, parser_key: str) -> Optional[dict]:
+        """读取缓存文件，不存在或已损坏时返回 None"""
+        entry_path = self._entry_path(file_path, unit, parser_key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('version') != CACHE_VERSION:
+            return None
+
+        # 更新访问时间，供 LRU 淘汰使用
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def load(self, file_path, unit: str, parser_key: str,
+             fingerprint: Fingerprint) -> Optional[Tuple[str, ChapterIndex]]:
+        """
+        查找缓存
+
+        Args:
+            file_path: 小说文件路径
+            unit: 偏移单位（'char' 或 'byte'）
+            parser_key: 解析规则指纹
+            fingerprint: 当前文件指纹
+
+        Returns:
+            (文件编码, 章节索引)，未命中时返回 None
+        """
+        entry = self._read_entry(file_path, unit, parser_key)
+        if entry is None or not fingerprint.matches(entry['fingerprint']):
+            return None
+        if entry['fingerprint'][1] != fingerprint.mtime_ns:
+            # 内容未变、只有修改时间变化：记下新的修改时间，下次不必再计算 sha1
+            entry['fingerprint'] = fingerprint.to_list()
+            self._write_entry(self._entry_path(file_path, unit, parser_key), entry)
+        return entry['encoding'], ChapterIndex.from_dict(entry['index'])
+
+    def load_previous(self, file_path, unit: str,
+                      parser_key: str) -> Optional[Tuple[str, ChapterIndex, str]]:
+        """
+        读取该文件上一次的解析结果（不校验指纹，用于增量解析）
+
+        Returns:
+            (文件编码, 章节索引, 最后一章之前内容的 sha1)，没有可用结果时返回 None
+        """
+        entry = self._read_entry(file_path, unit, parser_key)
+        if entry is None or not entry.get('tail_hash'):
+            return None
+        return entry['encoding'], ChapterIndex.from_dict(entry['index']), entry['tail_hash']
+
+    def store(self, file_path, unit: str, parser_key: str,
+              fingerprint: Fingerprint, encoding: str, index: ChapterIndex,
+              tail_hash: str = None):
+        """
+        写入缓存（失败时静默忽略，不影响解析）
+
+        Args:
+            file_path: 小说文件路径
+            unit: 偏移单位（'char' 或 'byte'）
+            parser_key: 解析规则指纹
+            fingerprint: 文件指纹
+            encoding: 文件编码
+            index: 章节索引
+            tail_hash: 最后一章标题行之前内容的 sha1（见 prefix_hash），用于增量解析
+        """
+        entry = {
+            'version': CACHE_VERSION,
+            'path': str(Path(file_path).resolve()),
+            'fingerprint': fingerprint.to_list(),
+            'encoding': encoding,
+            'tail_hash': tail_hash,
+            'index': index.to_dict(),
+        }
+
+        if self._write_entry(self._entry_path(file_path, unit, parser_key), entry):
+            self._evict()
+
+    def _write_entry(self, entry_path: Path, entry: dict) -> bool:
+        """写入缓存文件（先写临时文件再替换），失败时返回 False"""
+        temp_path = entry_path.with_suffix('.tmp')
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            # json.dumps 走 C 编码器，比 json.dump 逐段写入快得多
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False))
+            os.replace(temp_path, entry_path)
+        except OSError:
+            return False
+        return True
+
+    def _entries(self):
+        """缓存目录中属于解析缓存的文件（同目录下的其他状态文件不受淘汰和清空影响）"""
+        for path in self.cache_dir.glob('*.json'):
+            if len(path.stem) == 40 and all(c in '0123456789abcdef' for c in path.stem):
+                yield path
+
+    def _evict(self):
+        """总大小超过上限时，删除最久未使用的缓存"""
+        entries = []
+        total = 0
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+
+    def clear(self):
+        """清空缓存"""
+        for path in self._entries():
+            try:
+                path.unlink()
+            except OSError:
+                continue
@@ -4,9 +4,167 @@
 支持识别章节标题和正文内容
 """
 import re
-from typing import List, Dict
+import sys
+import codecs
+import hashlib
+from array import array
+from itertools import islice
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional, Union
 from pathlib import Path
 
+from chapter_index import ChapterIndex
+from chapter_export import export_chapters, guess_format
+from parse_cache import ParseCache, file_fingerprint, prefix_hash
+import chapter_index
+
+
+# 章节序号允许的字符
+_NUMERALS = '0-9零一二三四五六七八九十百千'
+
+# 与 NovelParser.CHAPTER_PATTERNS 等价的合并匹配器（作用于去除首尾空白后的行）
+# 原写法中的 .* 会在长段落上大量回溯，这里改为否定字符类逐段定位，
+# 每个分支都只向前扫描一次，保证匹配耗时与行长成线性关系
+# 注意：修改 CHAPTER_PATTERNS 时需同步修改这里
+_TITLE_RE = re.compile(
+    r'第\s*[' + _NUMERALS + r']+\s*[章节卷集回部篇]'
+    r'|Chapter\s*\d+'
+    r'|\d+[.、]'
+    r'|【[^第\n]*第[^章\n]*章[^】\n]*】'
+    r'|[^第\n]*第[^' + _NUMERALS + r'\n]*[' + _NUMERALS + r'][^章\n]*章',
+    re.IGNORECASE
+)
+
+# 预筛选：标题行要么包含“第”，要么（去掉行首空白后）以 Chapter 或数字开头
+_CANDIDATE_RE = re.compile(r'第|^[^\S\n]*(?:Chapter|\d)', re.IGNORECASE | re.MULTILINE)
+
+# 自定义 CHAPTER_PATTERNS 时无法预筛选，逐行检查
+_EVERY_LINE_RE = re.compile(r'^', re.MULTILINE)
+
+# 带 BOM 的文件直接按 BOM 确定编码
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# 没有 BOM 时依次探测的编码（按优先级）
+# utf-16 文件必须带 BOM，已由上面的 BOM 检测覆盖
+ENCODINGS = ['utf-8', 'gbk']
+
+# 都探测失败时使用的编码（GBK 的超集）
+FALLBACK_ENCODING = 'gb18030'
+
+# 探测编码时使用的文件开头字节数
+ENCODING_PROBE_SIZE = 64 * 1024
+
+
+def candidate_encodings(sample: bytes, final: bool = False) -> List[str]:
+    """
+    根据文件开头的字节样本给出候选编码（按可能性排序）
+
+    Args:
+        sample: 文件开头的字节
+        final: 样本是否就是完整文件（否则末尾被截断的多字节字符不算错误）
+
+    Returns:
+        候选编码列表，最后一项总是 FALLBACK_ENCODING
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return [encoding]
+
+    candidates = []
+    for encoding in ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=final)
+        except UnicodeError:
+            continue
+        candidates.append(encoding)
+
+    candidates.append(FALLBACK_ENCODING)
+    return candidates
+
+
+def detect_encoding(sample: bytes, final: bool = False) -> str:
+    """根据文件开头的字节样本判断编码"""
+    return candidate_encodings(sample, final)[0]
+
+
+def _decodes(stream, encoding: str, block_size: int = 1024 * 1024) -> bool:
+    """逐块解码二进制流（不保存结果），判断整个流能否按该编码解码"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        while True:
+            block = stream.read(block_size)
+            if not block:
+                break
+            decoder.decode(block)
+        decoder.decode(b'', final=True)
+    except UnicodeError:
+        return False
+    return True
+
+
+class TitleScanner:
+    """
+    章节标题扫描器
+
+    只保存编译好的匹配规则，可以传给子进程并行扫描
+    """
+
+    def __init__(self, patterns: List[str], max_title_length: int = None):
+        """
+        Args:
+            patterns: 章节标题正则表达式列表
+            max_title_length: 标题最大长度（None 表示不限制）
+        """
+        self.max_title_length = max_title_length
+
+        if tuple(patterns) == NovelParser._DEFAULT_PATTERNS:
+            self.title_re, self.candidate_re = _TITLE_RE, _CANDIDATE_RE
+        else:
+            # 自定义规则：合并为一个正则，逐行匹配
+            combined = '|'.join(f'(?:{pattern})' for pattern in patterns)
+            self.title_re, self.candidate_re = re.compile(combined, re.IGNORECASE), _EVERY_LINE_RE
+
+    def match(self, line: str) -> bool:
+        """判断去除首尾空白后的行是否为章节标题"""
+        if self.max_title_length is not None and len(line) > self.max_title_length:
+            return False
+        return self.title_re.match(line) is not None
+
+    def scan(self, text: str, start: int = 0) -> List[Tuple[str, int, int]]:
+        """
+        单遍扫描文本，定位所有章节标题行
+
+        Args:
+            text: 小说文本
+            start: 起始位置（必须位于行首）
+
+        Returns:
+            [(标题, 行起始位置, 行结束位置), ...]，行结束位置指向换行符或文本末尾
+        """
+        titles = []
+        line_end = -1
+
+        for match in self.candidate_re.finditer(text, start):
+            position = match.start()
+            if position <= line_end:
+                # 同一行已经判断过
+                continue
+
+            line_start = text.rfind('\n', 0, position) + 1
+            line_end = text.find('\n', position)
+            if line_end == -1:
+                line_end = len(text)
+
+            title = text[line_start:line_end].strip()
+            if title and self.match(title):
+                titles.append((title, line_start, line_end))
+
+        return titles
+
 
 class NovelParser:
     """小说解析器，自动识别章节标题和正文"""
@@ -20,116 +178,485 @@ class NovelParser:
         r'^【.*第.*章.*】',
         r'^.*第.*[0-9零一二三四五六七八九十百千]+.*章.*',
     ]
+    _DEFAULT_PATTERNS = tuple(CHAPTER_PATTERNS)
 
-    def __init__(self, file_path: str = None, content: str = None):
+    def __init__(self, file_path: str = None, content: str = None,
+                 max_title_length: int = None, stream: bool = False, lazy: bool = False,
+                 cache: Union[bool, ParseCache] = True, incremental: bool = True,
+                 workers: int = 1):
         """
         初始化解析器
 
         Args:
             file_path: 小说文件路径（支持 .txt）
             content: 小说文本内容
+            max_title_length: 标题最大长度，超过该长度的行视为正文（None 表示不限制）
+            stream: 流式模式，不一次性读入整个文件，通过 iter_chapters() 逐章读取
+                    （仅对 file_path 生效）
+            lazy: 懒加载模式，用 mmap 映射文件，只建立章节偏移索引，
+                  正文在 get_chapter() 或发布时才解码（仅对 file_path 生效）
+            cache: 解析缓存，True 使用默认目录 .fanqie_cache/，False 关闭，
+                   也可以传入 ParseCache 实例（仅对 file_path 生效）
+            incremental: 增量解析，文件只在末尾追加内容时，从上次的最后一章开始
+                         解析新增部分（需要开启 cache）
+            workers: 并行解析的进程数，大于 1 时把大文件按行切成多段，
+                     在多个进程中同时扫描（不超过可用 CPU 数，仅对 file_path 生效）
         """
+        if cache is True:
+            cache = ParseCache()
+        self.cache = cache or None
+        self.incremental = incremental
+        # 缓存使用情况：'hit' 命中，'incremental' 增量解析，'miss' 完整解析，None 未使用缓存
+        self.cache_status = None
+        self._index = None
+        self.max_title_length = max_title_length
+        self._scanner = TitleScanner(self.CHAPTER_PATTERNS, max_title_length)
+        # 进程数超过可用 CPU 时只会互相争抢，单核机器上直接顺序解析
+        self.workers = min(max(workers or 1, 1), chapter_index.available_cpus())
+        self.stream = bool(stream and file_path)
+        self.lazy = bool(lazy and file_path and not self.stream)
+        self.encoding = None
+
         if file_path:
             self.file_path = Path(file_path)
             if not self.file_path.exists():
                 raise FileNotFoundError(f"文件不存在: {file_path}")
-            # 尝试多种编码
-            encodings = ['utf-8', 'gbk', 'gb2312', 'utf-16']
-            self.content = None
-            for encoding in encodings:
-                try:
-                    with open(self.file_path, 'r', encoding=encoding) as f:
-                        self.content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            if self.content is None:
-                raise ValueError("无法识别文件编码，请确保文件是 utf-8 或 gbk 格式")
+            if self.stream:
+                # 流式模式只确定编码，章节在迭代时读取
+                self.encoding = self._detect_stream_encoding()
+                self.content = None
+                self.chapters = None
+                return
+            if self.lazy or self.cache:
+                # 能按字节切分的编码先建立字节偏移索引（有缓存时直接复用）：懒加载模式直接使用；
+                # 普通模式从映射的文件逐章解码正文，缓存命中时不必读入、校验和整体解码整个文件
+                index = self._build_index()
+                if index is not None:
+                    self.content = None
+                    if self.lazy:
+                        self.chapters = index
+                    else:
+                        self._index = index
+                        self.chapters = list(index)
+                        # 正文已全部解码，释放文件映射（不占用文件）
+                        index.close()
+                    return
+                self.lazy = False
+            # 一次性读入字节
+            data = self.file_path.read_bytes()
+            fingerprint = file_fingerprint(self.file_path, data) if self.cache else None
+            if self.workers > 1:
+                # 并行扫描字节偏移，再从字节中逐章解码正文，不再整体解码一遍
+                self.encoding = detect_encoding(data[:ENCODING_PROBE_SIZE],
+                                                final=len(data) <= ENCODING_PROBE_SIZE)
+                index = self._build_index(data, fingerprint)
+                if index is not None:
+                    self._index = index
+                    self.chapters = list(index)
+                    self.content = None
+                    return
+            # 检测编码后解码
+            self.encoding, self.content = self._decode(data)
+            del data
         elif content:
             self.content = content
             self.file_path = None
+            fingerprint = None
         else:
             raise ValueError("必须提供 file_path 或 content 参数")
 
         self.chapters = []
-        self._parse()
+        self._parse(fingerprint)
+
+    def _build_index(self, buffer=None, fingerprint=None) -> Optional[ChapterIndex]:
+        """
+        建立按字节偏移的章节索引（懒加载模式和并行解析使用）
+
+        Args:
+            buffer: 文件内容，默认用 mmap 映射文件
+            fingerprint: buffer 对应的文件指纹（传入 buffer 时提供）
+
+        Returns:
+            章节索引；编码不支持按字节切分时返回 None，由调用方退回普通解析
+        """
+        mapped = buffer is None
+        if mapped:
+            buffer = chapter_index.open_buffer(self.file_path)
+            fingerprint = file_fingerprint(self.file_path, buffer) if self.cache else None
+
+        cached = self._load_cached(fingerprint, 'byte')
+        if cached:
+            self.encoding, index = cached
+            index.attach(buffer)
+            return index
+
+        resumed = self._resume_index(fingerprint, 'byte', buffer)
+        if resumed:
+            self.encoding, index = resumed
+            self._store_cached(fingerprint, 'byte', index, buffer)
+            return index
+
+        if self.encoding is None:
+            self.encoding = self._probe_encoding()
+
+        # BOM 不属于正文，从 BOM 之后开始按 utf-8 建索引
+        encoding, start = self.encoding, 0
+        if encoding == 'utf-8-sig':
+            encoding, start = 'utf-8', len(codecs.BOM_UTF8)
+
+        if chapter_index.supports(buffer, encoding):
+            try:
+                index = self._scan_bytes(buffer, encoding, start)
+                self._store_cached(fingerprint, 'byte', index, buffer)
+                return index
+            except UnicodeDecodeError:
+                # 文件开头之后出现了无法解码的内容，交给普通模式逐个尝试编码
+                pass
+
+        if mapped and hasattr(buffer, 'close'):
+            buffer.close()
+        return None
+
+    def _scan_bytes(self, buffer, encoding: str, start: int) -> ChapterIndex:
+        """扫描字节内容建立索引，文件较大且 workers > 1 时多进程并行"""
+        if self.workers > 1 and len(buffer) - start >= chapter_index.PARALLEL_MIN_BYTES:
+            titles, title_offsets, body_starts = chapter_index.scan_spans_parallel(
+                self.file_path, buffer, encoding, self._scanner.scan,
+                start, len(buffer), self.workers
+            )
+        else:
+            titles, title_offsets, body_starts = chapter_index.scan_spans(
+                buffer, encoding, self._scanner.scan, start=start
+            )
+        return ChapterIndex(encoding, titles, title_offsets, body_starts, len(buffer), buffer)
+
+    def _parser_key(self) -> str:
+        """解析规则指纹，规则变化时缓存自动失效"""
+        rules = repr((list(self.CHAPTER_PATTERNS), self.max_title_length))
+        return hashlib.sha1(rules.encode('utf-8')).hexdigest()[:16]
+
+    def _load_cached(self, fingerprint, unit: str):
+        """查找解析缓存，返回 (编码, 章节索引) 或 None"""
+        if not fingerprint:
+            return None
+        cached = self.cache.load(self.file_path, unit, self._parser_key(), fingerprint)
+        self.cache_status = 'hit' if cached else 'miss'
+        return cached
+
+    def _store_cached(self, fingerprint, unit: str, index: ChapterIndex, buffer):
+        """保存解析结果到缓存（buffer 为建立索引时使用的文本或字节）"""
+        if not fingerprint:
+            return
+        tail_hash = None
+        if len(index):
+            tail_hash = prefix_hash(buffer, index.title_offsets[-1])
+        self.cache.store(self.file_path, unit, self._parser_key(), fingerprint,
+                         self.encoding, index, tail_hash)
+
+    def _resume_index(self, fingerprint, unit: str, buffer):
+        """
+        增量解析：文件在上次解析后只追加了内容时，复用之前的章节
+
+        上次的最后一章可能被续写，因此从它的标题行开始重新扫描，
+        再与之前的其余章节合并。标题行之前的内容必须与上次完全一致。
+
+        Args:
+            fingerprint: 当前文件指纹
+            unit: 偏移单位（'char' 或 'byte'）
+            buffer: 当前内容（文本或字节）
+
+        Returns:
+            (编码, 章节索引)，无法增量解析时返回 None
+        """
+        if not (fingerprint and self.incremental):
+            return None
+
+        previous = self.cache.load_previous(self.file_path, unit, self._parser_key())
+        if not previous:
+            return None
+
+        encoding, old, tail_hash = previous
+        if not len(old):
+            return None
+        tail = old.title_offsets[-1]
+        if tail > len(buffer) or prefix_hash(buffer, tail) != tail_hash:
+            return None
+
+        try:
+            if unit == 'char':
+                titles, title_offsets, body_starts = self._text_spans(buffer, start=tail)
+            elif chapter_index.supports(buffer, old.encoding, tail):
+                titles, title_offsets, body_starts = chapter_index.scan_spans(
+                    buffer, old.encoding, self._scanner.scan, start=tail
+                )
+            else:
+                # 新增内容中出现了单独的 \r，无法继续按字节建索引
+                return None
+        except UnicodeDecodeError:
+            return None
+
+        index = ChapterIndex(
+            old.encoding,
+            old.titles[:-1] + titles,
+            old.title_offsets[:-1] + title_offsets,
+            old.body_starts[:-1] + body_starts,
+            len(buffer),
+            buffer
+        )
+        self.cache_status = 'incremental'
+        return encoding, index
+
+    def _probe_encoding(self) -> str:
+        """用文件开头的一段字节探测编码（懒加载模式使用，后面解码失败时由调用方退回普通解析）"""
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(ENCODING_PROBE_SIZE)
+        return detect_encoding(sample, final=len(sample) < ENCODING_PROBE_SIZE)
+
+    def _detect_stream_encoding(self) -> str:
+        """
+        确定流式模式的编码
+
+        开头样本只能排除一部分编码（例如开头全是 ASCII 时 utf-8 和 gbk 都能解码），
+        文件比样本长时按候选顺序逐块解码整个文件确认（只解码不保存），
+        保证逐章输出时不会读到一半才发现编码不对
+        """
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(ENCODING_PROBE_SIZE)
+            final = len(sample) < ENCODING_PROBE_SIZE
+            candidates = candidate_encodings(sample, final=final)
+            if final or len(candidates) == 1:
+                return candidates[0]
+            for encoding in candidates:
+                f.seek(0)
+                if _decodes(f, encoding):
+                    return encoding
+        raise ValueError("无法识别文件编码，请确保文件是 utf-8 或 gbk 格式")
+
+    def _iter_stream(self, head: int = None, with_content: bool = True) -> Iterator[Dict[str, str]]:
+        """
+        流式逐行读取文件并切分章节（编码已在初始化时按整个文件确认）
+
+        Raises:
+            ValueError: 文件在确认编码之后被修改，出现了无法解码的内容
+                        （不中途换用其他编码，避免输出的章节混用两种编码）
+        """
+        try:
+            with open(self.file_path, 'r', encoding=self.encoding) as f:
+                yield from self._iter_line_chapters(f, head=head, with_content=with_content)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"文件中出现无法按 {self.encoding} 解码的内容（文件可能在读取过程中被修改）: {e}")
+
+    def _decode(self, data: bytes) -> Tuple[str, str]:
+        """
+        检测编码并解码文件内容
+
+        先用开头样本筛选候选编码，通常只需完整解码一次；
+        只有样本之后出现无法解码的内容时才会尝试下一个候选编码。
+
+        Returns:
+            (编码, 文本)
+        """
+        sample = data[:ENCODING_PROBE_SIZE]
+        for encoding in candidate_encodings(sample, final=len(data) <= ENCODING_PROBE_SIZE):
+            try:
+                text = data.decode(encoding)
+            except UnicodeError:
+                continue
+
+            # 与文本模式读取保持一致：统一换行符
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return encoding, text
+
+        raise ValueError("无法识别文件编码，请确保文件是 utf-8 或 gbk 格式")
+
+    def _match_title(self, line: str) -> bool:
+        """判断去除首尾空白后的行是否为章节标题"""
+        return self._scanner.match(line)
 
     def _is_chapter_title(self, line: str) -> bool:
         """判断是否为章节标题"""
         line = line.strip()
         if not line:
             return False
+        return self._match_title(line)
 
-        for pattern in self.CHAPTER_PATTERNS:
-            if re.match(pattern, line, re.IGNORECASE):
-                return True
-        return False
+    def _scan_titles(self, text: str, start: int = 0) -> List[Tuple[str, int, int]]:
+        """定位所有章节标题行，见 TitleScanner.scan"""
+        return self._scanner.scan(text, start)
 
-    def _parse(self):
-        """解析小说内容"""
-        lines = self.content.split('\n')
-        chapters = []
+    def _text_spans(self, text: str, start: int = 0):
+        """
+        扫描文本，返回 (标题列表, 标题行起始位置 array, 正文起始位置 array)
+
+        Args:
+            text: 小说文本
+            start: 起始位置（必须位于行首）
+        """
+        titles = []
+        title_offsets = array('q')
+        body_starts = array('q')
 
-        current_chapter = None
+        for title, line_start, line_end in self._scan_titles(text, start):
+            titles.append(title)
+            title_offsets.append(line_start)
+            # 正文从标题行的换行符之后开始
+            body_starts.append(min(line_end + 1, len(text)))
+
+        return titles, title_offsets, body_starts
+
+    def _index_text(self, text: str) -> ChapterIndex:
+        """扫描文本，建立按字符偏移的章节索引"""
+        titles, title_offsets, body_starts = self._text_spans(text)
+        return ChapterIndex(None, titles, title_offsets, body_starts, len(text), text)
+
+    def _parse(self, fingerprint=None):
+        """
+        解析小说内容
+
+        Args:
+            fingerprint: 源文件指纹，提供时优先使用解析缓存
+        """
+        cached = self._load_cached(fingerprint, 'char')
+        if cached:
+            index = cached[1]
+            index.attach(self.content)
+        else:
+            resumed = self._resume_index(fingerprint, 'char', self.content)
+            index = resumed[1] if resumed else self._index_text(self.content)
+            self._store_cached(fingerprint, 'char', index, self.content)
+
+        self._index = index
+        self.chapters = list(index)
+
+    def _iter_line_chapters(self, lines: Iterable[str], head: int = None,
+                            with_content: bool = True) -> Iterator[Dict[str, str]]:
+        """
+        从逐行输入中切分章节，每次只保留当前章节的正文
+
+        Args:
+            lines: 行迭代器（可以是文本文件句柄）
+            head: 最多输出的章节数（None 表示全部）
+            with_content: 是否收集正文（只统计章节时可关闭）
+
+        Yields:
+            {'title': '', 'content': ''}
+        """
+        if head is not None and head <= 0:
+            return
+
+        count = 0
+        current_title = None
         current_content = []
 
         for line in lines:
             if self._is_chapter_title(line):
-                # 保存上一个章节
-                if current_chapter:
-                    chapters.append({
-                        'title': current_chapter,
-                        'content': '\n'.join(current_content).strip()
-                    })
-
-                # 开始新章节
-                current_chapter = line.strip()
+                if current_title:
+                    yield {
+                        'title': current_title,
+                        'content': ''.join(current_content).strip()
+                    }
+                    count += 1
+                    if head is not None and count >= head:
+                        return
+
+                current_title = line.strip()
                 current_content = []
-            else:
-                if current_chapter:  # 如果已经找到第一个章节
-                    current_content.append(line)
+            elif current_title and with_content:
+                current_content.append(line if line.endswith('\n') else line + '\n')
+
+        if current_title:
+            yield {
+                'title': current_title,
+                'content': ''.join(current_content).strip()
+            }
 
-        # 保存最后一个章节
-        if current_chapter:
-            chapters.append({
-                'title': current_chapter,
-                'content': '\n'.join(current_content).strip()
-            })
+    def iter_chapters(self, head: int = None) -> Iterator[Dict[str, str]]:
+        """
+        逐章迭代
 
-        self.chapters = chapters
+        流式模式下按行读取文件，内存中只保留当前章节；
+        普通模式下直接迭代已解析的章节。
+
+        Args:
+            head: 最多输出的章节数（None 表示全部），适合快速预览大文件
+
+        Yields:
+            {'title': '', 'content': ''}
+        """
+        if not self.stream:
+            yield from islice(self.chapters, head)
+            return
+
+        yield from self._iter_stream(head=head)
+
+    def get_index(self) -> Optional[ChapterIndex]:
+        """
+        获取章节偏移索引（流式模式下为 None）
+
+        懒加载模式下偏移按字节计算；普通模式下能按字节切分的编码同样按字节计算
+        （正文已全部解码，索引不再绑定文件），其余按解码后的文本字符计算
+        """
+        if self.lazy:
+            return self.chapters
+        return self._index
 
     def get_chapters(self) -> List[Dict[str, str]]:
-        """获取所有章节"""
+        """
+        获取所有章节
+
+        流式模式下会读取整个文件；懒加载模式下返回 ChapterIndex，
+        它是只读的章节序列，正文在访问时才解码
+        """
+        if self.stream:
+            return list(self.iter_chapters())
         return self.chapters
 
     def get_chapter_count(self) -> int:
         """获取章节数量"""
+        if self.stream:
+            return sum(1 for _ in self._iter_stream(with_content=False))
         return len(self.chapters)
 
     def get_chapter(self, index: int) -> Dict[str, str]:
         """获取指定章节（从0开始）"""
+        if self.stream:
+            if index >= 0:
+                for chapter in islice(self.iter_chapters(), index, None):
+                    return chapter
+            raise IndexError(f"章节索引超出范围: {index}")
+
         if 0 <= index < len(self.chapters):
             return self.chapters[index]
         raise IndexError(f"章节索引超出范围: {index}")
 
-    def save_chapters(self, output_dir: str = "chapters"):
-        """将每个章节保存为单独文件"""
-        output_path = Path(output_dir)
-        output_path.mkdir(exist_ok=True)
+    def save_chapters(self, output_dir: str = "chapters", fmt: str = None):
+        """
+        导出章节
 
-        for i, chapter in enumerate(self.chapters, 1):
-            filename = f"{i:03d}_{chapter['title'][:20]}.txt"
-            filename = filename.replace('/', '_').replace('\\', '_').replace(':', '_')
-            file_path = output_path / filename
+        Args:
+            output_dir: 输出目录或文件（.zip、.tar/.tar.gz、.jsonl），'-' 表示标准输出
+            fmt: 导出格式（dir/zip/tar/jsonl/stdout），默认根据 output_dir 推断
+        """
+        fmt = fmt or guess_format(output_dir)
+        count = export_chapters(self.iter_chapters(), output_dir, fmt)
 
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(f"{chapter['title']}\n\n")
-                f.write(chapter['content'])
+        if fmt == 'stdout':
+            # 标准输出留给章节数据
+            print(f"已导出 {count} 个章节", file=sys.stderr)
+        elif fmt == 'dir':
+            print(f"已保存 {count} 个章节到 {output_dir} 目录")
+        else:
+            print(f"已保存 {count} 个章节到 {output_dir}")
 
-        print(f"已保存 {len(self.chapters)} 个章节到 {output_dir} 目录")
+    def close(self):
+        """释放懒加载模式下的文件映射"""
+        if isinstance(self.chapters, ChapterIndex):
+            self.chapters.close()
 
     def __repr__(self):
-        return f"NovelParser(chapters={len(self.chapters)}, file={self.file_path})"
+        chapters = 'stream' if self.stream else len(self.chapters)
+        return f"NovelParser(chapters={chapters}, file={self.file_path})"
 
 
 if __name__ == "__main__":
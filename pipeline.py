@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+流水线发布
+读取解码 → 校验 → 生成提交数据 → 浏览器发布，四个阶段由有界队列连接、同时运行：
+浏览器发布当前章节时，后面的章节已经准备好，浏览器空出来即可开始下一章；
+队列满时上游阶段暂停等待，内存中只保留少量章节的正文
+"""
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# 相邻两个阶段之间的队列长度
+DEFAULT_QUEUE_SIZE = 4
+
+# 队列结束标记
+_DONE = object()
+
+
+def validate_chapter(chapter: Dict[str, str]):
+    """
+    校验章节（只检查，不修改标题和正文，与不使用流水线时发布的内容一致）
+
+    Args:
+        chapter: {'title': '', 'content': ''}
+
+    Raises:
+        ValueError: 标题或正文为空
+    """
+    if not (chapter.get('title') or '').strip():
+        raise ValueError("标题为空")
+    if not (chapter.get('content') or '').strip():
+        raise ValueError("正文为空")
+
+
+class PublishPipeline:
+    """
+    章节准备与浏览器发布并行的流水线
+
+    前三个阶段在事件循环中运行（读取在单独的线程中进行），
+    浏览器阶段在另一个线程中调用发布函数，从流水线逐章取出已准备好的章节
+    """
+
+    def __init__(self, publish: Callable[[Iterable[Dict]], Dict[str, list]],
+                 build_payload: Callable[[Dict[str, str], Optional[datetime]], Dict],
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 schedule: Optional[Iterator[datetime]] = None):
+        """
+        Args:
+            publish: 浏览器发布阶段，接收提交数据的迭代器并返回发布结果
+                     （如 publisher.publish_batch）
+            build_payload: 由章节和发布时间生成提交数据（如 publisher.chapter_payload）
+            queue_size: 相邻两个阶段之间的队列长度
+            schedule: 定时发布时间（与 publish_batch_scheduled 使用的时间表相同），
+                      校验之前按原始顺序为每章分配，校验未通过的章节空出它的时间
+        """
+        self.publish = publish
+        self.build_payload = build_payload
+        self.queue_size = max(queue_size, 1)
+        self.schedule = schedule
+        self.invalid: List[str] = []
+        self.stats = {'read': 0, 'ready': 0, 'browser_wait': 0.0}
+        self._stop = threading.Event()
+        self._error = None
+        self._loop = None
+        self._ready = None
+
+    def run(self, chapters: Iterable[Dict[str, str]]) -> Dict[str, list]:
+        """
+        运行流水线，直到全部章节发布完成
+
+        Args:
+            chapters: 章节集合（可以是流式迭代器或懒加载的章节序列）
+
+        Returns:
+            发布结果，校验未通过的章节计入 skipped（没有提交，不算发布失败）
+        """
+        result = asyncio.run(self._run(iter(chapters)))
+        result['skipped'].extend(self.invalid)
+        self.print_summary()
+        return result
+
+    async def _run(self, chapters: Iterator[Dict[str, str]]) -> Dict[str, list]:
+        self._loop = asyncio.get_running_loop()
+        raw = asyncio.Queue(self.queue_size)
+        prepared = asyncio.Queue(self.queue_size)
+        self._ready = asyncio.Queue(self.queue_size)
+
+        stages = [
+            asyncio.create_task(self._read(chapters, raw)),
+            asyncio.create_task(self._transform(raw, prepared, self._prepare)),
+            asyncio.create_task(self._transform(prepared, self._ready, self._payload)),
+        ]
+        browser_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser')
+        browser = browser_thread.submit(self.publish, self._feed())
+        try:
+            return await asyncio.wrap_future(browser)
+        except asyncio.CancelledError:
+            # Ctrl+C：不再取新章节，等浏览器完成当前章节后停止
+            print("\n⚠ 已中断，当前章节完成后停止")
+            self._stop.set()
+            self._wake_browser()
+            await asyncio.wrap_future(browser)
+            raise KeyboardInterrupt
+        finally:
+            # 再次 Ctrl+C 时浏览器线程可能还在等待队列：先让它不再取章节，
+            # 且不在事件循环中等待它结束（它取章节需要事件循环，等待会互相卡住）
+            self._stop.set()
+            self._wake_browser()
+            browser_thread.shutdown(wait=False)
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def _read(self, chapters: Iterator[Dict[str, str]], output: asyncio.Queue):
+        """读取阶段：在线程中逐章读取（流式模式读文件，懒加载模式解码正文）"""
+        try:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix='reader') as reader:
+                while True:
+                    chapter = await self._loop.run_in_executor(reader, next, chapters, _DONE)
+                    if chapter is _DONE:
+                        break
+                    self.stats['read'] += 1
+                    await output.put((self.stats['read'], chapter))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 读取失败时发布完已读到的章节，再在浏览器阶段抛出
+            self._error = self._error or e
+        await output.put(_DONE)
+
+    async def _transform(self, source: asyncio.Queue, output: asyncio.Queue, step: Callable):
+        """中间阶段：逐项处理后放入下一个队列，step 返回 None 时丢弃该项"""
+        try:
+            while True:
+                item = await source.get()
+                if item is _DONE:
+                    break
+                item = step(item)
+                if item is not None:
+                    await output.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 处理失败时同读取失败：发布完已准备好的章节，再在浏览器阶段抛出
+            self._error = self._error or e
+        await output.put(_DONE)
+
+    def _prepare(self, item):
+        """校验阶段：标题或正文为空的章节不进入浏览器阶段"""
+        number, chapter = item
+        # 先分配发布时间再校验，跳过的章节不会让后面的章节提前
+        publish_time = next(self.schedule) if self.schedule else None
+        try:
+            validate_chapter(chapter)
+            return chapter, publish_time
+        except ValueError as e:
+            title = chapter.get('title') or f"第 {number} 项"
+            if publish_time:
+                print(f"⚠ 章节《{title}》{e}，跳过（{publish_time.strftime('%Y-%m-%d %H:%M')} 空出）")
+            else:
+                print(f"⚠ 章节《{title}》{e}，跳过")
+            self.invalid.append(title)
+            return None
+
+    def _payload(self, item) -> Dict:
+        """
+        生成提交数据：标题、正文、发布日志标识和发布脚本使用的定时字段，
+        浏览器阶段直接使用，不再逐章计算
+        """
+        chapter, publish_time = item
+        payload = self.build_payload(chapter, publish_time)
+        self.stats['ready'] += 1
+        return payload
+
+    def _feed(self) -> Iterator[Dict]:
+        """浏览器线程从流水线逐章取出已准备好的章节"""
+        while True:
+            if self._stop.is_set():
+                raise KeyboardInterrupt
+
+            start = time.perf_counter()
+            item = asyncio.run_coroutine_threadsafe(self._ready.get(), self._loop).result()
+            self.stats['browser_wait'] += time.perf_counter() - start
+
+            if self._stop.is_set():
+                raise KeyboardInterrupt
+            if item is _DONE:
+                if self._error:
+                    raise self._error
+                return
+            yield item
+
+    def _wake_browser(self):
+        """让等待章节的浏览器线程立即返回"""
+        try:
+            self._ready.put_nowait(_DONE)
+        except asyncio.QueueFull:
+            pass
+
+    def print_summary(self):
+        """打印流水线统计"""
+        line = f"流水线: 准备 {self.stats['ready']} 章，浏览器等待章节共 {self.stats['browser_wait']:.1f} s"
+        if self.invalid:
+            line += f"，校验未通过跳过 {len(self.invalid)} 章"
+        print(line)
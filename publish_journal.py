@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+发布日志
+每章发布前后把状态追加写入 JSONL 文件（每条记录写完立即落盘），
+浏览器崩溃或按 Ctrl+C 中断后重新运行时，从日志中跳过已经发布的章节，避免重复发布
+
+章节状态：
+    pending    开始处理
+    filled     标题和正文已填写
+    submitted  已点击发布，尚未确认
+    confirmed  发布成功
+    failed     发布失败（重新运行时会再次尝试）
+"""
+import os
+import json
+import signal
+import hashlib
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+# 日志目录（不放在 .fanqie_cache/ 中，清理缓存不会丢失发布进度）
+JOURNAL_DIR = './publish_journal'
+
+STATES = ('pending', 'filled', 'submitted', 'confirmed', 'failed')
+
+# 重新运行时跳过的状态：submitted 可能已经发布成功，重发会产生重复章节，需要人工核对
+SKIP_STATES = ('confirmed', 'submitted')
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M'
+
+
+def chapter_key(title: str, content: str) -> str:
+    """章节标识（标题 + 正文的哈希，内容修改后视为新章节）"""
+    return hashlib.sha1(f"{title}\n{content}".encode('utf-8')).hexdigest()[:20]
+
+
+def journal_path(book: str, journal_dir: str = JOURNAL_DIR) -> Path:
+    """书对应的日志文件"""
+    return Path(journal_dir) / (hashlib.sha1(book.encode('utf-8')).hexdigest()[:16] + '.jsonl')
+
+
+class PublishJournal:
+    """
+    一本书的发布日志
+
+    作为上下文管理器使用时，在主线程中拦截 Ctrl+C：先把日志落盘再中断
+    """
+
+    def __init__(self, book: str, journal_dir: Optional[str] = JOURNAL_DIR):
+        """
+        Args:
+            book: 书的标识（书本 ID 或发布页面地址）
+            journal_dir: 日志目录（None 表示只在内存中记录，不能断点续传）
+        """
+        self.book = book
+        self.path = journal_path(book, journal_dir) if journal_dir else None
+        # 每章最新的记录 {章节标识: {'state', 'title', 'scheduled', ...}}
+        self.entries: Dict[str, Dict] = {}
+        self._file = None
+        # 可重入：Ctrl+C 可能在写入记录的过程中触发 flush
+        self._lock = threading.RLock()
+        self._previous_handler = None
+        self._load()
+
+    def _load(self):
+        """读取已有日志（崩溃时写了一半的最后一行会被忽略）"""
+        if not self.path or not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(record, dict) or 'key' not in record:
+                    continue
+                self.entries.setdefault(record['key'], {}).update(record)
+
+    def _open(self):
+        if self._file is None and self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if self._file.tell() and not self._ends_with_newline():
+                # 上次崩溃时最后一行只写了一半，另起一行，避免新记录接在后面
+                self._file.write('\n')
+        return self._file
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def record(self, key: str, state: str, title: str = None,
+               scheduled: Optional[datetime] = None, error: str = None):
+        """
+        记录章节状态并立即落盘
+
+        Args:
+            key: 章节标识（chapter_key）
+            state: 状态（见 STATES）
+            title: 章节标题
+            scheduled: 定时发布时间
+            error: 失败原因
+        """
+        if state not in STATES:
+            raise ValueError(f"未知的章节状态: {state}")
+
+        record = {'key': key, 'state': state, 'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        if title is not None:
+            record['title'] = title
+        if scheduled is not None:
+            record['scheduled'] = scheduled.strftime(_TIME_FORMAT)
+        if error is not None:
+            record['error'] = error
+
+        with self._lock:
+            self.entries.setdefault(key, {}).update(record)
+            stream = self._open()
+            if stream:
+                stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self._sync(stream)
+
+    @staticmethod
+    def _sync(stream):
+        stream.flush()
+        os.fsync(stream.fileno())
+
+    def state(self, key: str) -> Optional[str]:
+        """章节的最新状态，没有记录时返回 None"""
+        return self.entries.get(key, {}).get('state')
+
+    def should_skip(self, key: str) -> bool:
+        """重新运行时是否跳过该章节"""
+        return self.state(key) in SKIP_STATES
+
+    def scheduled_time(self, key: str) -> Optional[datetime]:
+        """上次为该章节安排的定时发布时间"""
+        value = self.entries.get(key, {}).get('scheduled')
+        return datetime.strptime(value, _TIME_FORMAT) if value else None
+
+    def counts(self) -> Counter:
+        """各状态的章节数"""
+        return Counter(entry['state'] for entry in self.entries.values())
+
+    def flush(self):
+        """把已写入的记录落盘"""
+        with self._lock:
+            if self._file:
+                self._sync(self._file)
+
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if self._file:
+                self._sync(self._file)
+                self._file.close()
+                self._file = None
+
+    def _on_sigint(self, signum, frame):
+        self.flush()
+        print("\n⚠ 已中断，发布进度已保存，重新运行将从中断处继续")
+        raise KeyboardInterrupt
+
+    def __enter__(self) -> 'PublishJournal':
+        # 信号处理只能在主线程中设置（多书并行发布时在工作线程中运行）
+        if threading.current_thread() is threading.main_thread():
+            self._previous_handler = signal.signal(signal.SIGINT, self._on_sigint)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGINT, self._previous_handler)
+            self._previous_handler = None
+        self.close()
@@ -4,32 +4,275 @@
 使用 Selenium 自动化发布章节到番茄小说
 支持定时发布功能
 """
+import os
 import time
 import json
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+
+from waits import WaitEngine, EDITOR_XPATH, SUBMIT_TOAST_XPATH
+from selector_cache import SelectorResolver, SELECTOR_CACHE_FILE
+import driver_cache
+import lean_mode
+from schedule_plan import generate_schedule, iter_schedule
+from publish_journal import PublishJournal, JOURNAL_DIR, chapter_key
+from rate_limiter import AdaptiveRateLimiter
+from metrics import PublishMetrics, METRICS_DIR
+from retry_queue import (RetryQueue, classify_error, ERROR_NAMES, RETRYABLE, REJECTED, THROTTLED,
+                         TRANSIENT, UNCONFIRMED, UNKNOWN)
+
+# 页面元素定位（逐步发布和脚本宏共用）
+_TITLE_XPATH = '//input[@placeholder="请输入章节标题" or @type="text"]'
+_PUBLISH_BUTTON_XPATH = '//button[contains(text(),"发布") or contains(text(),"提交")]'
+
+# 需要依次尝试的候选定位器（SelectorResolver 会把上次命中的排在最前）
+# 与 XPath 等价时优先用 CSS 选择器，浏览器原生匹配更快
+_SCHEDULE_LOCATORS = [
+    (By.XPATH, '//label[contains(text(),"定时发布")]'),
+    (By.XPATH, '//span[contains(text(),"定时发布")]'),
+    (By.XPATH, '//div[contains(text(),"定时发布")]'),
+    (By.CSS_SELECTOR, 'input[value="scheduled"]'),
+    (By.XPATH, '//button[contains(text(),"定时发布")]'),
+]
+_DATE_INPUT_LOCATORS = [(By.CSS_SELECTOR, 'input[type="date"], input[placeholder*="日期"]')]
+_TIME_INPUT_LOCATORS = [(By.CSS_SELECTOR, 'input[type="time"], input[placeholder*="时间"]')]
+_NOVEL_SELECTOR_LOCATORS = [
+    (By.CSS_SELECTOR, 'div[class*="novel-selector"]'),
+    (By.CSS_SELECTOR, 'select[class*="novel"]'),
+    (By.CSS_SELECTOR, 'div[role="combobox"]'),
+    (By.XPATH, '//button[contains(text(), "选择作品")]'),
+    (By.CSS_SELECTOR, 'div[class*="book"]'),
+]
+
+# 写入正文的页面函数：
+# textarea 通过原生 setter 赋值，绕过 React/Vue 对 value 属性的拦截；
+# contenteditable 按段落生成 <p>，空行不生成段落。
+# 写入后派发 input/change 事件，让页面框架同步内部状态。
+# 返回编辑器中实际的文本，供调用方校验是否写入成功
+_FILL_EDITOR_JS = """
+const fillEditor = (element, content) => {
+    element.focus();
+
+    if (element.tagName === 'TEXTAREA') {
+        const setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+        setter.call(element, content);
+    } else {
+        const fragment = document.createDocumentFragment();
+        for (const line of content.split('\\n')) {
+            if (!line.trim()) continue;
+            const paragraph = document.createElement('p');
+            paragraph.textContent = line;
+            fragment.appendChild(paragraph);
+        }
+        element.replaceChildren(fragment);
+    }
+
+    element.dispatchEvent(new InputEvent('input', {bubbles: true, inputType: 'insertFromPaste'}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+    element.blur();
+
+    return element.tagName === 'TEXTAREA' ? element.value : element.innerText;
+};
+"""
+
+# 一次脚本调用写入章节正文
+_FILL_CONTENT_JS = _FILL_EDITOR_JS + """
+return fillEditor(arguments[0], arguments[1]);
+"""
+
+# 单章发布宏（execute_async_script）：
+# 在页面内完成查找输入框、填写标题正文、设置定时、提交、等待提示，
+# 整章只需一次 WebDriver 往返。结果通过回调返回：
+# {ok, step, submitted, confirmed, scheduled, matched, error, elapsed_ms}
+_PUBLISH_MACRO_JS = _FILL_EDITOR_JS + """
+const [title, content, schedule, selectors, timeouts] = arguments;
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+const result = {ok: false, step: 'start', submitted: false, confirmed: false,
+                scheduled: false, error: null, elapsed_ms: 0};
+
+// 每个元素的候选定位器为 [[by, 表达式], ...]，记录命中的定位器供 SelectorResolver 学习
+result.matched = {};
+const query = ([by, expression]) => {
+    if (by === 'css selector') return Array.from(document.querySelectorAll(expression));
+    const nodes = document.evaluate(expression, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    return Array.from({length: nodes.snapshotLength}, (_, i) => nodes.snapshotItem(i));
+};
+const find = (name, visibleOnly) => {
+    for (const locator of selectors[name]) {
+        const node = query(locator).find((node) => !visibleOnly || node.offsetParent !== null);
+        if (node) {
+            result.matched[name] = locator;
+            return node;
+        }
+    }
+    return null;
+};
+const waitFor = (probe, ms) => new Promise((resolve) => {
+    const deadline = performance.now() + ms;
+    const tick = () => {
+        const value = probe();
+        if (value || performance.now() >= deadline) resolve(value || null);
+        else setTimeout(tick, 100);
+    };
+    tick();
+});
+const setValue = (element, value) => {
+    const prototype = element.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, value);
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+};
+const squash = (text) => (text || '').replace(/\\s+/g, '');
+
+(async () => {
+    result.step = 'editor';
+    const editor = await waitFor(() => find('editor', true), timeouts.editor);
+    const titleInput = find('title', true);
+    if (!editor || !titleInput) throw new Error('未找到标题或正文输入框');
+
+    result.step = 'fill';
+    setValue(titleInput, title);
+    if (squash(fillEditor(editor, content)) !== squash(content)) throw new Error('正文写入后内容不一致');
+
+    if (schedule) {
+        result.step = 'schedule';
+        const option = find('schedule_toggle', false);
+        if (option) {
+            option.click();
+            const dateInput = await waitFor(() => find('date_input', true), timeouts.element);
+            const timeInput = find('time_input', true);
+            if (dateInput) setValue(dateInput, schedule.date);
+            if (timeInput) setValue(timeInput, schedule.time);
+            result.scheduled = true;
+        }
+    }
+
+    result.step = 'submit';
+    const button = find('publish', true);
+    if (!button) throw new Error('未找到发布按钮');
+    button.click();
+    result.submitted = true;
+
+    result.step = 'confirm';
+    result.confirmed = Boolean(await waitFor(() => find('toast', true), timeouts.submit));
+    result.ok = true;
+})().catch((error) => {
+    result.error = String((error && error.message) || error);
+}).finally(() => {
+    result.elapsed_ms = Math.round(performance.now() - started);
+    done(result);
+});
+"""
+
+# 检查编辑页是否还能继续使用：编辑器和标题框都在，且没有跳转到其他页面
+# 返回 null 表示可用，否则返回不可用的原因
+_EDITOR_USABLE_JS = """
+const publishUrl = arguments[0];
+if (document.readyState !== 'complete') return 'loading';
+if (!location.href.startsWith(publishUrl.split('?')[0])) return 'navigated: ' + location.href;
+const editor = document.querySelector('textarea[placeholder="请输入章节内容"], div[contenteditable="true"]');
+if (!editor || !editor.isConnected || editor.offsetParent === null) return 'editor missing';
+if (editor.tagName === 'TEXTAREA' && editor.disabled) return 'editor disabled';
+const title = document.querySelector('input[placeholder="请输入章节标题"], input[type="text"]');
+if (!title || title.disabled) return 'title input missing';
+return null;
+"""
+
+# 清空标题和正文，派发 input 事件让页面框架同步状态
+_RESET_FORM_JS = """
+const setter = (prototype) => Object.getOwnPropertyDescriptor(prototype, 'value').set;
+const clear = (element) => {
+    if (!element) return;
+    if (element.tagName === 'TEXTAREA') setter(HTMLTextAreaElement.prototype).call(element, '');
+    else if (element.tagName === 'INPUT') setter(HTMLInputElement.prototype).call(element, '');
+    else element.replaceChildren();
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+};
+clear(document.querySelector('input[placeholder="请输入章节标题"], input[type="text"]'));
+clear(document.querySelector('textarea[placeholder="请输入章节内容"], div[contenteditable="true"]'));
+"""
+
+# 页面内“新建章节”入口
+_NEW_CHAPTER_XPATHS = [
+    '//button[contains(text(),"新建章节")]',
+    '//a[contains(text(),"新建章节")]',
+    '//*[@role="button"][contains(.,"新建章节")]',
+    '//button[contains(text(),"继续创作") or contains(text(),"继续写")]',
+]
+
+# 提交后检查页面信号：新出现的 429 请求（Resource Timing 的 responseStatus）、验证码、
+# “操作频繁”类限流提示，以及标题为空、字数不符等内容校验错误
+_SUBMIT_PROBE_JS = """
+if (!window.__fanqieProbeInit) {
+    performance.setResourceTimingBufferSize(5000);
+    window.__fanqieProbeInit = true;
+}
+const entries = performance.getEntriesByType('resource');
+let start = window.__fanqieStatusSeen || 0;
+if (start > entries.length) start = 0;
+window.__fanqieStatusSeen = entries.length;
+let status429 = 0;
+for (let i = start; i < entries.length; i++) {
+    if (entries[i].responseStatus === 429) status429++;
+}
+const visible = el => el.offsetParent !== null || el.getClientRects().length > 0;
+const captcha = [...document.querySelectorAll(
+    '[id*="captcha"], [class*="captcha"], iframe[src*="captcha"], iframe[src*="verify"]'
+)].some(visible);
+const messages = [...document.querySelectorAll(
+    '[class*="toast"], [class*="message"], [class*="notice"], [class*="error"], [class*="explain"]'
+)].filter(visible).map(el => el.innerText.trim()).filter(Boolean);
+const toast = messages.find(text => /频繁|过快|太快|稍后再试|操作过多|请求过多|限流/.test(text));
+const rejected = messages.find(text => /不能为空|不少于|不能少于|不能超过|字数|敏感|违规|重复|不合法|请填写/.test(text));
+return {status_429: status429, captcha: captcha, toast: toast || null, rejected: rejected || null};
+"""
+
+
+def _schedule_fields(scheduled_time: Optional[datetime]) -> Optional[Dict[str, str]]:
+    """定时发布时间转换为发布脚本使用的 {'date', 'time'}，立即发布时返回 None"""
+    if not scheduled_time:
+        return None
+    return {
+        'date': scheduled_time.strftime('%Y-%m-%d'),
+        'time': scheduled_time.strftime('%H:%M'),
+    }
 
 
 class TomatoNovelPublisher:
     """番茄小说自动发布器"""
 
-    def __init__(self, config_file: str = "config.json"):
+    def __init__(self, config_file: str = "config.json", profile_dir: str = None):
         """
         初始化发布器
 
         Args:
             config_file: 配置文件路径
+            profile_dir: Chrome 用户数据目录（默认 ./chrome_profile）；
+                         多个浏览器同时运行时各自需要独立的目录
         """
+        self.config_file = config_file
         self.config = self._load_config(config_file)
+        self.profile_dir = profile_dir or self.config.get('profile_dir', './chrome_profile')
         self.driver = None
         self.wait = None
+        self.waits = None  # 条件等待（见 waits.py）
+        self.selectors = None  # 页面元素定位缓存（见 selector_cache.py）
+        self._editor_loaded = False  # 编辑页是否已打开，可以复用
+        self.page_stats = {'reloads': 0, 'reuses': 0}  # 编辑页整页加载 / 复用次数
+        self.lean = self.config.get('lean_mode', False)  # 精简模式（见 lean_mode.py）
+        self.page_loads = None  # 整页加载耗时和传输量
+        self.rate_limiter = AdaptiveRateLimiter.from_config(self.config.get('rate_limit'))  # 提交限速
+        self.last_error = None  # 上一章失败的错误类型（见 retry_queue.py）
+        # 各发布步骤的耗时（见 metrics.py）
+        self.metrics = PublishMetrics(METRICS_DIR if self.config.get('metrics', False) else None)
         self.novels = []  # 书本列表
         self.selected_novel = None  # 选中的书本
 
@@ -50,6 +293,17 @@ class TomatoNovelPublisher:
             "headless": False,  # 是否无头模式（True时不显示浏览器）
             "chapters_per_day": 2,  # 每天发布章节数
             "publish_times": ["08:00", "20:00"],  # 发布时间
+            "fast_input": True,  # 用脚本一次性写入正文（失败时自动改为逐字输入）
+            "chapter_interval": 0,  # 两章之间至少间隔的秒数（上一章提交完成后才会继续）
+            "reuse_editor": False,  # 会话模式：连续发布时复用编辑页，不再每章重新加载
+            "macro_publish": False,  # 每章用一次页面脚本完成填写和提交（失败时改为逐步操作）
+            "use_daemon": False,  # 连接常驻的后台浏览器，不必每次冷启动 Chrome
+            "lean_mode": False,  # 不加载图片、字体和统计脚本，加快页面加载
+            "journal": True,  # 记录发布进度，中断后重新运行时跳过已发布的章节
+            "rate_limit": {"rate": 12, "burst": 3, "max_rate": 30},  # 提交速度（章/分钟），限流时自动降速
+            "retry": {"max_attempts": 3, "base_delay": 30, "max_delay": 600},  # 失败章节的重试次数和退避延迟（秒）
+            "pipeline": False,  # 章节的读取、校验和准备与浏览器发布并行进行
+            "metrics": False,  # 把各发布步骤的耗时写入 publish_metrics/（跟踪记录和 Prometheus 指标）
             "account": {
                 "phone": "",  # 手机号
                 "auto_login": True  # 是否自动登录（需要手动扫码一次）
@@ -63,67 +317,66 @@ class TomatoNovelPublisher:
         print("请修改配置文件中的参数后重新运行")
         return default_config
 
-    def init_browser(self):
-        """初始化浏览器"""
-        import os
-
-        chrome_options = Options()
-
-        if self.config.get('headless', False):
-            chrome_options.add_argument('--headless')
-
-        # 设置用户数据目录，保持登录状态
-        # 注意：如果遇到启动问题，可以尝试删除 chrome_profile 目录
-        chrome_options.add_argument('--user-data-dir=./chrome_profile')
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-
-        # 禁用自动化标识
-        chrome_options.add_argument('--disable-infobars')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
+    def init_browser(self, use_daemon: bool = None, lean: bool = None):
+        """
+        初始化浏览器
 
-        # 尝试多种方式启动浏览器
+        Args:
+            use_daemon: 是否连接后台浏览器（见 browser_daemon.py），默认读取配置 use_daemon；
+                        后台浏览器未运行时会自动启动
+            lean: 精简模式（见 lean_mode.py），默认读取配置 lean_mode；
+                  连接后台浏览器时由后台浏览器的配置决定
+        """
+        if lean is not None:
+            self.lean = lean
+        if use_daemon is None:
+            use_daemon = self.config.get('use_daemon', False)
+        if use_daemon and self._attach_daemon():
+            return
+
+        timer = driver_cache.StartupTimer()
+        with timer.stage("准备参数"):
+            chrome_options = self._chrome_options()
+
+        print("正在启动浏览器...")
         success = False
         last_error = None
 
-        # 方式 1: 使用本地 chromedriver.exe（最可靠）
-        try:
-            print("正在启动浏览器...")
-            chromedriver_path = os.path.join(os.getcwd(), "chromedriver.exe")
-            if os.path.exists(chromedriver_path):
-                print(f"使用本地 ChromeDriver: {chromedriver_path}")
-                service = Service(executable_path=chromedriver_path)
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                success = True
-            else:
-                raise FileNotFoundError("chromedriver.exe not found")
-        except Exception as e:
-            last_error = e
-            print(f"方式 1 失败: {e}")
-
-        # 方式 2: 直接使用（需要 chromedriver 在 PATH 中）
-        if not success:
+        # 优先使用上次成功的启动方式（驱动和 Chrome 都没有变化时）
+        with timer.stage("检查驱动缓存"):
+            cached = driver_cache.load_state()
+        if cached:
             try:
-                print("尝试使用系统 ChromeDriver...")
-                self.driver = webdriver.Chrome(options=chrome_options)
+                with timer.stage(f"启动（缓存: {cached['method']}）"):
+                    self._launch_chrome(cached['method'], chrome_options, cached['driver_path'])
                 success = True
             except Exception as e:
                 last_error = e
-                print(f"方式 2 失败: {e}")
+                print(f"⚠ 缓存的启动方式不可用，重新查找驱动: {e}")
+                driver_cache.clear_state()
 
-        # 方式 3: 尝试使用 webdriver-manager（最后的选择）
-        if not success:
+        # 尝试多种方式启动浏览器
+        # 方式 1: 使用项目目录中的 chromedriver（最可靠）
+        # 方式 2: 直接使用（需要 chromedriver 在 PATH 中）
+        # 方式 3: 尝试使用 webdriver-manager（最后的选择，可能需要联网下载）
+        methods = [
+            ('local', None),
+            ('system', "尝试使用系统 ChromeDriver..."),
+            ('manager', "尝试使用 webdriver-manager..."),
+        ]
+        for number, (method, message) in enumerate(methods, 1):
+            if success:
+                break
             try:
-                print("尝试使用 webdriver-manager...")
-                from webdriver_manager.chrome import ChromeDriverManager
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
+                with timer.stage(f"方式 {number}（{method}）"):
+                    if message:
+                        print(message)
+                    driver_path = self._launch_chrome(method, chrome_options)
                 success = True
+                driver_cache.save_state(method, driver_path)
             except Exception as e:
                 last_error = e
-                print(f"方式 3 失败: {e}")
+                print(f"方式 {number} 失败: {e}")
 
         if not success:
             print("\n" + "=" * 50)
@@ -144,8 +397,107 @@ class TomatoNovelPublisher:
             print("=" * 50)
             raise Exception(f"无法启动浏览器: {last_error}")
 
-        self.wait = WebDriverWait(self.driver, 30)
+        self._setup_driver()
         print("浏览器已启动")
+        print(timer.summary())
+
+    def _chrome_options(self) -> Options:
+        """浏览器启动参数"""
+        chrome_options = Options()
+
+        if self.config.get('headless', False):
+            chrome_options.add_argument('--headless')
+
+        # 设置用户数据目录，保持登录状态
+        # 注意：如果遇到启动问题，可以尝试删除 chrome_profile 目录
+        chrome_options.add_argument(f'--user-data-dir={self.profile_dir}')
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+
+        # 禁用自动化标识
+        chrome_options.add_argument('--disable-infobars')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+
+        if self.lean:
+            lean_mode.apply_options(chrome_options)
+
+        return chrome_options
+
+    def _launch_chrome(self, method: str, chrome_options: Options, driver_path: str = None) -> Optional[str]:
+        """
+        按指定方式启动浏览器
+
+        Args:
+            method: local（项目目录中的驱动）/ system（PATH 中的驱动）/ manager（webdriver-manager）
+            chrome_options: 启动参数
+            driver_path: 已知的驱动路径（来自缓存），跳过查找
+
+        Returns:
+            实际使用的驱动路径（无法确定时为 None）
+        """
+        if method == 'local':
+            driver_path = driver_path or driver_cache.local_driver_path()
+            if not os.path.exists(driver_path):
+                raise FileNotFoundError(f"{driver_cache.LOCAL_DRIVER_NAME} not found")
+            print(f"使用本地 ChromeDriver: {driver_path}")
+        elif method == 'manager' and not driver_path:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+
+        if driver_path:
+            service = Service(executable_path=driver_path)
+            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        else:
+            self.driver = webdriver.Chrome(options=chrome_options)
+
+        # 记录驱动的实际位置，下次可以直接使用
+        service = getattr(self.driver, 'service', None)
+        return getattr(service, 'path', None) or driver_path
+
+    def _setup_driver(self):
+        """浏览器就绪后初始化等待和定位工具"""
+        self.wait = WebDriverWait(self.driver, 30)
+        self.waits = WaitEngine(self.driver, self.config.get('wait_timeouts'))
+        self.selectors = SelectorResolver(self.driver, self.config.get('selector_cache', SELECTOR_CACHE_FILE))
+        self.page_loads = lean_mode.PageLoadStats('lean' if self.lean else 'normal')
+
+        # 屏蔽规则对之后打开的页面生效；后台浏览器的会话由守护进程自己设置
+        if self.lean:
+            patterns = lean_mode.DEFAULT_BLOCKED_URLS + self.config.get('blocked_urls', [])
+            if lean_mode.block_urls(self.driver, patterns):
+                print(f"✓ 精简模式：屏蔽 {len(patterns)} 条请求规则，不加载图片")
+
+    def _attach_daemon(self) -> bool:
+        """
+        连接后台浏览器，未运行时先启动
+
+        Returns:
+            是否连接成功（失败时由调用方自行启动浏览器）
+        """
+        import browser_daemon
+
+        try:
+            driver = browser_daemon.attach()
+            if driver is None:
+                print("正在启动后台浏览器...")
+                # 后台浏览器使用同一个配置文件（登录目录等与当前发布器一致）
+                idle_timeout = self.config.get('daemon_idle_timeout', browser_daemon.IDLE_TIMEOUT)
+                if browser_daemon.start_daemon(self.config_file, idle_timeout):
+                    driver = browser_daemon.attach()
+        except RuntimeError as e:
+            print(f"⚠ {e}")
+            raise
+
+        if driver is None:
+            print("⚠ 无法连接后台浏览器，直接启动浏览器")
+            return False
+
+        self.driver = driver
+        self._setup_driver()
+        print("✓ 已连接后台浏览器")
+        return True
 
     def login(self):
         """
@@ -180,7 +532,8 @@ class TomatoNovelPublisher:
         try:
             # 导航到作家主页或作品管理页面
             self.driver.get("https://fanqienovel.com/page/WriteNovel")
-            time.sleep(3)
+            self.waits.page_ready()
+            self.waits.network_idle()
 
             novels = []
 
@@ -188,23 +541,7 @@ class TomatoNovelPublisher:
             # 方式1: 从发布页面获取书本选择器
             try:
                 # 查找书本选择元素（可能是下拉框、按钮列表等）
-                novel_selectors = [
-                    '//div[contains(@class, "novel-selector")]',
-                    '//select[contains(@class, "novel")]',
-                    '//div[@role="combobox"]',
-                    '//button[contains(text(), "选择作品")]',
-                    '//div[contains(@class, "book")]',
-                ]
-
-                novel_elements = []
-                for selector in novel_selectors:
-                    try:
-                        elements = self.driver.find_elements(By.XPATH, selector)
-                        if elements:
-                            novel_elements = elements
-                            break
-                    except:
-                        continue
+                novel_elements = self.selectors.find_all('novel_selector', _NOVEL_SELECTOR_LOCATORS)
 
                 # 如果找到了书本元素，解析书本信息
                 if novel_elements:
@@ -305,7 +642,7 @@ class TomatoNovelPublisher:
                 self.init_browser()
 
             self.driver.get(self.config['publish_url'])
-            time.sleep(2)
+            self.waits.page_ready()
 
             input("\n在浏览器中手动选择书本后，输入 'ok' 继续: ")
             return True
@@ -332,7 +669,7 @@ class TomatoNovelPublisher:
                 if 'element' in self.selected_novel:
                     try:
                         self.selected_novel['element'].click()
-                        time.sleep(1)
+                        self.waits.network_idle()
                     except:
                         pass
 
@@ -345,7 +682,9 @@ class TomatoNovelPublisher:
             print("✗ 输入无效")
             return False
 
-    def publish_chapter(self, title: str, content: str, scheduled_time: Optional[datetime] = None) -> bool:
+    def publish_chapter(self, title: str, content: str, scheduled_time: Optional[datetime] = None,
+                        progress: Callable[[str], None] = None,
+                        schedule: Optional[Dict[str, str]] = None) -> bool:
         """
         发布单个章节（支持立即发布或定时发布）
 
@@ -353,6 +692,8 @@ class TomatoNovelPublisher:
             title: 章节标题
             content: 章节内容
             scheduled_time: 定时发布时间（None表示立即发布）
+            progress: 进度回调，填写完成时传入 'filled'，点击发布后传入 'submitted'
+            schedule: 已由 chapter_payload 生成的定时字段（不传时按 scheduled_time 生成）
 
         Returns:
             是否发布成功
@@ -360,58 +701,318 @@ class TomatoNovelPublisher:
         if not self.driver:
             self.init_browser()
 
+        # 按当前允许的速度提交（检测到限流时自动降速）
+        with self.metrics.span('rate_limit'):
+            self.rate_limiter.acquire()
+        self.last_error = None
+
+        with self.metrics.span('chapter') as span:
+            success = self._publish_chapter_steps(title, content, scheduled_time, progress, schedule)
+            span['outcome'] = 'ok' if success else (self.last_error or UNKNOWN)
+        return success
+
+    def _publish_chapter_steps(self, title: str, content: str, scheduled_time: Optional[datetime],
+                               progress: Optional[Callable[[str], None]],
+                               schedule: Optional[Dict[str, str]] = None) -> bool:
+        """逐步完成一章的发布（参数同 publish_chapter），每个步骤的耗时记入 self.metrics"""
+        span = self.metrics.span
         try:
-            # 导航到发布页面
-            self.driver.get(self.config['publish_url'])
-            time.sleep(3)
-
-            # 等待页面加载
+            # 打开发布页面（会话模式下复用上一章的编辑页）
             # 注意：番茄小说的页面元素可能变化，需要根据实际情况调整
+            with span('navigate'):
+                content_input = self._open_editor()
+
+            if self.config.get('macro_publish', False):
+                with span('macro_publish'):
+                    outcome = self._publish_with_macro(title, content, scheduled_time, schedule)
+                if outcome and outcome['submitted']:
+                    if progress:
+                        progress('submitted')
+                    if scheduled_time and not outcome['scheduled']:
+                        print("⚠ 未找到定时发布选项，已立即发布")
+                    with span('confirm') as confirm:
+                        if not outcome['confirmed']:
+                            self.waits.network_idle()
+                        self._editor_loaded = True
+                        if not self._check_submission(title):
+                            confirm['outcome'] = self.last_error or UNKNOWN
+                            return False
+                    self._report_published(title, scheduled_time)
+                    return True
+
+                if outcome:
+                    print(f"⚠ 脚本发布在 {outcome['step']} 步骤失败（{outcome['error']}），改为逐步发布")
+                # 页面可能填了一半，重新加载后逐步发布
+                self._editor_loaded = False
+                with span('navigate'):
+                    content_input = self._open_editor()
 
             # 选择小说（如果有多个）
             # TODO: 根据实际页面元素选择小说
 
             # 输入章节标题
-            title_input = self.wait.until(
-                EC.presence_of_element_located((By.XPATH, '//input[@placeholder="请输入章节标题" or @type="text"]'))
-            )
-            title_input.clear()
-            title_input.send_keys(title)
-
-            # 输入章节内容
-            content_input = self.driver.find_element(By.XPATH,
-                                                     '//textarea[@placeholder="请输入章节内容"] | //div[@contenteditable="true"]')
-
-            if content_input.tag_name == 'textarea':
-                content_input.clear()
-                content_input.send_keys(content)
-            else:
-                # contenteditable div
-                self.driver.execute_script("arguments[0].innerText = arguments[1];", content_input, content)
-
-            time.sleep(1)
+            with span('locate_title'):
+                title_input = self.waits.until(
+                    'title_input',
+                    EC.presence_of_element_located((By.XPATH, _TITLE_XPATH))
+                )
+            with span('fill_title'):
+                title_input.clear()
+                title_input.send_keys(title)
+
+            # 输入章节内容，并等待编辑器保存草稿等请求结束
+            with span('fill_content'):
+                self._fill_content(content_input, content)
+                self.waits.network_idle('after_fill')
+            if progress:
+                progress('filled')
 
             # 如果需要定时发布
             if scheduled_time:
-                self._set_scheduled_publish(scheduled_time)
+                with span('set_schedule'):
+                    self._set_scheduled_publish(scheduled_time)
 
             # 点击发布按钮
-            publish_button = self.driver.find_element(By.XPATH, '//button[contains(text(),"发布") or contains(text(),"提交")]')
-            publish_button.click()
+            with span('click_submit'):
+                publish_button = self.driver.find_element(By.XPATH, _PUBLISH_BUTTON_XPATH)
+                publish_button.click()
+            if progress:
+                progress('submitted')
 
             # 等待发布完成
-            time.sleep(3)
-
-            if scheduled_time:
-                print(f"✓ 章节《{title}》已设置定时发布: {scheduled_time.strftime('%Y-%m-%d %H:%M')}")
-            else:
-                print(f"✓ 章节《{title}》立即发布成功")
+            with span('confirm') as confirm:
+                self.waits.submitted()
+                self._editor_loaded = True
+                if not self._check_submission(title):
+                    confirm['outcome'] = self.last_error or UNKNOWN
+                    return False
+
+            self._report_published(title, scheduled_time)
             return True
 
         except Exception as e:
+            # 页面状态未知，下一章重新加载
+            self._editor_loaded = False
             print(f"✗ 章节《{title}》发布失败: {str(e)}")
+            self.last_error = classify_error(e)
+            self._check_submission(title, failed=True)
             return False
 
+    def _check_submission(self, title: str, failed: bool = False) -> bool:
+        """
+        提交后检查限流信号和内容校验错误，并调整发布速度
+
+        Args:
+            title: 章节标题
+            failed: 本章是否已经失败
+
+        Returns:
+            本章是否可以视为发布成功
+        """
+        try:
+            signals = self.driver.execute_script(_SUBMIT_PROBE_JS) or {}
+        except Exception:
+            signals = {}
+
+        # 内容校验错误（标题为空、字数不符等）重试也不会通过，不影响发布速度
+        if signals.get('rejected'):
+            self.last_error = REJECTED
+            self._editor_loaded = False
+            print(f"✗ 章节《{title}》被平台拒绝: {signals['rejected']}")
+            return False
+
+        # 验证码和“操作频繁”提示说明提交被拒绝；只有请求返回 429 时仅降速
+        reason, rejected = None, False
+        if signals.get('captcha'):
+            reason, rejected = '出现验证码', True
+            print("⚠ 请在浏览器中完成验证，之后的章节会继续发布")
+        elif signals.get('toast'):
+            reason, rejected = f"提示“{signals['toast']}”", True
+        elif signals.get('status_429'):
+            reason = f"{signals['status_429']} 个请求返回 429"
+
+        if reason is None:
+            if not failed:
+                self.rate_limiter.healthy()
+            return not failed
+
+        self.rate_limiter.throttled(reason)
+        if rejected:
+            self.last_error = THROTTLED
+        if rejected and not failed:
+            # 页面被限流提示或验证码占据，下一章重新加载
+            self._editor_loaded = False
+            print(f"✗ 章节《{title}》提交被限流拒绝")
+        return not (failed or rejected)
+
+    @staticmethod
+    def _report_published(title: str, scheduled_time: Optional[datetime]):
+        """打印发布成功信息"""
+        if scheduled_time:
+            print(f"✓ 章节《{title}》已设置定时发布: {scheduled_time.strftime('%Y-%m-%d %H:%M')}")
+        else:
+            print(f"✓ 章节《{title}》立即发布成功")
+
+    def _publish_with_macro(self, title: str, content: str,
+                            scheduled_time: Optional[datetime] = None,
+                            schedule: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        用一次 execute_async_script 完成整章的填写和提交
+
+        Args:
+            title: 章节标题
+            content: 章节内容
+            scheduled_time: 定时发布时间（None表示立即发布）
+            schedule: 已生成的定时字段 {'date', 'time'}（不传时按 scheduled_time 生成）
+
+        Returns:
+            页面返回的结果 {ok, step, submitted, confirmed, scheduled, error, elapsed_ms}，
+            脚本本身执行失败时返回 None
+        """
+        if schedule is None:
+            schedule = _schedule_fields(scheduled_time)
+
+        # 候选定位器按 SelectorResolver 学到的顺序传给页面
+        selectors = {
+            'editor': [(By.XPATH, EDITOR_XPATH)],
+            'title': [(By.XPATH, _TITLE_XPATH)],
+            'publish': [(By.XPATH, _PUBLISH_BUTTON_XPATH)],
+            'schedule_toggle': self.selectors.ordered('schedule_toggle', _SCHEDULE_LOCATORS),
+            'date_input': _DATE_INPUT_LOCATORS,
+            'time_input': _TIME_INPUT_LOCATORS,
+            'toast': [(By.XPATH, SUBMIT_TOAST_XPATH)],
+        }
+        # 页面内的等待时间（毫秒）
+        timeouts = {name: self.waits.timeouts[name] * 1000 for name in ('editor', 'submit', 'element')}
+
+        try:
+            self.driver.set_script_timeout(sum(timeouts.values()) / 1000 + 10)
+            outcome = self.driver.execute_async_script(
+                _PUBLISH_MACRO_JS, title, content, schedule, selectors, timeouts
+            )
+        except Exception as e:
+            print(f"⚠ 脚本发布执行失败: {str(e)}")
+            return None
+
+        if outcome and 'schedule_toggle' in outcome.get('matched', {}):
+            self.selectors.record('schedule_toggle', outcome['matched']['schedule_toggle'])
+        return outcome
+
+    def _open_editor(self):
+        """
+        准备好空白的章节编辑页
+
+        会话模式（reuse_editor）下，上一章提交后优先点击页面内的“新建章节”，
+        没有该入口时直接清空表单；页面已经不可用（跳转、报错、元素消失）
+        或清空失败时，才整页重新加载
+
+        Returns:
+            正文输入框元素
+        """
+        if self.config.get('reuse_editor', False) and self._editor_loaded:
+            reason = self._editor_unusable_reason()
+            if reason is None:
+                content_input = self._reset_editor()
+                if content_input is not None:
+                    self.page_stats['reuses'] += 1
+                    return content_input
+                reason = '无法清空表单'
+            print(f"⚠ 编辑页不可复用（{reason}），重新加载")
+
+        self._editor_loaded = False
+        self.driver.get(self.config['publish_url'])
+        self.waits.page_ready()
+        self.page_loads.record(self.driver)
+        content_input = self.waits.editor()
+        self.page_stats['reloads'] += 1
+        return content_input
+
+    def _editor_unusable_reason(self) -> Optional[str]:
+        """编辑页可用时返回 None，否则返回原因"""
+        try:
+            return self.driver.execute_script(_EDITOR_USABLE_JS, self.config['publish_url'])
+        except Exception as e:
+            return str(e).splitlines()[0] if str(e) else type(e).__name__
+
+    def _reset_editor(self):
+        """
+        复用当前页面开始下一章
+
+        Returns:
+            清空后的正文输入框，失败时返回 None
+        """
+        try:
+            for selector in _NEW_CHAPTER_XPATHS:
+                buttons = [button for button in self.driver.find_elements(By.XPATH, selector)
+                           if button.is_displayed()]
+                if buttons:
+                    buttons[0].click()
+                    self.waits.network_idle('new_chapter')
+                    break
+
+            self.driver.execute_script(_RESET_FORM_JS)
+            content_input = self.waits.editor()
+            written = self.driver.execute_script(
+                "return arguments[0].tagName === 'TEXTAREA' ? arguments[0].value : arguments[0].innerText;",
+                content_input
+            )
+            return content_input if not (written or '').strip() else None
+        except Exception:
+            return None
+
+    def _pace_chapters(self):
+        """
+        两章之间的间隔：等上一章的请求全部结束，
+        再补足配置的最小间隔（chapter_interval）
+        """
+        start = time.perf_counter()
+        self.waits.network_idle('between_chapters')
+        remaining = self.config.get('chapter_interval', 0) - (time.perf_counter() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _print_page_stats(self):
+        """打印编辑页加载 / 复用次数，以及整页加载的平均耗时和传输量"""
+        stats = self.page_stats
+        if stats['reloads'] or stats['reuses']:
+            print(f"编辑页: 整页加载 {stats['reloads']} 次，复用 {stats['reuses']} 次")
+        if self.page_loads:
+            self.page_loads.print_summary()
+
+    def _fill_content(self, content_input, content: str):
+        """
+        写入章节正文
+
+        优先用一次脚本调用写入（几千字的章节逐字输入要几十秒），
+        编辑器没有接受时退回逐字输入
+
+        Args:
+            content_input: 正文输入框（textarea 或 contenteditable 元素）
+            content: 章节内容
+        """
+        if self.config.get('fast_input', True):
+            try:
+                written = self.driver.execute_script(_FILL_CONTENT_JS, content_input, content)
+                if self._content_matches(written, content):
+                    return
+                print("⚠ 快速写入未生效，改为逐字输入")
+            except Exception as e:
+                print(f"⚠ 快速写入失败，改为逐字输入: {str(e)}")
+
+        if content_input.tag_name == 'textarea':
+            content_input.clear()
+            content_input.send_keys(content)
+        else:
+            # contenteditable div
+            self.driver.execute_script("arguments[0].innerText = arguments[1];", content_input, content)
+
+    @staticmethod
+    def _content_matches(written: Optional[str], content: str) -> bool:
+        """比较编辑器中的文本与章节内容（忽略空白和空行的差异）"""
+        if written is None:
+            return False
+        return ''.join(written.split()) == ''.join(content.split())
+
     def _set_scheduled_publish(self, publish_time: datetime):
         """
         设置定时发布
@@ -423,23 +1024,8 @@ class TomatoNovelPublisher:
             # 查找并点击"定时发布"选项
             # 注意：这里需要根据番茄小说实际页面的元素进行调整
 
-            # 尝试多种可能的选择器
-            schedule_selectors = [
-                '//label[contains(text(),"定时发布")]',
-                '//span[contains(text(),"定时发布")]',
-                '//div[contains(text(),"定时发布")]',
-                '//input[@value="scheduled"]',
-                '//button[contains(text(),"定时发布")]',
-            ]
-
-            schedule_element = None
-            for selector in schedule_selectors:
-                try:
-                    schedule_element = self.driver.find_element(By.XPATH, selector)
-                    if schedule_element:
-                        break
-                except:
-                    continue
+            # 尝试多种可能的选择器（上次命中的优先）
+            schedule_element = self.selectors.find('schedule_toggle', _SCHEDULE_LOCATORS)
 
             if not schedule_element:
                 print("⚠ 未找到定时发布选项，将立即发布")
@@ -447,7 +1033,12 @@ class TomatoNovelPublisher:
 
             # 点击定时发布选项
             schedule_element.click()
-            time.sleep(1)
+            # 等待日期时间输入框出现
+            self.waits.element(
+                'schedule_inputs',
+                (By.CSS_SELECTOR, f'{_DATE_INPUT_LOCATORS[0][1]}, {_TIME_INPUT_LOCATORS[0][1]}'),
+                required=False
+            )
 
             # 设置日期和时间
             # 根据番茄小说实际的日期时间选择器进行调整
@@ -455,13 +1046,13 @@ class TomatoNovelPublisher:
             time_str = publish_time.strftime('%H:%M')
 
             # 尝试查找日期输入框
-            date_inputs = self.driver.find_elements(By.XPATH, '//input[@type="date"] | //input[contains(@placeholder,"日期")]')
+            date_inputs = self.selectors.find_all('date_input', _DATE_INPUT_LOCATORS)
             if date_inputs:
                 date_inputs[0].clear()
                 date_inputs[0].send_keys(date_str)
 
             # 尝试查找时间输入框
-            time_inputs = self.driver.find_elements(By.XPATH, '//input[@type="time"] | //input[contains(@placeholder,"时间")]')
+            time_inputs = self.selectors.find_all('time_input', _TIME_INPUT_LOCATORS)
             if time_inputs:
                 time_inputs[0].clear()
                 time_inputs[0].send_keys(time_str)
@@ -471,40 +1062,65 @@ class TomatoNovelPublisher:
         except Exception as e:
             print(f"⚠ 设置定时发布失败，将立即发布: {str(e)}")
 
-    def publish_batch(self, chapters: List[Dict[str, str]]) -> Dict[str, List[str]]:
+    def publish_batch(self, chapters: Iterable[Dict[str, str]]) -> Dict[str, List[str]]:
         """
         批量立即发布章节
 
         Args:
-            chapters: 章节列表 [{'title': '', 'content': ''}, ...]
+            chapters: 章节列表 [{'title': '', 'content': ''}, ...]，
+                      也可以是 NovelParser.iter_chapters() 返回的迭代器；
+                      章节带 key 时直接作为发布日志标识（见 pipeline.py）
 
         Returns:
-            发布结果 {'success': [titles], 'failed': [titles]}
+            发布结果 {'success': [titles], 'failed': [titles], 'unconfirmed': [titles], 'skipped': [titles]}，
+            unconfirmed 为已点击发布但未确认结果的章节（不重试，需在作家后台核对），
+            skipped 为发布日志中已经发布过、本次跳过的章节
         """
         if not self.driver:
             self.init_browser()
 
         result = {
             'success': [],
-            'failed': []
+            'failed': [],
+            'unconfirmed': [],
+            'skipped': []
         }
 
-        for i, chapter in enumerate(chapters, 1):
-            print(f"\n正在发布第 {i}/{len(chapters)} 章...")
-            success = self.publish_chapter(chapter['title'], chapter['content'])
-
-            if success:
-                result['success'].append(chapter['title'])
-            else:
-                result['failed'].append(chapter['title'])
-
-            # 避免频繁发布，等待几秒
-            if i < len(chapters):
-                time.sleep(5)
+        total = len(chapters) if hasattr(chapters, '__len__') else '?'
+
+        # 失败的章节按错误类型延后重试；立即发布的章节会按发布顺序上线，
+        # 所以等失败的章节重试完才继续发布下一章
+        retries = RetryQueue.from_config(self.config.get('retry'))
+        tasks = ({'index': i, 'chapter': chapter} for i, chapter in enumerate(chapters, 1))
+        attempted = False
+
+        self.metrics.reset(self._book_key())
+        with self._open_journal() as journal:
+            for task in retries.in_order(tasks):
+                chapter = self._task_payload(task)
+                key = chapter['key']
+                if journal.should_skip(key):
+                    result['skipped'].append(chapter['title'])
+                    continue
 
+                # 避免频繁发布
+                if attempted:
+                    self._pace_chapters()
+                attempted = True
+
+                self.metrics.chapter = task['index']
+                print(f"\n正在发布第 {task['index']}/{total} 章{self._attempt_label(task)}...")
+                success = self._publish_journaled(journal, chapter)
+                self._settle(task, success, result, retries)
+
+        self._print_retry_stats(retries)
+        self._print_page_stats()
+        self.rate_limiter.print_summary()
+        self.waits.print_summary()
+        self.metrics.print_summary()
         return result
 
-    def publish_batch_scheduled(self, chapters: List[Dict[str, str]],
+    def publish_batch_scheduled(self, chapters: Iterable[Dict[str, str]],
                                 start_date: datetime = None,
                                 chapters_per_day: int = 2,
                                 publish_times: List[str] = None) -> Dict[str, List[str]]:
@@ -512,13 +1128,16 @@ class TomatoNovelPublisher:
         批量定时发布章节（在番茄平台设置定时发布）
 
         Args:
-            chapters: 章节列表
+            chapters: 章节列表，也可以是 NovelParser.iter_chapters() 返回的迭代器
             start_date: 开始日期（默认为明天）
             chapters_per_day: 每天发布章节数
             publish_times: 每天的发布时间列表（如 ["08:00", "20:00"]）
 
         Returns:
-            发布结果 {'success': [titles], 'failed': [titles], 'schedule': [datetime]}
+            发布结果 {'success': [titles], 'failed': [titles], 'schedule': [datetime],
+            'unconfirmed': [titles], 'skipped': [titles]}，
+            unconfirmed 为已点击发布但未确认结果的章节（不重试，需在作家后台核对），
+            skipped 为发布日志中已经发布过、本次跳过的章节
         """
         if not self.driver:
             self.init_browser()
@@ -532,52 +1151,198 @@ class TomatoNovelPublisher:
         result = {
             'success': [],
             'failed': [],
-            'schedule': []
+            'schedule': [],
+            'unconfirmed': [],
+            'skipped': []
         }
 
-        # 生成发布时间表
-        schedule = self._generate_schedule(
-            total_chapters=len(chapters),
-            start_date=start_date,
-            chapters_per_day=chapters_per_day,
-            publish_times=publish_times
-        )
+        total = len(chapters) if hasattr(chapters, '__len__') else None
 
         print(f"\n{'=' * 50}")
         print(f"批量定时发布计划")
         print(f"{'=' * 50}")
-        print(f"总章节数: {len(chapters)}")
+        print(f"总章节数: {total if total is not None else '流式读取'}")
         print(f"每天发布: {chapters_per_day} 章")
         print(f"发布时间: {', '.join(publish_times)}")
         print(f"开始日期: {start_date.strftime('%Y-%m-%d')}")
-        print(f"预计完成: {schedule[-1].strftime('%Y-%m-%d')}")
+        if total:
+            # 生成发布时间表
+            schedule = self._generate_schedule(
+                total_chapters=total,
+                start_date=start_date,
+                chapters_per_day=chapters_per_day,
+                publish_times=publish_times
+            )
+            print(f"预计完成: {schedule[-1].strftime('%Y-%m-%d')}")
         print(f"{'=' * 50}\n")
 
-        # 按计划发布每一章
-        for i, (chapter, publish_time) in enumerate(zip(chapters, schedule), 1):
-            print(f"\n[{i}/{len(chapters)}] 设置《{chapter['title']}》...")
-            print(f"    发布时间: {publish_time.strftime('%Y-%m-%d %H:%M')}")
+        # 按计划发布每一章（发布时间逐个生成，章节可以是流式迭代器）；
+        # 失败的章节按错误类型延后重试，到期的重试穿插在后续章节之间（上线时间已定，不影响顺序）
+        schedule = self._iter_schedule(start_date, publish_times)
+        retries = RetryQueue.from_config(self.config.get('retry'))
+        tasks = (
+            {'index': i, 'chapter': chapter, 'publish_time': publish_time}
+            for i, (chapter, publish_time) in enumerate(zip(chapters, schedule), 1)
+        )
+        attempted = False
+
+        self.metrics.reset(self._book_key())
+        with self._open_journal() as journal:
+            for task in retries.interleave(tasks):
+                chapter = self._task_payload(task)
+                key = chapter['key']
+                if journal.should_skip(key):
+                    result['skipped'].append(chapter['title'])
+                    continue
 
-            success = self.publish_chapter(chapter['title'], chapter['content'], publish_time)
+                # 续传时沿用上次为该章安排的时间（已经过去的时间不再使用）
+                previous_time = journal.scheduled_time(key)
+                if previous_time and previous_time > datetime.now() and previous_time != chapter['publish_time']:
+                    chapter = task['chapter'] = self.chapter_payload(chapter, previous_time)
+                publish_time = task['publish_time'] = chapter['publish_time']
 
-            if success:
-                result['success'].append(chapter['title'])
-                result['schedule'].append(publish_time)
-            else:
-                result['failed'].append(chapter['title'])
+                # 避免频繁操作
+                if attempted:
+                    self._pace_chapters()
+                attempted = True
 
-            # 避免频繁操作，等待几秒
-            if i < len(chapters):
-                time.sleep(5)
+                self.metrics.chapter = task['index']
+                print(f"\n[{task['index']}/{total or '?'}] 设置《{chapter['title']}》{self._attempt_label(task)}...")
+                print(f"    发布时间: {publish_time.strftime('%Y-%m-%d %H:%M')}")
+
+                success = self._publish_journaled(journal, chapter)
+                self._settle(task, success, result, retries)
 
         print(f"\n{'=' * 50}")
         print(f"批量定时发布完成")
         print(f"成功: {len(result['success'])} 章")
         print(f"失败: {len(result['failed'])} 章")
+        if result['unconfirmed']:
+            print(f"未确认: {len(result['unconfirmed'])} 章（已提交，请在作家后台核对）")
+        if result['skipped']:
+            print(f"跳过: {len(result['skipped'])} 章（发布日志中已发布）")
+        self._print_retry_stats(retries)
+        self._print_page_stats()
+        self.rate_limiter.print_summary()
+        self.waits.print_summary()
+        self.metrics.print_summary()
         print(f"{'=' * 50}\n")
 
         return result
 
+    def _open_journal(self) -> PublishJournal:
+        """
+        打开当前书的发布日志（配置 journal 为 false 时只在内存中记录）
+        """
+        journal = PublishJournal(self._book_key(), JOURNAL_DIR if self.config.get('journal', True) else None)
+
+        counts = journal.counts()
+        if counts['confirmed'] or counts['submitted']:
+            print(f"断点续传：发布日志中已有 {counts['confirmed']} 章发布成功，将自动跳过")
+        if counts['submitted']:
+            print(f"⚠ 有 {counts['submitted']} 章已提交但未确认结果，同样跳过，请在作家后台核对")
+        return journal
+
+    def _book_key(self) -> str:
+        """当前书的标识：选中的书本 ID（或书名），没有选择书本时使用发布页面地址"""
+        novel = self.selected_novel or {}
+        return novel.get('id') or novel.get('title') or self.config['publish_url']
+
+    @staticmethod
+    def chapter_payload(chapter: Dict[str, str], publish_time: Optional[datetime] = None) -> Dict:
+        """
+        生成提交一章所需的数据（流水线发布时在浏览器线程之外预先生成）
+
+        Args:
+            chapter: {'title': '', 'content': ''}（已有 key 时沿用）
+            publish_time: 定时发布时间（None表示立即发布）
+
+        Returns:
+            {'title', 'content', 'key': 发布日志标识, 'publish_time',
+             'schedule': 脚本发布使用的定时字段 {'date', 'time'}（立即发布时为 None）}
+        """
+        return {
+            'title': chapter['title'],
+            'content': chapter['content'],
+            'key': chapter.get('key') or chapter_key(chapter['title'], chapter['content']),
+            'publish_time': publish_time,
+            'schedule': _schedule_fields(publish_time),
+        }
+
+    def _task_payload(self, task: Dict) -> Dict:
+        """任务的提交数据：流水线预先生成的直接使用（发布时间以它为准），否则在这里生成"""
+        chapter = task['chapter']
+        if 'schedule' not in chapter:
+            chapter = task['chapter'] = self.chapter_payload(chapter, task.get('publish_time'))
+        return chapter
+
+    def _publish_journaled(self, journal: PublishJournal, payload: Dict) -> bool:
+        """
+        发布一章（payload 见 chapter_payload），每个步骤的状态先写入发布日志
+
+        点击发布后超时或原因不明时章节可能已经发布，日志保持 submitted，
+        错误类型记为 UNCONFIRMED，不再重试；平台明确限流或拒绝时记为 failed，照常重试或放弃
+        """
+        key = payload['key']
+        states = []
+
+        def progress(state: str):
+            states.append(state)
+            journal.record(key, state)
+
+        journal.record(key, 'pending', payload['title'], payload['publish_time'])
+        success = self.publish_chapter(payload['title'], payload['content'], payload['publish_time'],
+                                       progress, payload['schedule'])
+        if success:
+            journal.record(key, 'confirmed')
+        elif 'submitted' in states and self.last_error in (None, TRANSIENT, UNKNOWN):
+            self.last_error = UNCONFIRMED
+        else:
+            journal.record(key, 'failed')
+        return success
+
+    @staticmethod
+    def _attempt_label(task: Dict) -> str:
+        """重试时在进度信息后标注第几次尝试"""
+        if task['attempt'] > 1:
+            return f"（第 {task['attempt']} 次尝试，上次{ERROR_NAMES[task['error']]}）"
+        return ''
+
+    def _settle(self, task: Dict, success: bool, result: Dict[str, list], retries: RetryQueue):
+        """
+        记录一章的发布结果；失败时按错误类型放入重试队列，
+        不可重试或次数用完时才计入失败
+        """
+        title = task['chapter']['title']
+        if success:
+            result['success'].append(title)
+            if 'publish_time' in task:
+                result['schedule'].append(task['publish_time'])
+            return
+
+        kind = self.last_error or UNKNOWN
+        delay = retries.push(task, kind)
+        if delay is not None:
+            print(f"    {ERROR_NAMES[kind]}，约 {delay:.0f} 秒后重试")
+            return
+
+        if kind == UNCONFIRMED:
+            result['unconfirmed'].append(title)
+            print(f"    {ERROR_NAMES[kind]}，不再重试，请在作家后台核对")
+            return
+
+        result['failed'].append(title)
+        if kind not in RETRYABLE:
+            print(f"    {ERROR_NAMES[kind]}，不再重试")
+        else:
+            print(f"    {ERROR_NAMES[kind]}，已尝试 {task['attempt']} 次，放弃")
+
+    @staticmethod
+    def _print_retry_stats(retries: RetryQueue):
+        """打印重试次数"""
+        if retries.stats['retried']:
+            print(f"重试: {retries.stats['retried']} 次")
+
     def _generate_schedule(self, total_chapters: int,
                           start_date: datetime,
                           chapters_per_day: int,
@@ -594,34 +1359,30 @@ class TomatoNovelPublisher:
         Returns:
             发布时间列表
         """
-        schedule = []
-        current_date = start_date
-        time_index = 0
-
-        for i in range(total_chapters):
-            # 获取当天的发布时间
-            publish_time_str = publish_times[time_index % len(publish_times)]
-            hour, minute = map(int, publish_time_str.split(':'))
-
-            # 创建发布时间
-            publish_time = current_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            schedule.append(publish_time)
+        return generate_schedule(total_chapters, start_date, publish_times)
 
-            # 更新索引
-            time_index += 1
+    def _iter_schedule(self, start_date: datetime, publish_times: List[str]) -> Iterator[datetime]:
+        """
+        逐个生成发布时间（无限序列）
 
-            # 如果完成一天的发布量，移动到下一天
-            if time_index >= len(publish_times):
-                time_index = 0
-                current_date += timedelta(days=1)
+        Args:
+            start_date: 开始日期
+            publish_times: 发布时间列表
 
-        return schedule
+        Yields:
+            发布时间
+        """
+        return iter_schedule(start_date, publish_times)
 
     def close(self):
-        """关闭浏览器"""
+        """关闭浏览器（连接的是后台浏览器时只断开连接）"""
         if self.driver:
             self.driver.quit()
-            print("浏览器已关闭")
+            if type(self.driver).__name__ == 'AttachedDriver':
+                print("已断开后台浏览器（浏览器继续运行）")
+            else:
+                print("浏览器已关闭")
+            self.driver = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+自适应限速
+令牌桶控制提交章节的速度：平台正常时按设定速度（允许短时突发）提交；
+检测到限流信号（提示“操作频繁”、出现验证码、请求返回 429）时降速，
+连续多章正常后再逐步提速，尽量以平台能接受的最高速度发布
+"""
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+# 默认参数，可在 config.json 的 rate_limit 中覆盖（速度单位：章/分钟）
+DEFAULT_RATE_LIMIT = {
+    'rate': 12,           # 初始速度
+    'burst': 3,           # 允许连续提交的章数
+    'min_rate': 1,        # 降速下限
+    'max_rate': 30,       # 提速上限
+    'backoff': 0.5,       # 检测到限流时速度乘以该系数
+    'step': 1,            # 每次提速增加的速度
+    'healthy_after': 5,   # 连续多少章正常后提速一次
+}
+
+
+class AdaptiveRateLimiter:
+    """
+    令牌桶限速器（线程安全，多个浏览器可以共用一个）
+
+    速度调整采用加性增、乘性减：限流时速度立即减半，正常时缓慢回升
+    """
+
+    def __init__(self, rate: float = 12, burst: int = 3, min_rate: float = 1, max_rate: float = 30,
+                 backoff: float = 0.5, step: float = 1, healthy_after: int = 5,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: 初始速度（章/分钟）
+            burst: 桶容量，空闲一段时间后最多可以连续提交的章数
+            min_rate: 速度下限
+            max_rate: 速度上限
+            backoff: 限流时的降速系数（0~1）
+            step: 每次提速增加的速度
+            healthy_after: 连续多少章正常后提速一次
+            clock: 时钟（测试时可替换）
+            sleep: 等待函数（测试时可替换）
+        """
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.burst = max(burst, 1)
+        self.backoff = backoff
+        self.step = step
+        self.healthy_after = max(healthy_after, 1)
+        self._clock = clock
+        self._sleep = sleep
+
+        self.tokens = float(self.burst)
+        self._updated = clock()
+        self._streak = 0
+        self._lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waited': 0.0, 'throttled': 0}
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict]) -> 'AdaptiveRateLimiter':
+        """按配置（config.json 的 rate_limit）创建，未给出的参数使用 DEFAULT_RATE_LIMIT"""
+        params = {**DEFAULT_RATE_LIMIT, **(settings or {})}
+        return cls(**{key: params[key] for key in DEFAULT_RATE_LIMIT})
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        取得一次提交的许可，必要时等待
+
+        Returns:
+            等待的秒数
+        """
+        with self._lock:
+            self._refill()
+            # 预占一个令牌，令牌不足时按欠缺的数量计算等待时间（在锁外等待）
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens) * 60 / self.rate
+            self.stats['acquired'] += 1
+            self.stats['waited'] += wait
+
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def throttled(self, reason: str):
+        """
+        检测到限流信号：降速，并清空积攒的令牌
+
+        Args:
+            reason: 限流原因（用于提示）
+        """
+        with self._lock:
+            self._refill()
+            self.stats['throttled'] += 1
+            self._streak = 0
+            self.tokens = min(self.tokens, 0.0)
+            old_rate = self.rate
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+
+        print(f"⚠ 检测到限流（{reason}），发布速度 {old_rate:g} → {self.rate:g} 章/分钟")
+
+    def healthy(self):
+        """一章正常提交：连续正常达到 healthy_after 章后提速"""
+        with self._lock:
+            self._streak += 1
+            if self._streak < self.healthy_after or self.rate >= self.max_rate:
+                return
+            self._streak = 0
+            self._refill()
+            old_rate = self.rate
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+        print(f"发布速度 {old_rate:g} → {self.rate:g} 章/分钟")
+
+    def print_summary(self):
+        """打印限速统计"""
+        if not self.stats['acquired']:
+            return
+        line = f"限速: 当前 {self.rate:g} 章/分钟，共等待 {self.stats['waited']:.1f} s"
+        if self.stats['throttled']:
+            line += f"，检测到限流 {self.stats['throttled']} 次"
+        print(line)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+失败重试队列
+发布失败的章节按错误类型决定是否重试：超时、页面元素失效、被限流等临时错误
+按指数退避（带随机抖动）延后重试，到期的重试穿插在后续章节之间进行，
+主流程结束后再等待剩余的重试；内容被平台拒绝等永久错误不再浪费浏览器时间
+"""
+import time
+import heapq
+import random
+import itertools
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# 错误类型
+TRANSIENT = 'transient'   # 超时、网络波动
+STALE = 'stale'           # 页面元素失效或被遮挡（重新加载页面即可）
+THROTTLED = 'throttled'   # 被限流（验证码、“操作频繁”）
+REJECTED = 'rejected'     # 内容校验不通过（标题为空、字数不符、敏感词等），重试无意义
+UNCONFIRMED = 'unconfirmed'  # 已点击发布但未确认结果，可能已经发布，重发会产生重复章节
+UNKNOWN = 'unknown'
+
+# 可以重试的错误类型
+RETRYABLE = (TRANSIENT, STALE, THROTTLED, UNKNOWN)
+
+ERROR_NAMES = {
+    TRANSIENT: '超时',
+    STALE: '页面元素失效',
+    THROTTLED: '被限流',
+    REJECTED: '内容被拒绝',
+    UNCONFIRMED: '已提交但未确认结果',
+    UNKNOWN: '未知错误',
+}
+
+# 按异常类名分类（不导入 selenium，也能识别 selenium 的异常）
+_EXCEPTION_KINDS = {
+    'TimeoutException': TRANSIENT,
+    'TimeoutError': TRANSIENT,
+    'ConnectionError': TRANSIENT,
+    'StaleElementReferenceException': STALE,
+    'NoSuchElementException': STALE,
+    'ElementNotInteractableException': STALE,
+    'ElementClickInterceptedException': STALE,
+    'InvalidElementStateException': STALE,
+}
+
+# 默认参数，可在 config.json 的 retry 中覆盖
+DEFAULT_RETRY = {
+    'max_attempts': 3,    # 每章最多尝试次数（含第一次）
+    'base_delay': 30,     # 第一次重试的延迟（秒），之后每次翻倍
+    'max_delay': 600,     # 最长延迟（秒）
+    'jitter': 0.5,        # 随机抖动比例：实际延迟在 [1 - jitter, 1] 倍之间
+}
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    判断异常的错误类型
+
+    Args:
+        error: 发布过程中抛出的异常
+
+    Returns:
+        错误类型（TRANSIENT / STALE / UNKNOWN）
+    """
+    for cls in type(error).__mro__:
+        if cls.__name__ in _EXCEPTION_KINDS:
+            return _EXCEPTION_KINDS[cls.__name__]
+    if 'timeout' in str(error).lower() or 'timed out' in str(error).lower():
+        return TRANSIENT
+    return UNKNOWN
+
+
+class RetryQueue:
+    """按到期时间排序的重试队列"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 30, max_delay: float = 600,
+                 jitter: float = 0.5, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rng: Callable[[], float] = random.random):
+        """
+        Args:
+            max_attempts: 每个任务最多尝试次数（含第一次）
+            base_delay: 第一次重试的延迟（秒）
+            max_delay: 最长延迟（秒）
+            jitter: 随机抖动比例（0~1）
+            clock: 时钟（测试时可替换）
+            sleep: 等待函数（测试时可替换）
+            rng: 随机数函数（测试时可替换）
+        """
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self.stats = {'retried': 0, 'gave_up': 0}
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict]) -> 'RetryQueue':
+        """按配置（config.json 的 retry）创建，未给出的参数使用 DEFAULT_RETRY"""
+        params = {**DEFAULT_RETRY, **(settings or {})}
+        return cls(**{key: params[key] for key in DEFAULT_RETRY})
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次尝试失败后的重试延迟（秒）"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * self._rng())
+
+    def push(self, task: Dict, kind: str) -> Optional[float]:
+        """
+        失败的任务放入队列
+
+        Args:
+            task: 任务（字典，attempt 为已尝试次数，默认 1）
+            kind: 错误类型
+
+        Returns:
+            重试延迟（秒）；错误不可重试或次数已用完时返回 None
+        """
+        attempt = task.get('attempt', 1)
+        if kind not in RETRYABLE or attempt >= self.max_attempts:
+            self.stats['gave_up'] += 1
+            return None
+
+        delay = self.delay(attempt)
+        task['attempt'] = attempt + 1
+        task['error'] = kind
+        heapq.heappush(self._heap, (self._clock() + delay, next(self._counter), task))
+        self.stats['retried'] += 1
+        return delay
+
+    def pop_ready(self) -> Optional[Dict]:
+        """取出一个已到期的任务，没有时返回 None"""
+        if self._heap and self._heap[0][0] <= self._clock():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def drain(self) -> Iterator[Dict]:
+        """依次等待并取出剩余任务（迭代过程中放入的任务也会取出）"""
+        while self._heap:
+            wait = self._heap[0][0] - self._clock()
+            if wait > 0:
+                print(f"等待 {wait:.0f} 秒后重试失败的章节（剩余 {len(self._heap)} 章）...")
+                self._sleep(wait)
+            yield heapq.heappop(self._heap)[2]
+
+    def interleave(self, tasks: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        依次产出任务，每个任务之前先产出已到期的重试；主任务结束后等待剩余重试
+
+        Args:
+            tasks: 主流程任务
+        """
+        for task in tasks:
+            while True:
+                retry = self.pop_ready()
+                if retry is None:
+                    break
+                yield retry
+            task.setdefault('attempt', 1)
+            yield task
+        yield from self.drain()
+
+    def in_order(self, tasks: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        依次产出任务，任务失败放入队列后先等待并重试完它，再产出下一个任务
+        （立即发布时章节按顺序上线，不能让后面的章节先于失败的章节发布）
+
+        Args:
+            tasks: 主流程任务
+        """
+        for task in tasks:
+            task.setdefault('attempt', 1)
+            yield task
+            yield from self.drain()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+定时发布计划
+只依赖标准库，生成计划、预览计划时不需要导入 selenium
+"""
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+
+def parse_times(value) -> List[str]:
+    """
+    解析发布时间列表
+
+    Args:
+        value: "08:00,20:00" 形式的字符串，或时间字符串列表
+
+    Returns:
+        时间字符串列表
+
+    Raises:
+        ValueError: 时间格式错误
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    times = [item.strip() for item in value if item.strip()]
+    if not times:
+        raise ValueError("发布时间不能为空")
+    for item in times:
+        datetime.strptime(item, '%H:%M')
+    return times
+
+
+def iter_schedule(start_date: datetime, publish_times: List[str]) -> Iterator[datetime]:
+    """
+    逐个生成发布时间（无限序列）
+
+    Args:
+        start_date: 开始日期
+        publish_times: 发布时间列表
+
+    Yields:
+        发布时间
+    """
+    current_date = start_date
+    time_index = 0
+
+    while True:
+        # 获取当天的发布时间
+        publish_time_str = publish_times[time_index % len(publish_times)]
+        hour, minute = map(int, publish_time_str.split(':'))
+
+        # 创建发布时间
+        yield current_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+        # 更新索引
+        time_index += 1
+
+        # 如果完成一天的发布量，移动到下一天
+        if time_index >= len(publish_times):
+            time_index = 0
+            current_date += timedelta(days=1)
+
+
+def generate_schedule(total_chapters: int, start_date: datetime,
+                      publish_times: List[str]) -> List[datetime]:
+    """
+    生成发布时间表
+
+    Args:
+        total_chapters: 总章节数
+        start_date: 开始日期
+        publish_times: 发布时间列表
+
+    Returns:
+        发布时间列表
+    """
+    return list(islice(iter_schedule(start_date, publish_times), total_chapters))
+
+
+def plan_chapters(titles: Iterable[str], start_date: datetime,
+                  publish_times: List[str]) -> List[Dict]:
+    """
+    为章节标题排定发布时间
+
+    Args:
+        titles: 章节标题（按发布顺序）
+        start_date: 开始日期
+        publish_times: 发布时间列表
+
+    Returns:
+        [{'title': 标题, 'publish_time': 发布时间}, ...]
+    """
+    return [
+        {'title': title, 'publish_time': publish_time}
+        for title, publish_time in zip(titles, iter_schedule(start_date, publish_times))
+    ]
@@ -5,10 +5,11 @@
 """
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List
 
 from parser import NovelParser
-from publisher import TomatoNovelPublisher
+from schedule_plan import iter_schedule
 
 
 class PublishScheduler:
@@ -21,6 +22,7 @@ class PublishScheduler:
         Args:
             config_file: 配置文件路径
         """
+        self.config_file = config_file
         self.config = self._load_config(config_file)
         self.parser = None
         self.publisher = None
@@ -34,20 +36,71 @@ class PublishScheduler:
             print(f"配置文件 {config_file} 不存在")
             raise
 
-    def load_novel(self, file_path: str = None, content: str = None):
+    def load_novel(self, file_path: str = None, content: str = None,
+                   stream: bool = False, lazy: bool = False, workers: int = 1):
         """
         加载小说文件
 
         Args:
             file_path: 小说文件路径
             content: 小说文本内容
+            stream: 流式模式，发布时逐章读取，不把整本小说读入内存
+            lazy: 懒加载模式，只建立章节偏移索引，发布到哪一章才解码哪一章
+            workers: 解析大文件时使用的进程数
         """
-        self.parser = NovelParser(file_path=file_path, content=content)
-        print(f"✓ 已加载小说，共 {self.parser.get_chapter_count()} 章")
+        self.parser = NovelParser(file_path=file_path, content=content, stream=stream,
+                                  lazy=lazy, workers=workers)
+        if self.parser.stream:
+            print(f"✓ 已加载小说（流式模式，编码 {self.parser.encoding}）")
+        else:
+            print(f"✓ 已加载小说，共 {self.parser.get_chapter_count()} 章")
+
+    def _slice_chapters(self, start_index: int, count: int = None):
+        """
+        取出待发布的章节
+
+        流式模式下返回惰性迭代器，普通模式下返回列表
+
+        Returns:
+            (章节集合, 总章节数)，流式模式下总章节数为 None
+        """
+        stop = None if count is None else start_index + count
+
+        if self.parser.stream:
+            return islice(self.parser.iter_chapters(head=stop), start_index, None), None
+
+        chapters = self.parser.get_chapters()
+        if self.parser.lazy:
+            # 切片会立即解码全部正文，懒加载模式下改用视图，发布到哪一章才解码哪一章
+            return chapters.view(start_index, stop), len(chapters)
+        return chapters[start_index:stop], len(chapters)
+
+    def _run_batch(self, publish: Callable[[Iterable[Dict]], Dict], chapters,
+                   schedule: Iterator[datetime] = None) -> Dict:
+        """
+        发布一批章节
+
+        配置 pipeline 为 true 时，章节的读取、校验和准备与浏览器发布并行进行（见 pipeline.py）
+
+        Args:
+            publish: 发布函数（publisher.publish_batch 等），接收章节集合并返回发布结果
+            chapters: 章节集合
+            schedule: 定时发布时，与 publish 相同的发布时间表（流水线按原始顺序分配时间）
+        """
+        if not self.config.get('pipeline', False):
+            return publish(chapters)
+
+        from pipeline import PublishPipeline, DEFAULT_QUEUE_SIZE
+
+        queue_size = self.config.get('pipeline_queue_size', DEFAULT_QUEUE_SIZE)
+        return PublishPipeline(publish, self.publisher.chapter_payload, queue_size, schedule).run(chapters)
 
     def init_publisher(self):
         """初始化发布器"""
-        self.publisher = TomatoNovelPublisher()
+        # 发布器依赖 selenium，放到这里导入，只解析小说时不必加载
+        from publisher import TomatoNovelPublisher
+
+        self.publisher = TomatoNovelPublisher(self.config_file)
         self.publisher.init_browser()
         print("✓ 浏览器已启动")
 
@@ -57,11 +110,20 @@ class PublishScheduler:
             self.init_publisher()
         self.publisher.login()
 
-    def select_novel(self):
-        """选择要发布的书本"""
+    def select_novel(self, novel_index: int = None):
+        """
+        选择要发布的书本
+
+        Args:
+            novel_index: 书本编号（从1开始），None 表示交互式选择
+        """
         if not self.publisher:
             self.init_publisher()
 
+        if novel_index is not None:
+            self.publisher.get_novels()
+            return self.publisher.select_novel(novel_index)
+
         print("\n" + "=" * 50)
         print("书本选择")
         print("=" * 50)
@@ -95,32 +157,34 @@ class PublishScheduler:
                 print("✗ 无法选择书本，发布流程终止")
                 return
 
-        chapters = self.parser.get_chapters()
+        chapters_to_publish, total = self._slice_chapters(start_index, count)
 
-        if start_index >= len(chapters):
+        if total is not None and start_index >= total:
             print("起始索引超出范围")
             return
 
-        if count is None:
-            chapters_to_publish = chapters[start_index:]
-        else:
-            chapters_to_publish = chapters[start_index:start_index + count]
-
         print(f"\n{'=' * 50}")
         print(f"立即发布模式")
         print(f"{'=' * 50}")
-        print(f"总章节: {len(chapters)}")
-        print(f"即将发布: {len(chapters_to_publish)} 章")
+        if total is None:
+            print(f"流式发布，起始索引: {start_index}")
+        else:
+            print(f"总章节: {total}")
+            print(f"即将发布: {len(chapters_to_publish)} 章")
         if self.publisher.selected_novel:
             print(f"目标书本: {self.publisher.selected_novel['title']}")
         print(f"{'=' * 50}\n")
 
-        result = self.publisher.publish_batch(chapters_to_publish)
+        result = self._run_batch(self.publisher.publish_batch, chapters_to_publish)
 
         print(f"\n{'=' * 50}")
         print(f"发布完成")
         print(f"成功: {len(result['success'])} 章")
         print(f"失败: {len(result['failed'])} 章")
+        if result['unconfirmed']:
+            print(f"未确认: {len(result['unconfirmed'])} 章（已提交，请在作家后台核对）")
+        if result['skipped']:
+            print(f"跳过: {len(result['skipped'])} 章（发布日志中已发布，或标题、正文为空）")
         print(f"{'=' * 50}\n")
 
         return result
@@ -130,7 +194,8 @@ class PublishScheduler:
                          chapters_per_day: int = None,
                          publish_times: List[str] = None,
                          start_index: int = 0,
-                         select_novel_first: bool = True):
+                         select_novel_first: bool = True,
+                         count: int = None):
         """
         批量定时发布（在番茄平台设置定时发布）
 
@@ -140,6 +205,7 @@ class PublishScheduler:
             publish_times: 发布时间列表（如 ["08:00", "20:00"]）
             start_index: 起始章节索引
             select_novel_first: 是否先选择书本
+            count: 发布章节数量（None表示全部）
         """
         if not self.parser:
             raise ValueError("请先使用 load_novel() 加载小说文件")
@@ -153,9 +219,9 @@ class PublishScheduler:
                 print("✗ 无法选择书本，发布流程终止")
                 return
 
-        chapters = self.parser.get_chapters()
+        chapters_to_publish, total = self._slice_chapters(start_index, count)
 
-        if start_index >= len(chapters):
+        if total is not None and start_index >= total:
             print("起始索引超出范围")
             return
 
@@ -170,13 +236,14 @@ class PublishScheduler:
             # 默认从明天开始
             start_date = datetime.now() + timedelta(days=1)
 
-        chapters_to_publish = chapters[start_index:]
-
         print(f"\n{'=' * 50}")
         print(f"批量定时发布模式")
         print(f"{'=' * 50}")
-        print(f"总章节: {len(chapters)}")
-        print(f"待发布: {len(chapters_to_publish)} 章")
+        if total is None:
+            print("流式发布")
+        else:
+            print(f"总章节: {total}")
+            print(f"待发布: {len(chapters_to_publish)} 章")
         print(f"开始索引: {start_index}")
         if self.publisher.selected_novel:
             print(f"目标书本: {self.publisher.selected_novel['title']}")
@@ -184,11 +251,15 @@ class PublishScheduler:
         print(f"发布时间: {', '.join(publish_times)}")
         print(f"{'=' * 50}\n")
 
-        result = self.publisher.publish_batch_scheduled(
-            chapters=chapters_to_publish,
-            start_date=start_date,
-            chapters_per_day=chapters_per_day,
-            publish_times=publish_times
+        result = self._run_batch(
+            lambda chapters: self.publisher.publish_batch_scheduled(
+                chapters=chapters,
+                start_date=start_date,
+                chapters_per_day=chapters_per_day,
+                publish_times=publish_times
+            ),
+            chapters_to_publish,
+            schedule=iter_schedule(start_date, publish_times)
         )
 
         return result
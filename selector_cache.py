@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+页面元素定位缓存
+页面上的同一个元素（如“定时发布”开关）往往要依次尝试多个定位器，
+这里记住每个元素上次命中的定位器，下次优先尝试；
+结果按页面版本保存到磁盘，平台改版后自动重新学习
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from parse_cache import CACHE_DIR
+
+# 默认缓存文件
+SELECTOR_CACHE_FILE = os.path.join(CACHE_DIR, 'selectors.json')
+
+# 缓存格式版本
+SELECTOR_CACHE_VERSION = 1
+
+# 页面版本：前端资源（脚本、样式）的地址通常带内容哈希，改版后会变化
+_PAGE_VERSION_JS = """
+const assets = [];
+for (const script of document.scripts) if (script.src) assets.push(script.src);
+for (const link of document.querySelectorAll('link[rel="stylesheet"]')) assets.push(link.href);
+return assets.sort().join('|');
+"""
+
+# 定位器：(By.XPATH / By.CSS_SELECTOR, 表达式)
+Locator = Tuple[str, str]
+
+
+class SelectorResolver:
+    """按逻辑名称定位页面元素，记住命中的定位器"""
+
+    def __init__(self, driver, cache_file: str = SELECTOR_CACHE_FILE):
+        """
+        Args:
+            driver: WebDriver 实例
+            cache_file: 缓存文件路径（None 表示不保存到磁盘）
+        """
+        self.driver = driver
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._pages = self._load()
+        # 本次运行中已经核对过版本的页面
+        self._checked = set()
+        self.stats = {'hits': 0, 'misses': 0, 'relearned': 0}
+
+    def _load(self) -> Dict[str, dict]:
+        """读取缓存：{页面: {'version': 页面版本, 'winners': {元素名: [by, 表达式]}}}"""
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != SELECTOR_CACHE_VERSION:
+            return {}
+        return data.get('pages', {})
+
+    def _save(self):
+        """写入缓存（失败时静默忽略）"""
+        if not self.cache_file:
+            return
+        temp_path = self.cache_file.with_suffix('.tmp')
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'version': SELECTOR_CACHE_VERSION, 'pages': self._pages},
+                                   ensure_ascii=False, indent=2))
+            os.replace(temp_path, self.cache_file)
+        except OSError:
+            pass
+
+    def _page_key(self) -> str:
+        """当前页面（域名 + 路径，忽略查询参数）"""
+        url = urlsplit(self.driver.current_url)
+        return f"{url.netloc}{url.path}"
+
+    def _page_version(self) -> str:
+        try:
+            assets = self.driver.execute_script(_PAGE_VERSION_JS) or ''
+        except Exception:
+            return ''
+        return hashlib.sha1(assets.encode('utf-8')).hexdigest()[:16]
+
+    def _winners(self, recheck: bool = False) -> Dict[str, List[str]]:
+        """
+        当前页面已学到的定位器
+
+        每个页面在本次运行中只核对一次版本；缓存的定位器失效时再次核对，
+        版本变化就清空该页面的记录，重新学习
+        """
+        key = self._page_key()
+        page = self._pages.setdefault(key, {'version': None, 'winners': {}})
+
+        if recheck or key not in self._checked:
+            self._checked.add(key)
+            version = self._page_version()
+            if version and page['version'] != version:
+                page['version'], page['winners'] = version, {}
+                self._save()
+
+        return page['winners']
+
+    def ordered(self, name: str, locators: Sequence[Locator]) -> List[Locator]:
+        """按优先级排列定位器：上次命中的排在最前"""
+        locators = [tuple(locator) for locator in locators]
+        winner = self._winners().get(name)
+        if winner and tuple(winner) in locators:
+            locators.remove(tuple(winner))
+            locators.insert(0, tuple(winner))
+        return locators
+
+    def record(self, name: str, locator: Locator):
+        """记录命中的定位器"""
+        winners = self._winners()
+        if winners.get(name) != list(locator):
+            if name in winners:
+                self.stats['relearned'] += 1
+            winners[name] = list(locator)
+            self._save()
+
+    def find_all(self, name: str, locators: Sequence[Locator]) -> list:
+        """
+        依次尝试定位器，返回第一个找到元素的定位器的全部结果
+
+        Args:
+            name: 元素逻辑名称（如 'schedule_toggle'）
+            locators: 候选定位器
+
+        Returns:
+            元素列表，都没找到时返回 []
+        """
+        ordered = self.ordered(name, locators)
+        cached = tuple(self._winners().get(name) or ()) or None
+
+        for locator in ordered:
+            try:
+                elements = self.driver.find_elements(*locator)
+            except Exception:
+                continue
+            if elements:
+                if locator == cached:
+                    self.stats['hits'] += 1
+                else:
+                    self.stats['misses'] += 1
+                    self.record(name, locator)
+                return elements
+
+            if locator == cached:
+                # 上次命中的定位器失效，可能是页面改版
+                self._winners(recheck=True)
+
+        self.stats['misses'] += 1
+        return []
+
+    def find(self, name: str, locators: Sequence[Locator]):
+        """同 find_all，只返回第一个元素，没找到时返回 None"""
+        elements = self.find_all(name, locators)
+        return elements[0] if elements else None
+
+    def clear(self):
+        """清空所有记录"""
+        self._pages = {}
+        self._checked = set()
+        self._save()
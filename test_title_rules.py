@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+章节标题规则等价性测试
+合并后的 _TITLE_RE / _CANDIDATE_RE 必须与逐条匹配 CHAPTER_PATTERNS 的原写法结果完全一致
+（可直接运行，也可以用 pytest 运行）
+"""
+import re
+import random
+
+from benchmark import TITLE_STYLES, _adversarial_line, _sentence, to_chinese_numeral
+from parser import NovelParser, TitleScanner
+
+# 随机拼接标题行使用的片段（标题规则中出现的字符和容易混淆的字符）
+_PIECES = ['第', '章', '节', '卷', '回', '集', '部', '篇', '零', '一', '十', '百', '千', '万',
+           '0', '7', '12', '.', '、', '【', '】', 'Chapter', 'chapter', 'CHAPTER', ' ', '　', '\t',
+           'a', '张', '的']
+
+
+def baseline_is_title(line: str) -> bool:
+    """原解析器的判断方式：去除首尾空白后逐条匹配 CHAPTER_PATTERNS"""
+    line = line.strip()
+    if not line:
+        return False
+    return any(re.match(pattern, line, re.IGNORECASE) for pattern in NovelParser.CHAPTER_PATTERNS)
+
+
+def generate_lines(count: int = 20000, seed: int = 0):
+    """生成标题、正文、恶意长行和随机拼接的行"""
+    rng = random.Random(seed)
+    lines = []
+    for number in range(1, 200):
+        name = _sentence(rng, rng.randint(2, 8)).rstrip('。')
+        for style in TITLE_STYLES.values():
+            lines.append(style(number, name))
+        lines.append(f"第{to_chinese_numeral(number * 97)}章")
+    for _ in range(50):
+        lines.append(_adversarial_line(rng, rng.randint(20, 400)))
+        lines.append('　　' + _sentence(rng, rng.randint(10, 200)))
+    for _ in range(count):
+        line = ''.join(rng.choice(_PIECES) for _ in range(rng.randint(0, 12)))
+        lines.append(rng.choice(['', ' ', '　　', '\t']) + line)
+    return lines
+
+
+def test_match_equals_baseline():
+    """单行判断与原写法一致"""
+    scanner = TitleScanner(NovelParser.CHAPTER_PATTERNS)
+    for line in generate_lines():
+        stripped = line.strip()
+        expected = baseline_is_title(line)
+        assert (bool(stripped) and scanner.match(stripped)) == expected, repr(line)
+
+
+def test_scan_equals_baseline():
+    """整段扫描（含候选行预筛选）找到的标题与逐行判断一致"""
+    lines = generate_lines(seed=1)
+    text = '\n'.join(lines)
+    expected = [line.strip() for line in lines if baseline_is_title(line)]
+    scanned = [title for title, _, _ in TitleScanner(NovelParser.CHAPTER_PATTERNS).scan(text)]
+    assert scanned == expected
+
+
+if __name__ == '__main__':
+    test_match_equals_baseline()
+    print("✓ 单行判断与原规则一致")
+    test_scan_equals_baseline()
+    print("✓ 整段扫描与原规则一致")
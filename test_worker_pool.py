@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+多书并行发布测试
+用不打开浏览器的发布器替代 TomatoNovelPublisher，检查选取章节范围和合并结果
+（可直接运行，也可以用 pytest 运行）
+"""
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+
+from worker_pool import PublisherPool
+
+ACCOUNTS = 2
+
+
+class FakePublisher:
+    """记录收到的章节，全部视为发布成功"""
+
+    def __init__(self):
+        self.config = {}
+        self._editor_loaded = True
+        self.published = []
+
+    def publish_batch(self, chapters):
+        titles = [chapter['title'] for chapter in chapters]
+        self.published.extend(titles)
+        return {'success': titles, 'failed': [], 'unconfirmed': [], 'skipped': []}
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def _pool(**settings):
+    """在临时目录中创建工作池（解析缓存也写在临时目录），每个账号预先放入一个假发布器"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            with open('config.json', 'w', encoding='utf-8') as f:
+                json.dump({'publish_url': 'https://example.com/publish', **settings}, f)
+            pool = PublisherPool('config.json', workers=ACCOUNTS)
+            for n in range(ACCOUNTS):
+                pool._publishers[(f'account{n}', 1)] = FakePublisher()
+            yield pool
+        finally:
+            os.chdir(cwd)
+
+
+def _write_novel(path: str, chapters: int, encoding: str = 'utf-8', newline: str = '\n'):
+    text = ''.join(f"第{i}章 标题{i}{newline}正文{i}{newline}" for i in range(1, chapters + 1))
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        f.write(text)
+
+
+def test_slice_lazy_and_fallback():
+    """懒加载索引和退回普通解析（UTF-16、只用 \\r 换行）的文件都只发布选中的章节"""
+    with _pool() as pool:
+        _write_novel('utf8.txt', 6)
+        _write_novel('utf16.txt', 6, encoding='utf-16')
+        _write_novel('cr.txt', 6, newline='\r')
+        for name in ('utf8.txt', 'utf16.txt', 'cr.txt'):
+            publisher = FakePublisher()
+            result = pool._publish_book(publisher, {'file': name, 'mode': 'immediate',
+                                                    'start_index': 2, 'count': 3})
+            assert publisher.published == ['第3章 标题3', '第4章 标题4', '第5章 标题5'], name
+            assert 'error' not in result
+
+
+def test_results_keyed_by_position():
+    """同名的书分别统计，合并结果的键与 publish_batch 一致"""
+    with _pool() as pool:
+        _write_novel('novel.txt', 4)
+        os.mkdir('copy')
+        _write_novel(os.path.join('copy', 'novel.txt'), 2)
+        result = pool.run([
+            {'file': 'novel.txt', 'mode': 'immediate', 'account': 'account0'},
+            {'file': os.path.join('copy', 'novel.txt'), 'mode': 'immediate', 'account': 'account1'},
+        ])
+        assert [book['name'] for book in result['books']] == ['novel', 'novel']
+        assert [len(book['success']) for book in result['books']] == [4, 2]
+        assert len(result['success']) == 6
+        assert set(result) == {'success', 'failed', 'unconfirmed', 'schedule', 'skipped', 'books'}
+
+
+if __name__ == '__main__':
+    test_slice_lazy_and_fallback()
+    print("✓ 懒加载和退回普通解析的文件都按范围发布")
+    test_results_keyed_by_position()
+    print("✓ 同名书籍分别统计")
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+条件等待
+用 WebDriverWait 轮询就绪探针代替固定的 time.sleep，
+条件一满足立即继续，并记录每次等待实际花费的时间
+"""
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from selenium.common.exceptions import (
+    JavascriptException, StaleElementReferenceException, TimeoutException, WebDriverException
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 各类等待的默认超时（秒），可在 config.json 的 wait_timeouts 中覆盖
+DEFAULT_TIMEOUTS = {
+    'page_ready': 15,       # 页面加载完成
+    'editor': 15,           # 编辑器渲染完成
+    'submit': 10,           # 提交后出现提示
+    'network_idle': 5,      # 网络请求停止
+    'element': 5,           # 其他页面元素
+}
+
+# 轮询间隔（秒）
+POLL_INTERVAL = 0.1
+
+# 资源请求数保持不变多久视为网络空闲（秒）
+NETWORK_IDLE_TIME = 0.5
+
+# 章节编辑器
+EDITOR_XPATH = '//textarea[@placeholder="请输入章节内容"] | //div[@contenteditable="true"]'
+
+# 提交成功后的提示（toast / message 组件）
+SUBMIT_TOAST_XPATH = (
+    '//*[contains(@class,"toast") or contains(@class,"message") or contains(@class,"notice")]'
+    '[contains(.,"成功") or contains(.,"已发布") or contains(.,"已提交") or contains(.,"定时")]'
+)
+
+# 探针：输入 driver，条件满足时返回真值
+Probe = Callable[[Any], Any]
+
+
+def document_ready(driver) -> bool:
+    """页面 document.readyState 为 complete"""
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+def editor_mounted(driver):
+    """章节编辑器已出现，返回编辑器元素"""
+    elements = driver.find_elements(By.XPATH, EDITOR_XPATH)
+    return elements[0] if elements else False
+
+
+def submit_toast(driver):
+    """提交后出现成功提示，返回提示元素"""
+    elements = driver.find_elements(By.XPATH, SUBMIT_TOAST_XPATH)
+    return next((element for element in elements if element.is_displayed()), False)
+
+
+# 页面内的资源请求计数器：performance.getEntriesByType 的条目数在资源计时缓冲区
+# 写满（默认 250 条）后不再增长，改用 PerformanceObserver 累计，不受缓冲区大小限制；
+# 不调用 clearResourceTimings，页面统计（lean_mode、publisher）仍能读到全部条目
+RESOURCE_COUNT_SCRIPT = """
+if (!window.__fanqieResources) {
+    if (typeof PerformanceObserver === 'undefined') {
+        return performance.getEntriesByType('resource').length;
+    }
+    window.__fanqieResources = {count: 0};
+    new PerformanceObserver(list => {
+        window.__fanqieResources.count += list.getEntries().length;
+    }).observe({type: 'resource', buffered: true});
+}
+return window.__fanqieResources.count;
+"""
+
+
+class NetworkIdle:
+    """
+    网络空闲探针
+
+    页面资源请求数（PerformanceObserver 计数）在 idle_time 秒内没有变化时视为空闲；
+    每次等待需要新建一个实例
+    """
+
+    def __init__(self, idle_time: float = NETWORK_IDLE_TIME):
+        self.idle_time = idle_time
+        self._count = None
+        self._since = None
+
+    def __call__(self, driver) -> bool:
+        count = driver.execute_script(RESOURCE_COUNT_SCRIPT)
+        now = time.monotonic()
+        if count != self._count:
+            self._count, self._since = count, now
+            return False
+        return now - self._since >= self.idle_time
+
+
+# 内置探针，network_idle 是探针工厂（有状态）
+DEFAULT_PROBES = {
+    'page_ready': document_ready,
+    'editor': editor_mounted,
+    'submit': submit_toast,
+    'network_idle': NetworkIdle,
+}
+
+
+class WaitEngine:
+    """条件等待引擎"""
+
+    def __init__(self, driver, timeouts: Dict[str, float] = None,
+                 probes: Dict[str, Probe] = None, poll_interval: float = POLL_INTERVAL):
+        """
+        Args:
+            driver: WebDriver 实例
+            timeouts: 各类等待的超时（秒），未给出的使用 DEFAULT_TIMEOUTS
+            probes: 替换内置探针（键同 DEFAULT_PROBES）
+            poll_interval: 轮询间隔（秒）
+        """
+        self.driver = driver
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.probes = {**DEFAULT_PROBES, **(probes or {})}
+        self.poll_interval = poll_interval
+        # 每类等待实际花费的时间 {名称: [秒, ...]}
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        # 超时次数 {名称: 次数}
+        self.timeouts_hit: Dict[str, int] = defaultdict(int)
+
+    def until(self, name: str, condition: Probe, timeout: float = None, required: bool = True):
+        """
+        等待条件满足
+
+        Args:
+            name: 等待名称（用于记录耗时）
+            condition: 探针，返回真值时结束等待
+            timeout: 超时（秒），默认按 name 查 timeouts，查不到用 element 的超时
+            required: 超时时是否抛出 TimeoutException；为 False 时返回 None
+
+        Returns:
+            探针最后返回的真值
+        """
+        if timeout is None:
+            timeout = self.timeouts.get(name, self.timeouts['element'])
+
+        start = time.perf_counter()
+        try:
+            wait = WebDriverWait(self.driver, timeout, poll_frequency=self.poll_interval,
+                                 ignored_exceptions=(JavascriptException, StaleElementReferenceException))
+            return wait.until(condition)
+        except TimeoutException:
+            self.timeouts_hit[name] += 1
+            if required:
+                raise
+            return None
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+
+    def page_ready(self, required: bool = False) -> bool:
+        """等待页面加载完成（driver.get 之后调用）"""
+        return bool(self.until('page_ready', self.probes['page_ready'], required=required))
+
+    def editor(self):
+        """等待章节编辑器出现，返回编辑器元素"""
+        return self.until('editor', self.probes['editor'])
+
+    def submitted(self) -> bool:
+        """等待提交成功提示；页面没有提示时等到网络空闲为止"""
+        if self.until('submit', self.probes['submit'], required=False):
+            return True
+        self.network_idle()
+        return False
+
+    def network_idle(self, name: str = 'network_idle') -> bool:
+        """等待页面没有新的网络请求"""
+        try:
+            probe = self.probes['network_idle']()
+            return bool(self.until(name, probe, timeout=self.timeouts['network_idle'], required=False))
+        except WebDriverException:
+            # 页面跳转过程中无法执行脚本，视为未空闲
+            return False
+
+    def element(self, name: str, locator, required: bool = True):
+        """
+        等待元素出现
+
+        Args:
+            name: 等待名称
+            locator: (By.XPATH, '...') 形式的定位器
+            required: 超时时是否抛出异常
+        """
+        def probe(driver):
+            elements = driver.find_elements(*locator)
+            return elements[0] if elements else False
+
+        return self.until(name, probe, required=required)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        耗时统计
+
+        Returns:
+            {名称: {'count', 'total', 'mean', 'max', 'timeouts'}}
+        """
+        stats = {}
+        for name, durations in self.timings.items():
+            stats[name] = {
+                'count': len(durations),
+                'total': sum(durations),
+                'mean': sum(durations) / len(durations),
+                'max': max(durations),
+                'timeouts': self.timeouts_hit.get(name, 0),
+            }
+        return stats
+
+    def print_summary(self):
+        """打印耗时统计"""
+        stats = self.summary()
+        if not stats:
+            return
+
+        print("等待耗时统计:")
+        for name, stat in sorted(stats.items(), key=lambda item: -item[1]['total']):
+            line = (f"  {name}: {stat['count']} 次，平均 {stat['mean']:.2f} s，"
+                    f"最长 {stat['max']:.2f} s，共 {stat['total']:.1f} s")
+            if stat['timeouts']:
+                line += f"（超时 {stat['timeouts']} 次）"
+            print(line)
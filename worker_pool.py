@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+多书并行发布
+多个浏览器同时发布不同的书：每个浏览器使用从账号登录目录复制出的独立用户数据目录，
+同一本书的章节始终由一个浏览器按顺序发布，同一账号同时使用的浏览器数量可以限制；
+工作池总是自己启动浏览器，不使用后台浏览器（use_daemon）
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from parser import NovelParser
+from rate_limiter import AdaptiveRateLimiter
+
+# 复制出的浏览器目录存放位置
+WORKER_PROFILE_ROOT = './chrome_profiles'
+
+# 默认账号使用的登录目录
+DEFAULT_PROFILE = './chrome_profile'
+
+# 复制登录目录时跳过的文件：进程锁和可以重建的缓存
+_PROFILE_IGNORE = shutil.ignore_patterns(
+    'Singleton*', 'lockfile', 'LOCK', '*.tmp',
+    'Cache', 'Code Cache', 'GPUCache', 'GrShaderCache', 'ShaderCache', 'Service Worker',
+    'Crashpad', 'BrowserMetrics*',
+)
+
+
+def clone_profile(source: str, target: str, refresh: bool = False) -> str:
+    """
+    复制浏览器用户数据目录（保留登录状态）
+
+    Args:
+        source: 已登录的用户数据目录
+        target: 目标目录
+        refresh: 目标已存在时是否重新复制
+
+    Returns:
+        目标目录
+    """
+    target_path = Path(target)
+    if target_path.exists():
+        if not refresh:
+            return str(target_path)
+        shutil.rmtree(target_path, ignore_errors=True)
+
+    if Path(source).is_dir():
+        shutil.copytree(source, target_path, ignore=_PROFILE_IGNORE)
+    else:
+        # 账号还没有登录过，使用空目录，首次运行时需要扫码
+        target_path.mkdir(parents=True, exist_ok=True)
+    return str(target_path)
+
+
+def _empty_result() -> Dict[str, list]:
+    """空的发布结果（键与 publish_batch / publish_batch_scheduled 的结果一致）"""
+    return {'success': [], 'failed': [], 'unconfirmed': [], 'schedule': [], 'skipped': []}
+
+
+class PublisherPool:
+    """
+    浏览器工作池
+
+    books 中每本书的格式：
+        {
+            "name": "书名",                # 用于日志和结果汇总
+            "file": "novel.txt",           # 小说文件
+            "publish_url": "...",          # 该书的发布页面（默认用配置文件中的）
+            "account": "default",          # 账号名（对应 config.json 的 accounts）
+            "mode": "scheduled",           # scheduled 定时发布 / immediate 立即发布
+            "start_index": 0,              # 起始章节索引
+            "count": null,                 # 发布章节数（null 表示全部）
+            "start_date": "2024-01-01",    # 定时发布开始日期（默认明天）
+            "publish_times": ["08:00"]     # 定时发布时间（默认用配置文件中的）
+        }
+    """
+
+    def __init__(self, config_file: str = "config.json", workers: int = 2,
+                 per_account: int = None, refresh_profiles: bool = False):
+        """
+        Args:
+            config_file: 配置文件路径
+            workers: 同时运行的浏览器总数
+            per_account: 每个账号同时运行的浏览器数（默认读取配置 workers_per_account，再默认 1）
+            refresh_profiles: 是否重新复制各浏览器的用户数据目录
+        """
+        self.config_file = config_file
+        with open(config_file, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        self.workers = max(workers, 1)
+        self.per_account = per_account or self.config.get('workers_per_account', 1)
+        self.refresh_profiles = refresh_profiles
+
+        self._lock = threading.Condition()
+        # 待发布的 (书籍序号, 书)
+        self._pending: List[tuple] = []
+        # 每个账号空闲的浏览器编号
+        self._free_slots: Dict[str, List[int]] = {}
+        # (账号, 编号) -> 发布器，同一个浏览器在多本书之间复用
+        self._publishers: Dict[tuple, 'TomatoNovelPublisher'] = {}
+        # 同一账号的浏览器共用一个限速器，平台按账号限流
+        self._limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+    def _account_profile(self, account: str) -> str:
+        """账号的登录目录（config.json 的 accounts.<账号>.profile）"""
+        accounts = self.config.get('accounts', {})
+        if account in accounts and accounts[account].get('profile'):
+            return accounts[account]['profile']
+        return self.config.get('profile_dir', DEFAULT_PROFILE)
+
+    def _account_limit(self, account: str) -> int:
+        accounts = self.config.get('accounts', {})
+        return max(accounts.get(account, {}).get('max_workers', self.per_account), 1)
+
+    def _get_publisher(self, account: str, slot: int) -> 'TomatoNovelPublisher':
+        """获取（必要时创建）账号的第 slot 个浏览器"""
+        key = (account, slot)
+        if key not in self._publishers:
+            # 发布器依赖 selenium，第一次创建时才导入
+            from publisher import TomatoNovelPublisher
+
+            profile = clone_profile(
+                self._account_profile(account),
+                os.path.join(WORKER_PROFILE_ROOT, f"{account}-{slot}"),
+                refresh=self.refresh_profiles
+            )
+            publisher = TomatoNovelPublisher(self.config_file, profile_dir=profile)
+            # 后台浏览器只有一个会话，多个浏览器同时发布时各自用复制出的目录启动（忽略 use_daemon）
+            publisher.config['use_daemon'] = False
+            publisher.rate_limiter = self._account_limiter(account)
+            self._publishers[key] = publisher
+        return self._publishers[key]
+
+    def _account_limiter(self, account: str) -> AdaptiveRateLimiter:
+        """账号的限速器（config.json 的 accounts.<账号>.rate_limit，默认用全局的 rate_limit）"""
+        with self._lock:
+            if account not in self._limiters:
+                settings = self.config.get('accounts', {}).get(account, {}).get('rate_limit')
+                self._limiters[account] = AdaptiveRateLimiter.from_config(
+                    settings or self.config.get('rate_limit'))
+            return self._limiters[account]
+
+    def _take_book(self) -> Optional[tuple]:
+        """
+        取出下一本账号有空闲浏览器的书
+
+        Returns:
+            (书籍序号, 书, 浏览器编号)，没有待发布的书时返回 None
+        """
+        with self._lock:
+            while True:
+                if not self._pending:
+                    return None
+                for i, (index, book) in enumerate(self._pending):
+                    slots = self._free_slots[book['account']]
+                    if slots:
+                        del self._pending[i]
+                        return index, book, slots.pop(0)
+                # 所有待发布书籍的账号都满了，等其他线程释放
+                self._lock.wait()
+
+    def _release_slot(self, account: str, slot: int):
+        with self._lock:
+            self._free_slots[account].append(slot)
+            self._lock.notify_all()
+
+    def _publish_book(self, publisher: 'TomatoNovelPublisher', book: Dict) -> Dict[str, list]:
+        """用一个浏览器按顺序发布一本书"""
+        parser = NovelParser(file_path=book['file'], lazy=True)
+        try:
+            start = book.get('start_index', 0)
+            stop = None if book.get('count') is None else start + book['count']
+            chapters = parser.get_chapters()
+            if parser.lazy:
+                # 只取范围内的章节视图，正文在发布到该章时才解码
+                chapters = chapters.view(start, stop)
+            else:
+                # 编码不支持按字节索引（如 UTF-16、只用 \r 换行）时已退回普通解析
+                chapters = chapters[start:stop]
+
+            # 每本书有自己的发布页面，切换后需要重新加载
+            publisher.config['publish_url'] = book.get('publish_url') or self.config['publish_url']
+            publisher._editor_loaded = False
+
+            if book.get('mode', 'scheduled') == 'immediate':
+                return {**_empty_result(), **publisher.publish_batch(chapters)}
+
+            start_date = book.get('start_date')
+            if start_date:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d')
+            else:
+                start_date = datetime.now() + timedelta(days=1)
+
+            return publisher.publish_batch_scheduled(
+                chapters=chapters,
+                start_date=start_date,
+                chapters_per_day=book.get('chapters_per_day', self.config.get('chapters_per_day', 2)),
+                publish_times=book.get('publish_times', self.config.get('publish_times', ['08:00', '20:00']))
+            )
+        finally:
+            parser.close()
+
+    def _worker(self, results: Dict[int, Dict]):
+        """工作线程：不断取书发布，直到没有待发布的书（结果按书籍序号保存，书名可能重复）"""
+        while True:
+            taken = self._take_book()
+            if taken is None:
+                return
+
+            index, book, slot = taken
+            account = book['account']
+            print(f"[{account}-{slot}] 开始发布《{book['name']}》")
+            try:
+                publisher = self._get_publisher(account, slot)
+                results[index] = self._publish_book(publisher, book)
+            except Exception as e:
+                print(f"[{account}-{slot}] ✗ 《{book['name']}》发布中断: {e}")
+                results.setdefault(index, _empty_result())['error'] = str(e)
+            finally:
+                self._release_slot(account, slot)
+
+            result = results[index]
+            print(f"[{account}-{slot}] 《{book['name']}》完成: "
+                  f"成功 {len(result['success'])} 章，失败 {len(result['failed'])} 章")
+
+    def run(self, books: List[Dict]) -> Dict:
+        """
+        并行发布多本书
+
+        Args:
+            books: 书籍列表（格式见类说明）
+
+        Returns:
+            {'success': [...], 'failed': [...], 'unconfirmed': [...], 'schedule': [...], 'books': [单本结果, ...]}，
+            success/failed/unconfirmed/schedule 为所有书按书籍顺序合并的结果，books 与传入的书籍顺序一致
+            （单本结果中的 name 为书名）
+        """
+        books = [dict(book) for book in books]
+        for book in books:
+            book.setdefault('account', 'default')
+            book.setdefault('name', Path(book['file']).stem)
+
+        self._pending = list(enumerate(books))
+        self._free_slots = {
+            account: list(range(1, self._account_limit(account) + 1))
+            for account in {book['account'] for book in books}
+        }
+
+        total_slots = sum(len(slots) for slots in self._free_slots.values())
+        workers = min(self.workers, len(books), total_slots)
+
+        print(f"\n{'=' * 50}")
+        print(f"多书并行发布: {len(books)} 本书，{workers} 个浏览器")
+        print(f"{'=' * 50}\n")
+
+        results: Dict[int, Dict] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(self._worker, results) for _ in range(workers)]:
+                future.result()
+
+        combined = _empty_result()
+        per_book = []
+        for index, book in enumerate(books):
+            result = results.get(index, _empty_result())
+            for key in combined:
+                combined[key].extend(result.get(key, []))
+            per_book.append({'name': book['name'], **result})
+        combined['books'] = per_book
+
+        print(f"\n{'=' * 50}")
+        print(f"多书并行发布完成")
+        print(f"成功: {len(combined['success'])} 章")
+        print(f"失败: {len(combined['failed'])} 章")
+        if combined['unconfirmed']:
+            print(f"未确认: {len(combined['unconfirmed'])} 章（已提交，请在作家后台核对）")
+        print(f"{'=' * 50}\n")
+
+        return combined
+
+    def close(self):
+        """关闭所有浏览器"""
+        for publisher in self._publishers.values():
+            publisher.close()
+        self._publishers.clear()
+
+
+def main():
+    """命令行入口"""
+    arg_parser = argparse.ArgumentParser(description='多个浏览器并行发布多本书')
+    arg_parser.add_argument('books', help='书籍列表 JSON 文件（格式见 PublisherPool）')
+    arg_parser.add_argument('-w', '--workers', type=int, default=2, help='同时运行的浏览器数（默认 2）')
+    arg_parser.add_argument('--per-account', type=int, default=None, help='每个账号同时运行的浏览器数')
+    arg_parser.add_argument('--refresh-profiles', action='store_true', help='重新复制浏览器用户数据目录')
+    arg_parser.add_argument('-c', '--config', default='config.json', help='配置文件（默认 config.json）')
+    args = arg_parser.parse_args()
+
+    try:
+        with open(args.books, 'r', encoding='utf-8') as f:
+            books = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"✗ 无法读取书籍列表: {e}")
+        sys.exit(1)
+
+    pool = PublisherPool(args.config, args.workers, args.per_account, args.refresh_profiles)
+    try:
+        pool.run(books)
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()